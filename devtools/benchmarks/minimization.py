@@ -0,0 +1,95 @@
+"""Benchmarks the cost of energy minimization when a new OpenMM context is created
+for every evaluation of the objective function compared to re-using a single context.
+
+Usage:
+
+    python devtools/benchmarks/minimization.py
+"""
+import functools
+import time
+
+import numpy
+from openforcefield.topology import Molecule
+from openforcefield.typing.engines.smirnoff import ForceField
+from scipy import optimize
+from simtk import openmm, unit
+
+from inspector.library.minimization import EnergyMinimizer
+
+SMILES = ["CCO", "c1ccccc1O", "CC(=O)Nc1ccc(O)cc1", "CN1CCC[C@H]1c2cccnc2"]
+
+N_REPEATS = 3
+
+
+def evaluate_with_new_context(conformer: numpy.ndarray, system: openmm.System):
+    """The objective function as it was implemented prior to re-using contexts."""
+
+    integrator = openmm.VerletIntegrator(0.001 * unit.femtoseconds)
+
+    platform = openmm.Platform.getPlatformByName("Reference")
+    openmm_context = openmm.Context(system, integrator, platform)
+
+    openmm_context.setPositions(conformer.reshape(system.getNumParticles(), 3))
+
+    state = openmm_context.getState(getEnergy=True, getForces=True)
+
+    return (
+        state.getPotentialEnergy().value_in_unit(unit.kilojoules_per_mole),
+        -state.getForces(asNumpy=True)
+        .value_in_unit(unit.kilojoules_per_mole / unit.nanometer)
+        .flatten(),
+    )
+
+
+def time_minimization(objective, initial_conformer: numpy.ndarray) -> float:
+
+    start_time = time.perf_counter()
+
+    for _ in range(N_REPEATS):
+
+        # Mirror the minimizer which evaluates the objective once more per iteration.
+        optimize.minimize(
+            objective,
+            initial_conformer,
+            method="L-BFGS-B",
+            jac=True,
+            callback=lambda x: objective(x),
+        )
+
+    return (time.perf_counter() - start_time) / N_REPEATS
+
+
+def main():
+
+    force_field = ForceField("openff_unconstrained-1.2.0.offxml")
+
+    print(f"{'smiles':<24} {'n_atoms':>7} {'new [s]':>9} {'reused [s]':>10} speedup")
+
+    for smiles in SMILES:
+
+        molecule = Molecule.from_smiles(smiles)
+        molecule.generate_conformers(n_conformers=1)
+
+        system = force_field.create_openmm_system(molecule.to_topology())
+        conformer = molecule.conformers[0].value_in_unit(unit.nanometer)
+
+        new_time = time_minimization(
+            functools.partial(evaluate_with_new_context, system=system), conformer
+        )
+
+        context = EnergyMinimizer._create_context(system)
+        reused_time = time_minimization(
+            functools.partial(
+                EnergyMinimizer._evaluate_energy_and_force, context=context
+            ),
+            conformer,
+        )
+
+        print(
+            f"{smiles:<24} {molecule.n_atoms:>7} {new_time:>9.4f} {reused_time:>10.4f} "
+            f"{new_time / reused_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmarks the cost of parsing the contents of an uploaded SDF file by first
+writing it to a temporary file compared to parsing it directly from memory, as is
+done by the ``/molecule/json`` endpoint.
+
+Usage:
+
+    python devtools/benchmarks/sdf_parsing.py
+"""
+import time
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from openforcefield.topology import Molecule
+
+from inspector.library.io import iter_sdf_string, molecule_from_sdf_record
+
+SMILES = ["CCO", "CC(=O)Nc1ccc(O)cc1", "C" * 50, "C" * 200]
+
+N_REPEATS = 20
+
+
+def parse_with_temporary_file(file_contents: str) -> Molecule:
+    """The parsing as it was implemented prior to parsing from memory."""
+
+    with NamedTemporaryFile(suffix=".sdf") as temporary_file:
+
+        with open(temporary_file.name, "w") as file:
+            file.write(file_contents)
+
+        return Molecule.from_file(file.name, "SDF")
+
+
+def parse_from_memory(file_contents: str) -> Molecule:
+
+    return next(
+        molecule_from_sdf_record(rdkit_molecule)
+        for rdkit_molecule in iter_sdf_string(file_contents)
+        if rdkit_molecule is not None
+    )
+
+
+def time_parsing(function, file_contents: str) -> float:
+
+    start_time = time.perf_counter()
+
+    for _ in range(N_REPEATS):
+        function(file_contents)
+
+    return (time.perf_counter() - start_time) / N_REPEATS
+
+
+def main():
+
+    print(
+        f"{'n_atoms':>7} {'size [kB]':>9} {'file [ms]':>9} {'memory [ms]':>11} speedup"
+    )
+
+    for smiles in SMILES:
+
+        molecule = Molecule.from_smiles(smiles)
+        molecule.generate_conformers(n_conformers=1)
+
+        with StringIO() as file_buffer:
+
+            molecule.to_file(file_buffer, "SDF")
+            file_contents = file_buffer.getvalue()
+
+        # Make sure both approaches produce the same molecule.
+        assert parse_with_temporary_file(file_contents) == parse_from_memory(
+            file_contents
+        )
+
+        file_time = time_parsing(parse_with_temporary_file, file_contents) * 1000.0
+        memory_time = time_parsing(parse_from_memory, file_contents) * 1000.0
+
+        print(
+            f"{molecule.n_atoms:>7} {len(file_contents) / 1024.0:>9.1f} "
+            f"{file_time:>9.3f} {memory_time:>11.3f} {file_time / memory_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmarks the cost of serializing the response of the ``/molecule/minimize``
+endpoint using FastAPI's default JSON response compared to the ``orjson`` based
+response used by the dev API, both with and without encoding the geometries.
+
+Usage:
+
+    python devtools/benchmarks/serialization.py
+"""
+import time
+
+import numpy
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from inspector.backend.core.responses import ORJSONResponse
+from inspector.library.models.minimization import MinimizationTrajectory
+
+N_FRAMES = 1000
+N_ATOMS = 500
+
+N_REPEATS = 5
+
+
+def serialize_default(trajectory: MinimizationTrajectory) -> bytes:
+    """The serialization as performed by FastAPI when a handler returns a model."""
+    return JSONResponse(jsonable_encoder(trajectory)).body
+
+
+def serialize_orjson(trajectory: MinimizationTrajectory) -> bytes:
+    return ORJSONResponse(trajectory).body
+
+
+def time_function(function, *args) -> float:
+
+    start_time = time.perf_counter()
+
+    for _ in range(N_REPEATS):
+        function(*args)
+
+    return (time.perf_counter() - start_time) / N_REPEATS
+
+
+def main():
+
+    geometries = numpy.random.random((N_FRAMES, N_ATOMS, 3)) * 10.0
+    energies = numpy.random.random(N_FRAMES)
+
+    print(f"{N_FRAMES} frames x {N_ATOMS} atoms\n")
+    print(f"{'encoding':>8} {'response':>8} {'create [ms]':>11} {'serialize [ms]':>14}")
+
+    for geometry_encoding in [None, "float64", "float32"]:
+
+        create_time = time_function(
+            MinimizationTrajectory.from_arrays, geometries, energies, geometry_encoding
+        )
+        trajectory = MinimizationTrajectory.from_arrays(
+            geometries, energies, geometry_encoding
+        )
+
+        for name, function in [
+            ("default", serialize_default),
+            ("orjson", serialize_orjson),
+        ]:
+
+            serialize_time = time_function(function, trajectory)
+
+            print(
+                f"{str(geometry_encoding):>8} {name:>8} {create_time * 1000.0:>11.1f} "
+                f"{serialize_time * 1000.0:>14.1f} "
+                f"({len(function(trajectory)) / 1024.0 ** 2:.1f} MB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,549 @@
-from tempfile import NamedTemporaryFile
+import asyncio
+import codecs
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
+import anyio
 import numpy
-from fastapi import APIRouter
-from openforcefield.topology import Molecule
-from openforcefield.typing.engines.smirnoff import ForceField
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from simtk import unit
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive
 
+from inspector.backend.core.config import settings
+from inspector.backend.core.executor import ExecutorSaturatedError, executor
+from inspector.backend.core.forcefield import (
+    ForceFieldSource,
+    UnknownForceFieldError,
+    call_with_force_field,
+    force_field_cache,
+    force_field_source,
+    register_force_field,
+)
+from inspector.backend.core.metrics import observe_molecule_sizes
+from inspector.backend.core.profiling import UnknownProfileError, profile_buffer
+from inspector.backend.core.responses import ORJSONResponse, dumps
+from inspector.backend.models.forcefield import (
+    RegisteredForceField,
+    RegisterForceFieldBody,
+)
 from inspector.backend.models.molecules import (
+    ApplyParametersBatchBody,
     ApplyParametersBody,
+    DecomposeEnergyBatchBody,
     DecomposeEnergyBody,
     MinimizeConformerBody,
+    MoleculeRecordResult,
     MoleculeToJSONBody,
     SummarizeGeometryBody,
+    _BaseForceFieldBody,
+)
+from inspector.backend.models.profiling import ProfileInfo
+from inspector.library.io import (
+    SDFRecordSplitter,
+    iter_sdf_string,
+    molecule_from_sdf_record,
+)
+from inspector.library.models.array import ArrayDType
+from inspector.library.models.cache import CacheInfo
+from inspector.library.models.energy import DecomposedEnergy, DecomposedEnergyBatch
+from inspector.library.models.forcefield import (
+    AppliedParameters,
+    AppliedParametersResult,
 )
-from inspector.library.decomposition import evaluate_per_term_energies
-from inspector.library.forcefield import label_molecule
-from inspector.library.geometry import summarize_geometry
-from inspector.library.minimization import EnergyMinimizer
-from inspector.library.models.energy import DecomposedEnergy
-from inspector.library.models.forcefield import AppliedParameters
 from inspector.library.models.geometry import GeometrySummary
 from inspector.library.models.minimization import MinimizationTrajectory
-from inspector.library.models.molecule import RESTMolecule
+from inspector.library.models.molecule import InvalidMoleculeError, RESTMolecule
+
+if TYPE_CHECKING:
+    from openforcefield.typing.engines.smirnoff import ForceField
+
+# NOTE: The library modules which apply force fields and evaluate energies import
+#       the OpenFF toolkit, OpenMM, MDTraj and SciPy, which are slow to import. They
+#       are therefore only imported by the endpoints which use them so that the app
+#       starts quickly. See ``inspector.backend.core.warmup`` for importing them
+#       eagerly instead.
+
+T = TypeVar("T")
 
 api_router = APIRouter()
 
 
+def _force_field_source(body: _BaseForceFieldBody) -> ForceFieldSource:
+    """Resolves the force field specified by a request body. The force field itself
+    is loaded by the executor alongside the work which requires it (see
+    ``call_with_force_field``) so that loading counts towards the executor limits."""
+
+    try:
+        return force_field_source(
+            body.smirnoff_xml, body.openff_name, body.force_field_id
+        )
+    except UnknownForceFieldError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _molecule_from_file(
+    file_contents: str, file_format: str, geometry_encoding: Optional[ArrayDType]
+) -> RESTMolecule:
+    """Parses a molecule from the contents of a molecule file without first writing
+    the contents to disk. Currently only the SDF ``file_format`` is supported."""
+
+    molecules = [
+        molecule_from_sdf_record(rdkit_molecule)
+        for rdkit_molecule in iter_sdf_string(file_contents)
+        if rdkit_molecule is not None
+    ]
+
+    if len(molecules) != 1:
+
+        raise InvalidMoleculeError(
+            f"The file must contain exactly one molecule ({len(molecules)} found)."
+        )
+
+    return RESTMolecule.from_openff(molecules[0], geometry_encoding)
+
+
+def _molecules_from_sdf_records(
+    records: List[str], start_index: int, geometry_encoding: Optional[ArrayDType]
+) -> Tuple[List[bytes], List[int]]:
+    """Parses the text of a batch of SDF records, returning a JSON serialized
+    ``MoleculeRecordResult`` for each record and the number of atoms in each of the
+    records which were successfully parsed."""
+
+    results = []
+    n_atoms = []
+
+    for index, record in enumerate(records, start=start_index):
+
+        try:
+
+            rdkit_molecule = next(iter_sdf_string(record), None)
+
+            if rdkit_molecule is None:
+                raise InvalidMoleculeError("The SDF record could not be parsed.")
+
+            result = MoleculeRecordResult(
+                index=index,
+                molecule=RESTMolecule.from_openff(
+                    molecule_from_sdf_record(rdkit_molecule), geometry_encoding
+                ),
+            )
+            n_atoms.append(len(result.molecule.symbols))
+
+        except Exception as e:
+            result = MoleculeRecordResult(
+                index=index, error=f"{e.__class__.__name__}: {e}"
+            )
+
+        results.append(dumps(result))
+
+    return results, n_atoms
+
+
+async def _run_when_available(function: Callable[..., T], *args: Any) -> T:
+    """Runs a function on the executor, waiting for up to ``STREAM_MAX_WAIT`` seconds
+    for capacity rather than failing immediately if the executor is saturated. This is
+    used once a streamed response has already started, at which point the whole
+    response can no longer be failed.
+
+    Raises:
+        ExecutorSaturatedError: If the executor remained saturated for the whole wait,
+            in which case an error should be streamed for each affected record.
+    """
+
+    return await executor.run_when_available(settings.STREAM_MAX_WAIT, function, *args)
+
+
+async def _stream_molecules(
+    request: Request, geometry_encoding: Optional[ArrayDType]
+) -> AsyncIterator[bytes]:
+    """Parses the records of an SDF file as it is uploaded, yielding each parsed
+    record as a line of JSON."""
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    splitter = SDFRecordSplitter()
+
+    pending_records: List[str] = []
+    n_processed = 0
+
+    chunks = request.stream()
+
+    async def process_records(records: List[str]) -> List[bytes]:
+
+        try:
+            results, n_atoms = await _run_when_available(
+                _molecules_from_sdf_records, records, n_processed, geometry_encoding
+            )
+        except ExecutorSaturatedError as e:
+
+            return [
+                dumps(
+                    MoleculeRecordResult(
+                        index=index, error=f"{e.__class__.__name__}: {e}"
+                    )
+                )
+                for index in range(n_processed, n_processed + len(records))
+            ]
+
+        observe_molecule_sizes("/molecule/json/stream", *n_atoms)
+
+        return results
+
+    while True:
+
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            break
+        except ClientDisconnect:
+            # There is no one left to send any results to.
+            return
+
+        pending_records.extend(splitter.feed(decoder.decode(chunk)))
+
+        while len(pending_records) >= settings.SDF_STREAM_BATCH_SIZE:
+
+            records = pending_records[: settings.SDF_STREAM_BATCH_SIZE]
+            pending_records = pending_records[settings.SDF_STREAM_BATCH_SIZE :]
+
+            for line in await process_records(records):
+                yield line + b"\n"
+
+            n_processed += len(records)
+
+    pending_records.extend(splitter.feed(decoder.decode(b"", final=True)))
+    final_record = splitter.flush()
+
+    if final_record is not None:
+        pending_records.append(final_record)
+
+    if len(pending_records) > 0:
+
+        for line in await process_records(pending_records):
+            yield line + b"\n"
+
+
+class _RequestStreamingResponse(StreamingResponse):
+    """A streaming response whose content is generated while the request body is
+    still being received.
+
+    Notes:
+        * ``StreamingResponse`` listens for the client disconnecting by reading
+          messages from the client, which would otherwise consume the chunks of the
+          request body before the content can read them. A disconnect is instead
+          detected by the content when reading the request body.
+    """
+
+    async def listen_for_disconnect(self, receive: Receive):
+        await anyio.sleep_forever()
+
+
+def _label_molecules(
+    molecules: List[RESTMolecule], force_field: "ForceField"
+) -> List[bytes]:
+    """Labels a chunk of molecules, returning a JSON serialized
+    ``AppliedParametersResult`` for each molecule."""
+
+    from inspector.library.forcefield import label_molecules_batch
+
+    return [dumps(result) for result in label_molecules_batch(molecules, force_field)]
+
+
+async def _label_molecules_when_available(
+    molecules: List[RESTMolecule], force_field: ForceFieldSource
+) -> List[bytes]:
+    """Labels a chunk of molecules on the executor, returning an error
+    ``AppliedParametersResult`` for each molecule if the executor remained saturated
+    for longer than ``STREAM_MAX_WAIT`` seconds."""
+
+    try:
+        return await _run_when_available(
+            call_with_force_field, force_field, _label_molecules, molecules
+        )
+    except ExecutorSaturatedError as e:
+
+        error = dumps(AppliedParametersResult(error=f"{e.__class__.__name__}: {e}"))
+        return [error] * len(molecules)
+
+
+async def _stream_applied_parameters(
+    molecules: List[RESTMolecule], force_field: ForceFieldSource
+) -> AsyncIterator[bytes]:
+    """Labels a batch of molecules in chunks of ``BATCH_CHUNK_SIZE`` using the shared
+    executor, yielding the result for each molecule as a line of JSON in the same
+    order as the input molecules. At most ``BATCH_MAX_WORKERS`` chunks of the batch
+    are processed at once."""
+
+    chunk_size = settings.BATCH_CHUNK_SIZE
+    max_pending = max(settings.BATCH_MAX_WORKERS, 1)
+
+    pending: Deque["asyncio.Future[List[bytes]]"] = deque()
+
+    try:
+
+        for start_index in range(0, len(molecules), chunk_size):
+
+            if len(pending) >= max_pending:
+
+                for line in await pending.popleft():
+                    yield line + b"\n"
+
+            pending.append(
+                asyncio.ensure_future(
+                    _label_molecules_when_available(
+                        molecules[start_index : start_index + chunk_size], force_field
+                    )
+                )
+            )
+
+        while len(pending) > 0:
+
+            for line in await pending.popleft():
+                yield line + b"\n"
+
+    finally:
+
+        # Make sure not to wait on any remaining work if the client disconnects.
+        for future in pending:
+            future.cancel()
+
+
 @api_router.post("/molecule/json", response_model=RESTMolecule)
 async def post_molecule_to_json(body: MoleculeToJSONBody):
 
-    with NamedTemporaryFile(suffix=f".{body.file_format}") as temporary_file:
+    try:
+        molecule = await executor.run(
+            _molecule_from_file,
+            body.file_contents,
+            body.file_format,
+            body.geometry_encoding,
+        )
+    except InvalidMoleculeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    observe_molecule_sizes("/molecule/json", len(molecule.symbols))
+
+    return ORJSONResponse(molecule)
 
-        with open(temporary_file.name, "w") as file:
-            file.write(body.file_contents)
 
-        off_molecule = Molecule.from_file(file.name, body.file_format)
+@api_router.post(
+    "/molecule/json/stream",
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {"chemical/x-mdl-sdfile": {"schema": {"type": "string"}}},
+            "required": True,
+        }
+    },
+)
+async def post_molecules_to_json_stream(
+    request: Request, geometry_encoding: Optional[ArrayDType] = None
+):
+    """Parses a (streamed) multi-record SDF file, returning each record as a line of
+    newline-delimited ``MoleculeRecordResult`` JSON."""
 
-    return RESTMolecule.from_openff(off_molecule)
+    return _RequestStreamingResponse(
+        _stream_molecules(request, geometry_encoding),
+        media_type="application/x-ndjson",
+    )
 
 
 @api_router.post("/molecule/parameters", response_model=AppliedParameters)
 async def post_apply_parameters(body: ApplyParametersBody):
 
-    force_field = ForceField(
-        body.smirnoff_xml if body.smirnoff_xml is not None else body.openff_name
+    from inspector.library.forcefield import label_molecule
+
+    observe_molecule_sizes("/molecule/parameters", len(body.molecule.symbols))
+
+    force_field = _force_field_source(body)
+
+    return ORJSONResponse(
+        await executor.run(
+            call_with_force_field, force_field, label_molecule, body.molecule
+        )
+    )
+
+
+@api_router.post("/molecule/parameters/batch", response_class=StreamingResponse)
+async def post_apply_parameters_batch(body: ApplyParametersBatchBody):
+    """Applies parameters to each of a batch of molecules, returning the result for
+    each molecule as a line of newline-delimited ``AppliedParametersResult`` JSON in
+    the same order as the input molecules."""
+
+    observe_molecule_sizes(
+        "/molecule/parameters/batch",
+        *(len(molecule.symbols) for molecule in body.molecules),
     )
 
-    return label_molecule(body.molecule, force_field=force_field)
+    force_field = _force_field_source(body)
+
+    return StreamingResponse(
+        _stream_applied_parameters(body.molecules, force_field),
+        media_type="application/x-ndjson",
+    )
 
 
 @api_router.post("/molecule/geometry", response_model=GeometrySummary)
 async def post_summarize_geometry(body: SummarizeGeometryBody):
 
-    conformer = numpy.array(body.molecule.geometry).reshape(
-        len(body.molecule.symbols), 3
+    from inspector.library.geometry import summarize_geometry
+
+    observe_molecule_sizes("/molecule/geometry", len(body.molecule.symbols))
+
+    conformer = body.molecule.geometry_array
+
+    return ORJSONResponse(
+        await executor.run(summarize_geometry, body.molecule, conformer * unit.angstrom)
     )
-    return summarize_geometry(body.molecule, conformer * unit.angstrom)
 
 
 @api_router.post("/molecule/minimize", response_model=MinimizationTrajectory)
 async def post_minimize_conformer(body: MinimizeConformerBody):
 
-    force_field = ForceField(
-        body.smirnoff_xml if body.smirnoff_xml is not None else body.openff_name
-    )
-    conformer = (
-        numpy.array(body.molecule.geometry).reshape(len(body.molecule.symbols), 3)
-        * unit.angstrom
-    )
+    from inspector.library.minimization import EnergyMinimizer
+
+    observe_molecule_sizes("/molecule/minimize", len(body.molecule.symbols))
 
-    return EnergyMinimizer.minimize(
-        body.molecule,
-        conformer,
-        force_field,
-        method=body.method,
-        energy_tolerance=body.energy_tolerance,
+    force_field = _force_field_source(body)
+    conformer = body.molecule.geometry_array * unit.angstrom
+
+    return ORJSONResponse(
+        await executor.run(
+            call_with_force_field,
+            force_field,
+            EnergyMinimizer.minimize,
+            body.molecule,
+            conformer,
+            method=body.method,
+            energy_tolerance=body.energy_tolerance,
+            frame_stride=body.frame_stride,
+            frame_energy_threshold=body.frame_energy_threshold,
+            endpoints_only=body.endpoints_only,
+            geometry_encoding=body.geometry_encoding,
+            use_partial_charges=body.use_partial_charges,
+        )
     )
 
 
 @api_router.post("/molecule/energy", response_model=DecomposedEnergy)
 async def post_decompose_energy(body: DecomposeEnergyBody):
 
-    force_field = ForceField(
-        body.smirnoff_xml if body.smirnoff_xml is not None else body.openff_name
+    from inspector.library.decomposition import evaluate_per_term_energies
+
+    observe_molecule_sizes("/molecule/energy", len(body.molecule.symbols))
+
+    force_field = _force_field_source(body)
+    conformer = body.molecule.geometry_array * unit.angstrom
+
+    return ORJSONResponse(
+        await executor.run(
+            call_with_force_field,
+            force_field,
+            evaluate_per_term_energies,
+            body.molecule,
+            conformer,
+            use_partial_charges=body.use_partial_charges,
+        )
     )
-    conformer = (
-        numpy.array(body.molecule.geometry).reshape(len(body.molecule.symbols), 3)
+
+
+@api_router.post("/molecule/energy/batch", response_model=DecomposedEnergyBatch)
+async def post_decompose_energy_batch(body: DecomposeEnergyBatchBody):
+
+    from inspector.library.decomposition import evaluate_per_term_energies_batch
+
+    observe_molecule_sizes("/molecule/energy/batch", len(body.molecule.symbols))
+
+    force_field = _force_field_source(body)
+    conformers = (
+        numpy.array(body.conformers).reshape(
+            len(body.conformers), len(body.molecule.symbols), 3
+        )
         * unit.angstrom
     )
 
-    return evaluate_per_term_energies(body.molecule, conformer, force_field)
+    return ORJSONResponse(
+        await executor.run(
+            call_with_force_field,
+            force_field,
+            evaluate_per_term_energies_batch,
+            body.molecule,
+            conformers,
+            use_partial_charges=body.use_partial_charges,
+        )
+    )
+
+
+@api_router.post("/forcefield", response_model=RegisteredForceField)
+async def post_register_force_field(body: RegisterForceFieldBody):
+
+    try:
+        force_field_id = await executor.run(register_force_field, body.smirnoff_xml)
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid force field: {e}")
+
+    return RegisteredForceField(force_field_id=force_field_id)
+
+
+@api_router.get("/forcefield/cache", response_model=CacheInfo)
+async def get_force_field_cache_info():
+    return force_field_cache.info()
+
+
+def _check_profiling_enabled():
+
+    if not settings.PROFILING:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled.")
+
+
+@api_router.get("/profiles", response_model=List[ProfileInfo])
+async def get_profiles():
+    """Returns a description of each of the most recently recorded profiles."""
+
+    _check_profiling_enabled()
+    return profile_buffer.list_info()
+
+
+@api_router.get("/profiles/{profile_id}", response_class=Response)
+async def get_profile(
+    profile_id: str,
+    profile_format: Literal["text", "pstats"] = Query("text", alias="format"),
+    sort_by: Literal["cumulative", "tottime", "ncalls"] = "cumulative",
+    limit: int = 100,
+):
+    """Returns a recorded profile either as a human readable summary of the slowest
+    functions, or as a binary ``pstats`` file."""
+
+    _check_profiling_enabled()
+
+    try:
+        request_profile = profile_buffer.get(profile_id)
+    except UnknownProfileError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if profile_format == "text":
+
+        return PlainTextResponse(
+            await run_in_threadpool(request_profile.to_text, sort_by, limit)
+        )
+
+    return Response(
+        await run_in_threadpool(request_profile.to_pstats),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'},
+    )
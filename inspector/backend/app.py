@@ -1,12 +1,28 @@
-from fastapi import FastAPI
+import secrets
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from inspector.backend.api.dev.api import api_router
 from inspector.backend.core.config import settings
+from inspector.backend.core.executor import ExecutorSaturatedError, executor
+from inspector.backend.core.metrics import (
+    MetricsMiddleware,
+    MetricsResponse,
+    render_metrics,
+)
+from inspector.backend.core.profiling import ProfilingMiddleware
+from inspector.backend.core.responses import ORJSONResponse
+from inspector.backend.core.timing import ServerTimingMiddleware
+from inspector.backend.core.warmup import warm_up
 
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_DEV_STR}/openapi.json"
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_DEV_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -18,4 +34,57 @@ app.add_middleware(
 )
 app.add_middleware(GZipMiddleware)
 
+if settings.SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
+if settings.METRICS:
+    app.add_middleware(MetricsMiddleware)
+if settings.PROFILING:
+    app.add_middleware(ProfilingMiddleware)
+
 app.include_router(api_router, prefix=settings.API_DEV_STR)
+
+
+def _check_metrics_access(authorization: Optional[str]):
+
+    if not settings.METRICS:
+        raise HTTPException(status_code=404, detail="Metrics are not enabled.")
+
+    if settings.METRICS_TOKEN is None:
+        return
+
+    if authorization is None or not secrets.compare_digest(
+        authorization, f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="A valid metrics token is required.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", response_class=MetricsResponse, include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+
+    _check_metrics_access(authorization)
+    return MetricsResponse(render_metrics())
+
+
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(_: Request, exception: ExecutorSaturatedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exception)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+def warm_up_app():
+
+    if settings.WARMUP:
+        warm_up(settings.WARMUP_FORCE_FIELDS)
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    executor.shutdown(wait=False)
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import AnyHttpUrl, BaseSettings, validator
 
@@ -10,6 +10,38 @@ class Settings(BaseSettings):
 
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:4200"]
 
+    FORCE_FIELD_CACHE_SIZE: int = 8
+    FORCE_FIELD_CACHE_TTL: Optional[float] = None
+
+    PARTIAL_CHARGE_CACHE_SIZE: int = 1024
+    LABEL_CACHE_SIZE: int = 1024
+
+    FORCE_FIELD_REGISTRY_SIZE: int = 64
+    FORCE_FIELD_REGISTRY_DIR: Optional[str] = None
+
+    EXECUTOR_TYPE: Literal["thread", "process"] = "thread"
+    EXECUTOR_MAX_WORKERS: int = 4
+    EXECUTOR_MAX_QUEUE_SIZE: int = 16
+
+    BATCH_MAX_SIZE: int = 1000
+    BATCH_CHUNK_SIZE: int = 16
+    BATCH_MAX_WORKERS: int = 1
+
+    SDF_STREAM_BATCH_SIZE: int = 64
+
+    STREAM_MAX_WAIT: float = 60.0
+
+    WARMUP: bool = False
+    WARMUP_FORCE_FIELDS: List[str] = []
+
+    SERVER_TIMING: bool = False
+
+    METRICS: bool = False
+    METRICS_TOKEN: Optional[str] = None
+
+    PROFILING: bool = False
+    PROFILING_BUFFER_SIZE: int = 16
+
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
 
@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Literal, Optional, Tuple, TypeVar
+
+from inspector.backend.core.config import settings
+from inspector.backend.core.forcefield import initialize_worker, registry_directory
+from inspector.backend.core.profiling import profiled
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """An exception raised when work is submitted to an executor whose queue is
+    already full."""
+
+    def __init__(self, max_pending: int):
+
+        super(ExecutorSaturatedError, self).__init__(max_pending)
+        self.max_pending = max_pending
+
+    def __str__(self):
+        return (
+            f"The server is busy ({self.max_pending} requests are already being "
+            f"processed or queued). Please try again later."
+        )
+
+
+def _wake(waiter: "asyncio.Future[None]"):
+
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class BoundedExecutor:
+    """Runs blocking functions on a pool of workers away from the event loop, refusing
+    new work once the number of running and queued functions reaches a limit."""
+
+    @property
+    def n_pending(self) -> int:
+        """The number of functions which are either running or waiting to run."""
+        return self._n_pending
+
+    @property
+    def max_pending(self) -> int:
+        """The maximum number of functions which may be running or waiting to run."""
+        return self._max_workers + self._max_queue_size
+
+    def __init__(
+        self,
+        executor_type: Literal["thread", "process"],
+        max_workers: int,
+        max_queue_size: int,
+    ):
+        """
+
+        Args:
+            executor_type: Whether to run functions on a pool of threads or processes.
+                When using a process pool all arguments and return values must be
+                picklable.
+            max_workers: The maximum number of functions to run concurrently.
+            max_queue_size: The maximum number of functions which may wait for a
+                free worker before new work is refused.
+        """
+
+        self._executor_type = executor_type
+        self._max_workers = max_workers
+        self._max_queue_size = max_queue_size
+
+        self._executor: Optional[Executor] = None
+
+        self._n_pending = 0
+        self._lock = threading.Lock()
+
+        # The futures of the callers waiting for a pending function to finish, and
+        # the event loops they are waiting on.
+        self._waiters: List[
+            Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]
+        ] = []
+
+    def _get_executor(self) -> Executor:
+        """Returns the underlying executor, creating it if it has not yet been created
+        or was previously shutdown."""
+
+        with self._lock:
+
+            if self._executor is None:
+
+                if self._executor_type == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+                else:
+                    # Share the force field registry with the workers so that force
+                    # fields can be sent to them by reference rather than pickled.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._max_workers,
+                        initializer=initialize_worker,
+                        initargs=(registry_directory(),),
+                    )
+
+            return self._executor
+
+    async def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs a function on the pool of workers and waits for its result.
+
+        Notes:
+            * When using a thread pool the function is run in a copy of the current
+              context so that context variables, such as those used to collect
+              timings, are visible to it, and is profiled if the current request is
+              being profiled. Context variables are not propagated to process pools.
+            * The function continues to count towards the limit on pending functions
+              until it has finished, even if the caller is cancelled while waiting
+              for its result.
+
+        Raises:
+            ExecutorSaturatedError
+        """
+
+        with self._lock:
+
+            if self._n_pending >= self.max_pending:
+                raise ExecutorSaturatedError(self.max_pending)
+
+            self._n_pending += 1
+
+        return await self._submit(function, *args, **kwargs)
+
+    async def run_when_available(
+        self, timeout: float, function: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Runs a function on the pool of workers and waits for its result, waiting
+        for up to ``timeout`` seconds for the number of pending functions to drop below
+        the limit rather than failing immediately if the executor is saturated.
+
+        Notes:
+            * Callers are woken whenever a pending function finishes rather than
+              polling for capacity. See ``run`` for how the function is run.
+
+        Raises:
+            ExecutorSaturatedError: If no capacity became available within the
+                timeout.
+        """
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+
+            waiter = loop.create_future()
+
+            with self._lock:
+
+                if self._n_pending < self.max_pending:
+
+                    self._n_pending += 1
+                    break
+
+                self._waiters.append((loop, waiter))
+
+            try:
+                await asyncio.wait_for(waiter, max(deadline - loop.time(), 0.0))
+            except asyncio.TimeoutError:
+                raise ExecutorSaturatedError(self.max_pending)
+            finally:
+
+                with self._lock:
+
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+        return await self._submit(function, *args, **kwargs)
+
+    async def _submit(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Submits a function to the pool of workers once a pending slot has been
+        claimed for it, and waits for its result."""
+
+        call = functools.partial(function, *args, **kwargs)
+
+        if self._executor_type == "thread":
+            call = functools.partial(contextvars.copy_context().run, profiled(call))
+
+        try:
+            future = self._get_executor().submit(call)
+        except BaseException:
+
+            self._release()
+            raise
+
+        # Only release the slot once the work itself has finished (or was cancelled
+        # before it started), rather than when the caller stops waiting for it.
+        future.add_done_callback(lambda _: self._release())
+
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+
+        with self._lock:
+
+            self._n_pending -= 1
+            waiters, self._waiters = self._waiters, []
+
+        # Wake every waiting caller, each of which will then try to claim the free
+        # slot, as a single woken caller may already have timed out or been
+        # cancelled. This may be called from a worker thread.
+        for loop, waiter in waiters:
+
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # The event loop of the waiter has already been closed.
+                pass
+
+    def shutdown(self, wait: bool = True):
+        """Shuts down the underlying pool of workers. A new pool will be created the
+        next time a function is run."""
+
+        with self._lock:
+
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+executor = BoundedExecutor(
+    executor_type=settings.EXECUTOR_TYPE,
+    max_workers=settings.EXECUTOR_MAX_WORKERS,
+    max_queue_size=settings.EXECUTOR_MAX_QUEUE_SIZE,
+)
@@ -0,0 +1,341 @@
+import atexit
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from inspector.backend.core.config import settings
+from inspector.library.cache import LRUCache
+
+if TYPE_CHECKING:
+    from openforcefield.typing.engines.smirnoff import ForceField
+
+T = TypeVar("T")
+
+_REGISTERED_ID_PATTERN = re.compile("[0-9a-f]{64}")
+
+force_field_cache: "LRUCache[ForceField]" = LRUCache(
+    max_size=settings.FORCE_FIELD_CACHE_SIZE,
+    time_to_live=settings.FORCE_FIELD_CACHE_TTL,
+)
+# An in-memory cache of the SMIRNOFF serialized force fields registered through the
+# API, keyed by their id. The force fields themselves are stored on disk in the
+# ``registry_directory`` so that they are visible to every worker process.
+force_field_registry: LRUCache[str] = LRUCache(
+    max_size=settings.FORCE_FIELD_REGISTRY_SIZE
+)
+
+# Whether ``configure_library_caches`` has been called in this process.
+_library_caches_configured = False
+
+
+class UnknownForceFieldError(KeyError):
+    """An exception raised when a force field id has not been registered, or has
+    since expired from the registry."""
+
+    def __init__(self, force_field_id: str):
+
+        super(UnknownForceFieldError, self).__init__(force_field_id)
+        self.force_field_id = force_field_id
+
+    def __str__(self):
+        return (
+            f"No force field with id={self.force_field_id} has been registered. "
+            f"Registered force fields expire when the server restarts unless the "
+            f"``FORCE_FIELD_REGISTRY_DIR`` setting is set. Re-register the force "
+            f"field, or include its ``smirnoff_xml`` alongside its id to have it "
+            f"re-registered automatically."
+        )
+
+
+class ForceFieldSource(NamedTuple):
+    """A lightweight (and picklable) reference to a force field which can be sent to
+    a worker in place of the force field itself.
+
+    Attributes:
+        cache_key: The key of the force field in the ``force_field_cache``.
+        smirnoff_xml: The SMIRNOFF serialized force field if it was provided directly
+            rather than registered.
+        register: Whether to (re-)register ``smirnoff_xml`` once it has been loaded.
+    """
+
+    cache_key: Tuple[str, Hashable]
+    smirnoff_xml: Optional[str] = None
+    register: bool = False
+
+
+def force_field_id(smirnoff_xml: str) -> str:
+    """Returns the content-addressed id of a SMIRNOFF serialized force field."""
+    return hashlib.sha256(smirnoff_xml.encode()).hexdigest()
+
+
+def force_field_key(
+    smirnoff_xml: Optional[str], openff_name: Optional[str]
+) -> Tuple[str, Hashable]:
+    """Returns the key which uniquely identifies a force field in the force field
+    cache. Serialized force fields are identified by a hash of their contents."""
+
+    if smirnoff_xml is not None:
+        return "smirnoff_xml", force_field_id(smirnoff_xml)
+
+    return "openff_name", openff_name
+
+
+def registry_directory() -> str:
+    """Returns the directory which registered force fields are stored in, creating a
+    temporary directory for the lifetime of the server if the
+    ``FORCE_FIELD_REGISTRY_DIR`` setting is not set."""
+
+    if settings.FORCE_FIELD_REGISTRY_DIR is None:
+
+        settings.FORCE_FIELD_REGISTRY_DIR = tempfile.mkdtemp(
+            prefix="inspector-force-fields-"
+        )
+        atexit.register(
+            shutil.rmtree, settings.FORCE_FIELD_REGISTRY_DIR, ignore_errors=True
+        )
+
+    os.makedirs(settings.FORCE_FIELD_REGISTRY_DIR, exist_ok=True)
+    return settings.FORCE_FIELD_REGISTRY_DIR
+
+
+def _registry_path(registered_id: str) -> str:
+    return os.path.join(registry_directory(), f"{registered_id}.offxml")
+
+
+def _registered_xml(registered_id: str) -> Optional[str]:
+    """Retrieves a registered force field, returning ``None`` if no force field with
+    the id has been registered."""
+
+    smirnoff_xml = force_field_registry.get(registered_id)
+
+    if smirnoff_xml is not None:
+        return smirnoff_xml
+
+    # Ids are used as file names and so must be validated before touching the disk.
+    if _REGISTERED_ID_PATTERN.fullmatch(registered_id) is None:
+        return None
+
+    try:
+
+        with open(_registry_path(registered_id)) as file:
+            smirnoff_xml = file.read()
+
+    except FileNotFoundError:
+        return None
+
+    force_field_registry.set(registered_id, smirnoff_xml)
+    return smirnoff_xml
+
+
+def _store_registered_xml(smirnoff_xml: str) -> str:
+
+    registered_id = force_field_id(smirnoff_xml)
+    registered_path = _registry_path(registered_id)
+
+    if not os.path.isfile(registered_path):
+
+        # Write to a temporary file first so that concurrent readers never see a
+        # partially written force field.
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=registry_directory())
+
+        with os.fdopen(file_descriptor, "w") as file:
+            file.write(smirnoff_xml)
+
+        os.replace(temporary_path, registered_path)
+
+    force_field_registry.set(registered_id, smirnoff_xml)
+    return registered_id
+
+
+def register_force_field(smirnoff_xml: str) -> str:
+    """Parses and stores a SMIRNOFF serialized force field so that it can later be
+    loaded by its id rather than by re-sending its full contents.
+
+    Args:
+        smirnoff_xml: The SMIRNOFF serialized force field.
+
+    Returns:
+        The content-addressed id of the force field.
+    """
+
+    # Load the force field first to ensure that only valid force fields are stored.
+    load_force_field(smirnoff_xml=smirnoff_xml)
+    return _store_registered_xml(smirnoff_xml)
+
+
+def force_field_source(
+    smirnoff_xml: Optional[str] = None,
+    openff_name: Optional[str] = None,
+    registered_id: Optional[str] = None,
+) -> ForceFieldSource:
+    """Resolves the different ways in which a force field may be specified into a
+    ``ForceFieldSource`` without loading the force field itself.
+
+    Notes:
+        * Both a ``registered_id`` and the ``smirnoff_xml`` it was registered from may
+          be provided, in which case the force field will be re-registered if its id
+          has expired from the registry.
+
+    Args:
+        smirnoff_xml: The SMIRNOFF serialized force field.
+        openff_name: The name of an OpenFF released force field.
+        registered_id: The id returned when registering a force field using
+            ``register_force_field``.
+
+    Raises:
+        UnknownForceFieldError
+    """
+
+    if registered_id is None:
+        return ForceFieldSource(
+            force_field_key(smirnoff_xml, openff_name), smirnoff_xml
+        )
+
+    cache_key = "smirnoff_xml", registered_id
+
+    if _registered_xml(registered_id) is not None:
+        return ForceFieldSource(cache_key)
+
+    if smirnoff_xml is None:
+        raise UnknownForceFieldError(registered_id)
+
+    if force_field_id(smirnoff_xml) != registered_id:
+
+        raise ValueError(
+            "The force field id does not match the provided ``smirnoff_xml``."
+        )
+
+    return ForceFieldSource(cache_key, smirnoff_xml, register=True)
+
+
+def load_force_field_from_source(source: ForceFieldSource) -> "ForceField":
+    """Loads the force field referenced by a ``ForceFieldSource``, re-using a
+    previously loaded instance where possible.
+
+    Raises:
+        UnknownForceFieldError
+    """
+
+    from openforcefield.typing.engines.smirnoff import ForceField
+
+    def create_force_field() -> "ForceField":
+
+        source_type, source_value = source.cache_key
+
+        if source_type == "openff_name":
+            return ForceField(source_value)
+
+        smirnoff_xml = (
+            source.smirnoff_xml
+            if source.smirnoff_xml is not None
+            else _registered_xml(source_value)
+        )
+
+        if smirnoff_xml is None:
+            raise UnknownForceFieldError(source_value)
+
+        return ForceField(smirnoff_xml)
+
+    force_field = force_field_cache.get_or_create(source.cache_key, create_force_field)
+
+    if source.register:
+        _store_registered_xml(source.smirnoff_xml)
+
+    return force_field
+
+
+def load_force_field(
+    smirnoff_xml: Optional[str] = None,
+    openff_name: Optional[str] = None,
+    registered_id: Optional[str] = None,
+) -> "ForceField":
+    """Loads either a SMIRNOFF serialized force field, an OpenFF released force
+    field, or a previously registered force field, re-using a previously loaded
+    instance where possible.
+
+    Notes:
+        * The returned force field is shared between requests and so must not be
+          modified.
+        * See ``force_field_source`` for details about how the arguments are
+          resolved.
+
+    Args:
+        smirnoff_xml: The SMIRNOFF serialized force field.
+        openff_name: The name of an OpenFF released force field.
+        registered_id: The id returned when registering a force field using
+            ``register_force_field``.
+
+    Raises:
+        UnknownForceFieldError
+    """
+
+    return load_force_field_from_source(
+        force_field_source(smirnoff_xml, openff_name, registered_id)
+    )
+
+
+def call_with_force_field(
+    source: ForceFieldSource, function: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """Loads a force field and passes it as the ``force_field`` keyword argument of a
+    function.
+
+    This allows work which requires a force field to be submitted to a process pool
+    without pickling the force field itself: only the ``source`` is sent to the
+    worker, which loads the force field into (or retrieves it from) its own
+    ``force_field_cache``.
+
+    Notes:
+        * The caches of the library are configured (see ``configure_library_caches``)
+          the first time this function is called in a given process.
+    """
+
+    global _library_caches_configured
+
+    if not _library_caches_configured:
+
+        configure_library_caches()
+        _library_caches_configured = True
+
+    return function(*args, force_field=load_force_field_from_source(source), **kwargs)
+
+
+def configure_library_caches():
+    """Resizes the caches of the library functions which apply force fields to
+    molecules using the ``PARTIAL_CHARGE_CACHE_SIZE`` and ``LABEL_CACHE_SIZE``
+    settings. The ``LABEL_CACHE_SIZE`` applies to both the labels and the SMIRKS
+    matches they were created from.
+
+    Notes:
+        * This imports the OpenFF toolkit, and so is only called once work which
+          requires a force field is first run rather than when the app starts.
+    """
+
+    from inspector.library.forcefield import (
+        label_cache,
+        match_cache,
+        partial_charge_cache,
+    )
+
+    partial_charge_cache.resize(settings.PARTIAL_CHARGE_CACHE_SIZE)
+    label_cache.resize(settings.LABEL_CACHE_SIZE)
+    match_cache.resize(settings.LABEL_CACHE_SIZE)
+
+
+def initialize_worker(force_field_registry_directory: str):
+    """Initializes a worker process of a process pool executor so that it shares the
+    force field registry of the parent process."""
+
+    settings.FORCE_FIELD_REGISTRY_DIR = force_field_registry_directory
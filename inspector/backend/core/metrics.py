@@ -0,0 +1,245 @@
+"""Prometheus metrics which describe the traffic handled by, and the resources used
+by, the API.
+
+Notes:
+    * When the ``PROMETHEUS_MULTIPROC_DIR`` environment variable is set before this
+      module is imported, e.g. by ``inspector.backend.core.server.serve_forked``, the
+      metrics of every worker process are written to that directory and are
+      aggregated each time the metrics are collected, regardless of which worker
+      handles the request for them.
+    * The cache and executor gauges describe the state of each worker process, and
+      are updated by a worker after each request it handles and when it collects
+      the metrics. In multi-process mode the values of the live workers are summed.
+"""
+import os
+import sys
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from inspector.backend.core.executor import executor
+from inspector.library.timing import collect_timings
+
+registry = CollectorRegistry()
+
+http_requests = Counter(
+    "inspector_http_requests",
+    "The number of HTTP requests which have been handled.",
+    ("method", "path", "status"),
+    registry=registry,
+)
+http_request_duration = Histogram(
+    "inspector_http_request_duration_seconds",
+    "The time taken to handle each HTTP request.",
+    ("method", "path"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+    registry=registry,
+)
+http_requests_in_flight = Gauge(
+    "inspector_http_requests_in_flight",
+    "The number of HTTP requests which are currently being handled.",
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+executor_pending = Gauge(
+    "inspector_executor_pending",
+    "The number of functions which are running or queued on the executor.",
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+executor_max_pending = Gauge(
+    "inspector_executor_max_pending",
+    "The number of pending functions above which the executor refuses work.",
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+stage_duration = Histogram(
+    "inspector_stage_duration_seconds",
+    "The time taken by each stage of the library functions run for a request.",
+    ("stage",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0),
+    registry=registry,
+)
+
+molecule_atoms = Histogram(
+    "inspector_molecule_atoms",
+    "The number of atoms in each molecule sent to an endpoint.",
+    ("endpoint",),
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048),
+    registry=registry,
+)
+
+# The cache statistics are gauges rather than counters as they are reset whenever
+# the cache is cleared.
+cache_hits = Gauge(
+    "inspector_cache_hits",
+    "The number of cache lookups which found an entry since the cache was last "
+    "cleared.",
+    ("cache",),
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+cache_misses = Gauge(
+    "inspector_cache_misses",
+    "The number of cache lookups which did not find an entry since the cache was "
+    "last cleared.",
+    ("cache",),
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+cache_size = Gauge(
+    "inspector_cache_size",
+    "The number of entries currently stored in a cache.",
+    ("cache",),
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+# The module and attribute of each cache to report. Caches are only reported once
+# their module has been imported so that collecting metrics does not trigger any of
+# the slow imports deferred by the library.
+CACHES: Dict[str, Tuple[str, str]] = {
+    "force_field": ("inspector.backend.core.forcefield", "force_field_cache"),
+    "force_field_registry": (
+        "inspector.backend.core.forcefield",
+        "force_field_registry",
+    ),
+    "molecule": ("inspector.library.models.molecule", "molecule_cache"),
+    "topology": ("inspector.library.models.molecule", "topology_cache"),
+    "partial_charge": ("inspector.library.forcefield", "partial_charge_cache"),
+    "label": ("inspector.library.forcefield", "label_cache"),
+    "match": ("inspector.library.forcefield", "match_cache"),
+}
+
+
+def is_multiprocess() -> bool:
+    """Returns whether the metrics are being shared between multiple processes."""
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def update_process_metrics():
+    """Updates the gauges which describe the caches and executor of this process."""
+
+    executor_pending.set(executor.n_pending)
+    executor_max_pending.set(executor.max_pending)
+
+    for cache_name, (module_name, cache_attribute) in CACHES.items():
+
+        module = sys.modules.get(module_name)
+
+        if module is None:
+            continue
+
+        cache_info = getattr(module, cache_attribute).info()
+
+        cache_hits.labels(cache=cache_name).set(cache_info.hits)
+        cache_misses.labels(cache=cache_name).set(cache_info.misses)
+        cache_size.labels(cache=cache_name).set(cache_info.current_size)
+
+
+def render_metrics() -> bytes:
+    """Renders the metrics of this process, or of all processes when in multi-process
+    mode, in the Prometheus text exposition format."""
+
+    update_process_metrics()
+
+    if not is_multiprocess():
+        return generate_latest(registry)
+
+    multiprocess_registry = CollectorRegistry()
+    MultiProcessCollector(multiprocess_registry)
+
+    return generate_latest(multiprocess_registry)
+
+
+def observe_molecule_sizes(endpoint: str, *n_atoms: int):
+    """Records the number of atoms in each molecule sent to an endpoint."""
+
+    histogram = molecule_atoms.labels(endpoint=endpoint)
+
+    for value in n_atoms:
+        histogram.observe(value)
+
+
+class MetricsResponse(Response):
+    """A response containing metrics in the Prometheus text exposition format."""
+
+    # The charset is appended by starlette.
+    media_type = "text/plain; version=0.0.4"
+
+
+def _route_path(scope: Scope) -> str:
+    """Returns the path template of the route which will handle a request so that
+    requests for, e.g., different force field ids share the same labels."""
+
+    for route in getattr(scope.get("app"), "routes", []):
+
+        match, _ = route.matches(scope)
+
+        if match == Match.FULL:
+            return route.path
+
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Records the latency, status and per-stage timings of each HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], _route_path(scope)
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        http_requests_in_flight.inc()
+
+        try:
+
+            with collect_timings() as timings:
+                await self.app(scope, receive, send_wrapper)
+
+        finally:
+
+            http_requests_in_flight.dec()
+
+            http_requests.labels(
+                method=method, path=path, status=str(status_code)
+            ).inc()
+            http_request_duration.labels(method=method, path=path).observe(
+                time.perf_counter() - start_time
+            )
+
+            for stage, duration in timings.spans:
+                stage_duration.labels(stage=stage).observe(duration / 1000.0)
+
+            update_process_metrics()
@@ -0,0 +1,247 @@
+"""Utilities for profiling the work performed while handling individual requests.
+
+Profiling is opt-in: it must be enabled through the ``PROFILING`` setting, and is
+then only performed for requests which include the ``X-Inspector-Profile`` header.
+The profiles of the most recent requests are kept in memory and can be downloaded
+from the ``/profiles`` endpoints of the dev API.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, TypeVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from inspector.backend.core.config import settings
+from inspector.backend.models.profiling import ProfileInfo
+
+T = TypeVar("T")
+
+PROFILE_HEADER = "x-inspector-profile"
+PROFILE_ID_HEADER = "x-inspector-profile-id"
+
+
+class UnknownProfileError(KeyError):
+    """An exception raised when a profile could not be found, either because the id
+    is invalid or because the profile has been evicted."""
+
+    def __init__(self, profile_id: str):
+
+        super(UnknownProfileError, self).__init__(profile_id)
+        self.profile_id = profile_id
+
+    def __str__(self):
+        return (
+            f"No profile with id={self.profile_id} could be found. Only the most "
+            f"recent {settings.PROFILING_BUFFER_SIZE} profiles are retained."
+        )
+
+
+class RequestProfile:
+    """The profiles of each function run while handling a single request."""
+
+    def __init__(self, method: str, path: str):
+
+        self.info = ProfileInfo(
+            profile_id=uuid.uuid4().hex,
+            method=method,
+            path=path,
+            status=500,
+            created_at=datetime.now(timezone.utc),
+            duration_ms=0.0,
+            n_calls=0,
+        )
+
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add(self, profile: cProfile.Profile):
+
+        with self._lock:
+
+            self._profiles.append(profile)
+            self.info.n_calls += 1
+
+    def to_stats(self) -> pstats.Stats:
+        """Combines the profile of each function into a single set of statistics."""
+
+        with self._lock:
+            profiles = [*self._profiles]
+
+        stats = pstats.Stats(stream=io.StringIO())
+
+        for profile in profiles:
+            stats.add(profile)
+
+        return stats
+
+    def to_text(self, sort_by: str = "cumulative", limit: int = 100) -> str:
+        """Returns a human readable summary of the slowest functions.
+
+        Args:
+            sort_by: The key to sort the functions by, e.g. "cumulative" or "tottime".
+            limit: The maximum number of functions to include.
+        """
+
+        stream = io.StringIO()
+
+        stats = self.to_stats()
+        stats.stream = stream
+        stats.sort_stats(sort_by).print_stats(limit)
+
+        return stream.getvalue()
+
+    def to_pstats(self) -> bytes:
+        """Returns the statistics in the binary format written by
+        ``pstats.Stats.dump_stats``, which can be loaded by tools such as ``pstats``
+        or ``snakeviz``."""
+
+        return marshal.dumps(self.to_stats().stats)
+
+
+class ProfileBuffer:
+    """A thread-safe ring buffer which retains only the most recent profiles."""
+
+    def __init__(self, max_size: int):
+
+        self._max_size = max_size
+
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+
+        if self._max_size <= 0:
+            return
+
+        with self._lock:
+
+            self._profiles[profile.info.profile_id] = profile
+
+            while len(self._profiles) > self._max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> RequestProfile:
+        """Retrieves a profile by its id.
+
+        Raises:
+            UnknownProfileError
+        """
+
+        with self._lock:
+
+            if profile_id not in self._profiles:
+                raise UnknownProfileError(profile_id)
+
+            return self._profiles[profile_id]
+
+    def list_info(self) -> List[ProfileInfo]:
+        """Returns a description of each retained profile, most recent first."""
+
+        with self._lock:
+            return [profile.info for profile in reversed(self._profiles.values())]
+
+    def clear(self):
+
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_buffer = ProfileBuffer(settings.PROFILING_BUFFER_SIZE)
+
+# The profile of the request being handled in the current context, or ``None`` if
+# the request is not being profiled.
+_request_profile: contextvars.ContextVar[
+    Optional[RequestProfile]
+] = contextvars.ContextVar("request_profile", default=None)
+
+
+def profiled(function: Callable[..., T]) -> Callable[..., T]:
+    """A decorator which profiles each call of a function that is made while handling
+    a profiled request.
+
+    Notes:
+        * ``cProfile`` only profiles the thread which it was enabled on, and so this
+          should wrap the functions which are run on worker threads rather than the
+          request handlers themselves.
+        * Functions which are run on a process pool are not profiled.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs) -> T:
+
+        request_profile = _request_profile.get()
+
+        if request_profile is None:
+            return function(*args, **kwargs)
+
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active, e.g. on Python 3.12+ where only one
+            # profiler may be active per process.
+            return function(*args, **kwargs)
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+
+            profile.disable()
+            request_profile.add(profile)
+
+    return wrapper
+
+
+class ProfilingMiddleware:
+    """Profiles the requests which include the ``X-Inspector-Profile`` header, storing
+    the profiles in the ``profile_buffer`` and returning the id of each profile in the
+    ``X-Inspector-Profile-Id`` response header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+
+        if scope["type"] != "http" or not any(
+            name.lower() == PROFILE_HEADER.encode() for name, _ in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_wrapper(message: Message):
+
+            if message["type"] == "http.response.start":
+
+                request_profile.info.status = message["status"]
+
+                headers = MutableHeaders(scope=message)
+                headers.append(PROFILE_ID_HEADER, request_profile.info.profile_id)
+
+            await send(message)
+
+        start_time = time.perf_counter()
+        token = _request_profile.set(request_profile)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+
+            _request_profile.reset(token)
+
+            request_profile.info.duration_ms = (
+                time.perf_counter() - start_time
+            ) * 1000.0
+            profile_buffer.add(request_profile)
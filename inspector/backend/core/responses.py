@@ -0,0 +1,49 @@
+from typing import Any
+
+import numpy
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from inspector.library.models.minimization import MinimizationFrames
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Converts the objects which ``orjson`` cannot natively serialize into ones which
+    it can."""
+
+    if isinstance(value, BaseModel):
+        # Only shallow convert the model to a dictionary so that any nested lists of
+        # floats are serialized by ``orjson`` directly rather than copied by pydantic.
+        return dict(value)
+    elif isinstance(value, MinimizationFrames):
+        # Serialize the geometry of each frame directly from the underlying array.
+        return value.to_json_compatible()
+    elif isinstance(value, numpy.generic):
+        return value.item()
+    elif isinstance(value, numpy.ndarray):
+        # Arrays which are not natively supported, e.g. non-contiguous arrays.
+        return value.tolist()
+
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes an object, which may be or contain pydantic models and NumPy arrays,
+    to JSON."""
+
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """A JSON response which is serialized using ``orjson``.
+
+    Unlike the default response, handlers can return pydantic models (and NumPy
+    arrays) within this response directly, which avoids ``jsonable_encoder`` walking
+    every nested value of the model in Python.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
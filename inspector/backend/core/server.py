@@ -0,0 +1,200 @@
+"""Utilities for serving the API from multiple worker processes which are forked from
+a single, pre-warmed parent process."""
+import atexit
+import gc
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+from typing import List, Optional
+
+import uvicorn
+
+from inspector.backend.core.config import settings
+from inspector.backend.core.forcefield import registry_directory
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class _WorkerServer(uvicorn.Server):
+    """A uvicorn server which notifies the parent process once it is ready to accept
+    requests."""
+
+    def __init__(self, config: uvicorn.Config, worker_index: int, ready_fd: int):
+
+        super(_WorkerServer, self).__init__(config)
+
+        self._worker_index = worker_index
+        self._ready_fd = ready_fd
+
+    async def startup(self, sockets: Optional[List] = None):
+
+        await super(_WorkerServer, self).startup(sockets=sockets)
+
+        if not self.should_exit:
+            os.write(self._ready_fd, f"{self._worker_index}\n".encode())
+
+        os.close(self._ready_fd)
+
+
+def _wait_for_workers(ready_fd: int, n_workers: int, pids: List[int]):
+    """Reports each worker as it becomes ready, returning once either all workers are
+    ready or every worker has exited."""
+
+    n_ready = 0
+
+    with os.fdopen(ready_fd) as ready_file:
+
+        for line in ready_file:
+
+            worker_index = int(line)
+            n_ready += 1
+
+            logger.info(
+                f"Worker {worker_index} (pid {pids[worker_index]}) is ready "
+                f"[{n_ready}/{n_workers}]."
+            )
+
+            if n_ready == n_workers:
+                break
+
+    if n_ready == n_workers:
+        logger.info(f"All {n_workers} workers are ready.")
+    else:
+        logger.error(f"Only {n_ready} of {n_workers} workers started successfully.")
+
+
+def _configure_multiprocess_metrics():
+    """Stores the metrics of each worker in a directory shared by all of the workers
+    so that they are aggregated when collected, unless a directory has already been
+    provided through the ``PROMETHEUS_MULTIPROC_DIR`` environment variable."""
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        return
+
+    if "prometheus_client" in sys.modules:
+
+        raise RuntimeError(
+            "The metrics of multiple workers can only be shared when the app is "
+            "first imported by `serve_forked`."
+        )
+
+    metrics_directory = tempfile.mkdtemp(prefix="inspector-metrics-")
+    atexit.register(shutil.rmtree, metrics_directory, ignore_errors=True)
+
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_directory
+
+
+def serve_forked(app: str, host: str, port: int, log_level: str, n_workers: int):
+    """Serves an ASGI app from multiple worker processes which share a single
+    listening socket.
+
+    Notes:
+        * The app is imported, and the socket bound, in the calling process before
+          the workers are forked. Any modules imported and caches populated before
+          calling this function (see ``inspector.backend.core.warmup``) are therefore
+          shared copy-on-write between the workers rather than re-created by each.
+        * Force fields registered with any worker are stored in a registry directory
+          which is created before the workers are forked, and so can be loaded by
+          every worker.
+        * When ``METRICS`` is enabled the metrics of every worker are written to a
+          shared directory (see ``inspector.backend.core.metrics``) so that they can
+          be collected from any worker.
+        * All other state is held in memory by each worker. In particular the
+          ``EXECUTOR_MAX_WORKERS`` and ``EXECUTOR_MAX_QUEUE_SIZE`` limits apply to
+          each worker separately, such that the server as a whole will accept up to
+          ``n_workers`` times as much work.
+        * Request profiles are only stored by the worker which handled the request,
+          and so ``PROFILING`` cannot be enabled when serving from multiple workers.
+        * This function requires ``os.fork`` and so is not available on Windows.
+
+    Args:
+        app: The import path of the app of the form ``"module:attribute"``.
+        host: The ip address to bind to.
+        port: The port to bind to.
+        log_level: The verbosity of the uvicorn logger.
+        n_workers: The number of worker processes to fork.
+    """
+
+    if not hasattr(os, "fork"):
+        raise NotImplementedError("Multiple workers require `os.fork`.")
+
+    if settings.PROFILING:
+
+        raise ValueError(
+            "Profiling cannot be enabled when serving from multiple workers as each "
+            "profile is only available from the worker which handled the request."
+        )
+
+    # Create the force field registry before forking so that it is shared by all of
+    # the workers.
+    registry_directory()
+
+    if settings.METRICS:
+        _configure_multiprocess_metrics()
+
+    config = uvicorn.Config(app, host=host, port=port, log_level=log_level)
+    config.load()
+
+    listening_socket = config.bind_socket()
+
+    # Move everything allocated so far into a permanent generation so that garbage
+    # collection in the workers does not touch, and hence copy, the shared pages.
+    gc.freeze()
+
+    ready_fd, ready_write_fd = os.pipe()
+    pids = []
+
+    for worker_index in range(n_workers):
+
+        pid = os.fork()
+
+        if pid == 0:
+
+            os.close(ready_fd)
+
+            try:
+                _WorkerServer(config, worker_index, ready_write_fd).run(
+                    sockets=[listening_socket]
+                )
+            finally:
+                os._exit(0)
+
+        pids.append(pid)
+
+    os.close(ready_write_fd)
+
+    def terminate_workers(*_):
+
+        for worker_pid in pids:
+
+            try:
+                os.kill(worker_pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    # An interrupt from the terminal is delivered to the workers directly, so the
+    # parent only needs to forward termination requests.
+    signal.signal(signal.SIGINT, lambda *_: None)
+    signal.signal(signal.SIGTERM, terminate_workers)
+
+    _wait_for_workers(ready_fd, n_workers, pids)
+
+    logger.info(
+        f"Each worker runs at most {settings.EXECUTOR_MAX_WORKERS} requests at once "
+        f"and queues at most {settings.EXECUTOR_MAX_QUEUE_SIZE} more."
+    )
+
+    for worker_pid in pids:
+
+        os.waitpid(worker_pid, 0)
+
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+
+            from prometheus_client import multiprocess
+
+            multiprocess.mark_process_dead(worker_pid)
+
+    listening_socket.close()
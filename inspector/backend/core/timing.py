@@ -0,0 +1,94 @@
+"""An ASGI middleware which reports how long each stage of a request took."""
+import json
+import logging
+import time
+from typing import Dict, List, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from inspector.library.timing import collect_timings
+
+logger = logging.getLogger(__name__)
+
+
+def format_server_timing(stages: Dict[str, Tuple[float, int]], total: float) -> str:
+    """Formats a set of stage timings as the value of a ``Server-Timing`` header.
+
+    Args:
+        stages: The total duration [ms] of, and number of calls to, each stage.
+        total: The total duration [ms] of the request.
+    """
+
+    metrics: List[str] = [
+        f'{name};dur={duration:.2f};desc="{count}x"'
+        for name, (duration, count) in stages.items()
+    ]
+    metrics.append(f"total;dur={total:.2f}")
+
+    return ", ".join(metrics)
+
+
+class ServerTimingMiddleware:
+    """Collects the timings of the library stages run while handling each HTTP
+    request, reports them to the client in a ``Server-Timing`` header, and logs them
+    as a single JSON line once the request completes.
+
+    Notes:
+        * Stages which are still running when the response starts, e.g. those of a
+          streaming response, only appear in the logged timings.
+        * Stages run in a process pool executor are not recorded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        with collect_timings() as timings:
+
+            async def send_wrapper(message: Message):
+
+                nonlocal status_code
+
+                if message["type"] == "http.response.start":
+
+                    status_code = message["status"]
+
+                    total = (time.perf_counter() - start_time) * 1000.0
+
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        format_server_timing(timings.summarize(), total),
+                    )
+
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+
+                total = (time.perf_counter() - start_time) * 1000.0
+
+                logger.info(
+                    json.dumps(
+                        {
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round(total, 2),
+                            "stages": {
+                                name: {"duration_ms": round(duration, 2), "count": n}
+                                for name, (duration, n) in timings.summarize().items()
+                            },
+                        }
+                    )
+                )
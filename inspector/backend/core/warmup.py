@@ -0,0 +1,37 @@
+import importlib
+import logging
+from typing import Iterable
+
+from inspector.backend.core.forcefield import load_force_field
+
+logger = logging.getLogger(__name__)
+
+# The modules which are only imported when first used by an endpoint as they (and the
+# OpenFF toolkit, OpenMM, MDTraj and SciPy modules they import) are slow to import.
+DEFERRED_MODULES = [
+    "inspector.library.forcefield",
+    "inspector.library.decomposition",
+    "inspector.library.geometry",
+    "inspector.library.minimization",
+    "rdkit.Chem",
+]
+
+
+def warm_up(force_field_names: Iterable[str] = ()):
+    """Eagerly imports the modules whose import is otherwise deferred until they are
+    first used, and optionally loads a set of force fields into the force field
+    cache, so that the first requests handled do not pay these costs.
+
+    Args:
+        force_field_names: The names of the OpenFF released force fields to load.
+    """
+
+    for module_name in DEFERRED_MODULES:
+
+        logger.debug(f"importing {module_name}")
+        importlib.import_module(module_name)
+
+    for force_field_name in force_field_names:
+
+        logger.debug(f"loading {force_field_name}")
+        load_force_field(openff_name=force_field_name)
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+
+
+class RegisterForceFieldBody(BaseModel):
+    """The expected body of the ``/forcefield`` POST endpoint."""
+
+    smirnoff_xml: str = Field(
+        ..., description="The SMIRNOFF serialized force field to register."
+    )
+
+
+class RegisteredForceField(BaseModel):
+    """The response of the ``/forcefield`` POST endpoint."""
+
+    force_field_id: str = Field(
+        ...,
+        description="The content-addressed id of the registered force field, which can "
+        "be passed to endpoints in place of the full serialized force field.",
+    )
@@ -1,7 +1,10 @@
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, NonNegativeFloat, PositiveInt, conlist, validator
 
+from inspector.backend.core.config import settings
+from inspector.backend.core.forcefield import force_field_id
+from inspector.library.models.array import ArrayDType
 from inspector.library.models.molecule import RESTMolecule
 
 
@@ -11,22 +14,44 @@ class _BaseForceFieldBody(BaseModel):
     smirnoff_xml: Optional[str] = Field(
         None,
         description="The SMIRNOFF serialized force field. This field is mutually "
-        "exclusive with ``openff_name``.",
+        "exclusive with ``openff_name``. It may be provided alongside the "
+        "``force_field_id`` it was registered as, in which case the force field will "
+        "be re-registered should the id have expired.",
     )
     openff_name: Optional[str] = Field(
         None,
         description="The name of an OpenFF released force field. This field is mutually "
-        "exclusive with ``smirnoff_xml``.",
+        "exclusive with ``smirnoff_xml`` and ``force_field_id``.",
+    )
+    force_field_id: Optional[str] = Field(
+        None,
+        description="The id of a force field previously registered using the "
+        "``/forcefield`` endpoint. Registered force fields expire, e.g. when the "
+        "server restarts, after which a 404 is returned unless the ``smirnoff_xml`` "
+        "is also provided. This field is mutually exclusive with ``openff_name``.",
     )
 
-    @validator("openff_name")
+    @validator("force_field_id", always=True)
     def _validate_mutual_exclusive(cls, v, values):
 
-        smirnoff_xml = values.get("smirnoff_xml", None)
-
-        assert (v is None or smirnoff_xml is None) and (
-            v is not None or smirnoff_xml is not None
-        ), "exactly one of ``smirnoff_xml`` and ``openff_name`` must be specified."
+        smirnoff_xml = values.get("smirnoff_xml")
+
+        n_specified = sum(
+            value is not None
+            for value in (
+                smirnoff_xml if v is None else None,
+                values.get("openff_name"),
+                v,
+            )
+        )
+
+        assert n_specified == 1, (
+            "exactly one of ``smirnoff_xml``, ``openff_name`` and ``force_field_id`` "
+            "must be specified."
+        )
+        assert (
+            v is None or smirnoff_xml is None or v == force_field_id(smirnoff_xml)
+        ), "the ``force_field_id`` does not match the provided ``smirnoff_xml``."
 
         return v
 
@@ -37,6 +62,30 @@ class MoleculeToJSONBody(BaseModel):
     file_contents: str = Field(..., description="The contents of the molecule file.")
     file_format: Literal["SDF"] = Field("SDF", description="The format of the file.")
 
+    geometry_encoding: Optional[ArrayDType] = Field(
+        None,
+        description="The data type to base64 encode the geometry of the returned "
+        "molecule as. If not specified, the geometry is returned as a list of floats.",
+    )
+
+
+class MoleculeRecordResult(BaseModel):
+    """A single line of the newline-delimited JSON returned by the
+    ``/molecules/json/stream`` POST endpoint."""
+
+    index: int = Field(..., description="The index of the record in the SDF file.")
+
+    molecule: Optional[RESTMolecule] = Field(
+        None,
+        description="The molecule stored in the record, or ``None`` if the record "
+        "could not be parsed.",
+    )
+    error: Optional[str] = Field(
+        None,
+        description="A description of why the record could not be parsed, or ``None`` "
+        "if it was parsed successfully.",
+    )
+
 
 class SummarizeGeometryBody(BaseModel):
     """The expected body of the ``/molecules/geometry`` POST endpoint."""
@@ -53,14 +102,23 @@ class ApplyParametersBody(_BaseForceFieldBody):
         ..., description="The molecule to apply the parameters to."
     )
 
-    @validator("openff_name")
-    def _validate_mutual_exclusive(cls, v, values):
 
-        smirnoff_xml = values.get("smirnoff_xml", None)
+class ApplyParametersBatchBody(_BaseForceFieldBody):
+    """The expected body of the ``/molecules/parameters/batch`` POST endpoint."""
+
+    molecules: conlist(RESTMolecule, min_items=1) = Field(
+        ...,
+        description="The molecules to apply the parameters to. At most "
+        "``BATCH_MAX_SIZE`` molecules may be included in a single batch.",
+    )
+
+    @validator("molecules")
+    def _validate_batch_size(cls, v):
 
-        assert (v is None or smirnoff_xml is None) and (
-            v is not None or smirnoff_xml is not None
-        ), "exactly one of ``smirnoff_xml`` and ``openff_name`` must be specified."
+        assert len(v) <= settings.BATCH_MAX_SIZE, (
+            f"at most {settings.BATCH_MAX_SIZE} molecules may be included in a "
+            f"single batch."
+        )
 
         return v
 
@@ -81,6 +139,36 @@ class MinimizeConformerBody(_BaseForceFieldBody):
         description="The target tolerance to converge the energy within-in [kJ / mol].",
     )
 
+    frame_stride: PositiveInt = Field(
+        1,
+        description="Only every ``frame_stride``th iteration of the minimization will "
+        "be returned.",
+    )
+    frame_energy_threshold: Optional[NonNegativeFloat] = Field(
+        None,
+        description="If specified, an iteration will only be returned if its energy "
+        "differs from the previously returned iteration by more than this threshold "
+        "[kJ / mol].",
+    )
+    endpoints_only: bool = Field(
+        False,
+        description="Whether to only return the first and last iterations of the "
+        "minimization.",
+    )
+
+    geometry_encoding: Optional[ArrayDType] = Field(
+        None,
+        description="The data type to base64 encode the geometry of each returned "
+        "iteration as. If not specified, the geometries are returned as lists of "
+        "floats.",
+    )
+
+    use_partial_charges: bool = Field(
+        False,
+        description="Whether to use the ``partial_charges`` of the molecule, if it "
+        "has any, in place of the charges assigned by the force field.",
+    )
+
 
 class DecomposeEnergyBody(_BaseForceFieldBody):
     """The expected body of the ``/molecules/energy`` POST endpoint."""
@@ -88,3 +176,45 @@ class DecomposeEnergyBody(_BaseForceFieldBody):
     molecule: RESTMolecule = Field(
         ..., description="The molecule whose energy should be decomposed."
     )
+
+    use_partial_charges: bool = Field(
+        False,
+        description="Whether to use the ``partial_charges`` of the molecule, if it "
+        "has any, in place of the charges assigned by the force field.",
+    )
+
+
+class DecomposeEnergyBatchBody(_BaseForceFieldBody):
+    """The expected body of the ``/molecules/energy/batch`` POST endpoint."""
+
+    molecule: RESTMolecule = Field(
+        ..., description="The molecule whose energy should be decomposed."
+    )
+
+    use_partial_charges: bool = Field(
+        False,
+        description="Whether to use the ``partial_charges`` of the molecule, if it "
+        "has any, in place of the charges assigned by the force field.",
+    )
+
+    conformers: conlist(conlist(float, min_items=1), min_items=1) = Field(
+        ...,
+        description="The conformers to decompose the energy of. Each conformer is a "
+        "flattened array of XYZ atomic coordinates [Å] with length=n_atoms*3 in the "
+        "same format as ``molecule.geometry``. The geometry of ``molecule`` itself "
+        "is ignored.",
+    )
+
+    @validator("conformers")
+    def _validate_conformers(cls, v, values):
+
+        if "molecule" not in values:
+            return v
+
+        n_atoms = len(values["molecule"].symbols)
+
+        assert all(
+            len(conformer) == n_atoms * 3 for conformer in v
+        ), "incorrect conformer length."
+
+        return v
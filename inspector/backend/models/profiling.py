@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ProfileInfo(BaseModel):
+    """A description of a profile which was recorded for a single request."""
+
+    profile_id: str = Field(..., description="The unique id of the profile.")
+
+    method: str = Field(..., description="The HTTP method of the profiled request.")
+    path: str = Field(..., description="The path of the profiled request.")
+    status: int = Field(
+        ..., description="The status code of the response to the profiled request."
+    )
+
+    created_at: datetime = Field(
+        ..., description="The (UTC) time at which the profiled request was received."
+    )
+    duration_ms: float = Field(
+        ..., description="The time [ms] taken to handle the profiled request."
+    )
+    n_calls: int = Field(
+        ...,
+        description="The number of functions run on the executor which were "
+        "profiled while handling the request.",
+    )
@@ -0,0 +1,336 @@
+"""CLI commands for analysing every molecule in a (potentially very large) dataset of
+SDF files, writing the results to CSV files.
+
+Each command records which molecules have been processed in a ``.checkpoint`` file
+stored alongside the output so that an interrupted run can later be resumed from
+where it stopped.
+"""
+import csv
+import os
+from typing import Any, Callable, Iterator, List, Optional, Set, Tuple
+
+import click
+
+# The force field loaded by each worker process.
+_force_field = None
+
+# A row of an output CSV file.
+Row = List[Any]
+
+
+def _initialize_worker(force_field_source: Optional[str]):
+    """Loads the force field to use in a worker process."""
+
+    global _force_field
+
+    if force_field_source is None:
+        return
+
+    from openforcefield.typing.engines.smirnoff import ForceField
+
+    _force_field = ForceField(force_field_source)
+
+
+def _format_indices(atom_indices: Tuple[int, ...]) -> str:
+    return "-".join(str(index) for index in atom_indices)
+
+
+def _label_rows(molecule) -> List[Row]:
+
+    from inspector.library.forcefield import label_molecule
+
+    applied_parameters = label_molecule(molecule, _force_field)
+
+    return [
+        [handler_name, parameter.id, _format_indices(atom_indices)]
+        for handler_name, parameters in applied_parameters.parameters.items()
+        for parameter in parameters
+        for atom_indices in applied_parameters.parameter_map[parameter.id]
+    ]
+
+
+def _geometry_rows(molecule) -> List[Row]:
+
+    from inspector.library.geometry import summarize_geometry
+
+    summary = summarize_geometry(molecule, molecule.conformers[0])
+
+    return [
+        *(
+            ["bond_length", _format_indices(values[:-1]), values[-1]]
+            for values in summary.bond_lengths
+        ),
+        *(
+            ["bond_angle", _format_indices(values[:-1]), values[-1]]
+            for values in summary.bond_angles
+        ),
+        *(
+            ["proper_dihedral_angle", _format_indices(values[:-1]), values[-1]]
+            for values in summary.proper_dihedral_angles
+        ),
+        *(
+            ["hydrogen_bond", _format_indices(indices), None]
+            for indices in summary.hydrogen_bonds
+        ),
+    ]
+
+
+def _decompose_rows(molecule) -> List[Row]:
+
+    from inspector.library.decomposition import evaluate_per_term_energies
+
+    decomposed_energy = evaluate_per_term_energies(
+        molecule, molecule.conformers[0], _force_field
+    )
+
+    return [
+        *(
+            [handler_name, parameter_id, energy]
+            for handler_name, energies in decomposed_energy.valence_energies.items()
+            for parameter_id, energy in energies.items()
+        ),
+        ["vdW", None, decomposed_energy.vdw_energy],
+        ["Electrostatics", None, decomposed_energy.electrostatic_energy],
+    ]
+
+
+# The columns of the output file, and the function which computes the rows of a
+# single molecule, of each command.
+_TASKS = {
+    "label": (["handler", "parameter_id", "atom_indices"], _label_rows),
+    "geometry": (["measure", "atom_indices", "value"], _geometry_rows),
+    "decompose": (["handler", "parameter_id", "energy"], _decompose_rows),
+}
+
+
+def _process_record(record: Tuple[str, str, str, Any]) -> Tuple[str, List[Row]]:
+    """Computes the rows of the output file for a single SDF record, reporting any
+    failures as a row containing the error rather than raising them."""
+
+    from inspector.library.io import molecule_from_sdf_record
+
+    task_name, record_id, name, rdkit_molecule = record
+
+    columns, compute_rows = _TASKS[task_name]
+
+    try:
+
+        if rdkit_molecule is None:
+            raise ValueError("the SDF record could not be parsed.")
+
+        molecule = molecule_from_sdf_record(rdkit_molecule)
+        rows = [[record_id, name, *row, None] for row in compute_rows(molecule)]
+
+    except Exception as e:
+
+        error = f"{e.__class__.__name__}: {e}".replace("\n", " ")
+        rows = [[record_id, name, *([None] * len(columns)), error]]
+
+    return record_id, rows
+
+
+def _read_checkpoint(checkpoint_path: str) -> Tuple[Set[str], Optional[int]]:
+    """Reads the ids of the records which have already been processed, and the size
+    of the output file after the last of them was written. Any partially written
+    line at the end of the checkpoint file is removed."""
+
+    completed_ids = set()
+    output_offset = None
+
+    if not os.path.isfile(checkpoint_path):
+        return completed_ids, output_offset
+
+    with open(checkpoint_path, "rb+") as file:
+
+        checkpoint_size = 0
+
+        for line in file:
+
+            # Ignore any partially written line.
+            if not line.endswith(b"\n"):
+                break
+
+            record_id, offset = line.decode().rstrip("\n").rsplit("\t", 1)
+
+            completed_ids.add(record_id)
+            output_offset = int(offset)
+
+            checkpoint_size += len(line)
+
+        file.truncate(checkpoint_size)
+
+    return completed_ids, output_offset
+
+
+def _run_batch(
+    task_name: str,
+    input_path: str,
+    output_path: str,
+    force_field_source: Optional[str],
+    n_workers: int,
+    resume: bool,
+):
+    """Applies one of the ``_TASKS`` to each record of a set of SDF files and writes
+    the results to a CSV file, checkpointing after each record."""
+
+    from inspector.library.io import iter_sdf_path
+    from inspector.library.parallel import map_ordered
+
+    columns, _ = _TASKS[task_name]
+
+    checkpoint_path = f"{output_path}.checkpoint"
+
+    completed_ids, output_offset = (
+        _read_checkpoint(checkpoint_path)
+        if resume and os.path.isfile(output_path)
+        else (set(), None)
+    )
+
+    if output_offset is not None:
+        click.echo(f"Resuming after {len(completed_ids)} completed molecules.")
+
+    def records() -> Iterator[Tuple[str, str, str, Any]]:
+
+        for record_id, rdkit_molecule in iter_sdf_path(input_path):
+
+            if record_id in completed_ids:
+                continue
+
+            name = (
+                ""
+                if rdkit_molecule is None or not rdkit_molecule.HasProp("_Name")
+                else rdkit_molecule.GetProp("_Name")
+            )
+
+            yield task_name, record_id, name, rdkit_molecule
+
+    if n_workers <= 1:
+
+        _initialize_worker(force_field_source)
+        results = map(_process_record, records())
+
+    else:
+
+        results = map_ordered(
+            _process_record,
+            records(),
+            n_workers,
+            initializer=_initialize_worker,
+            initargs=(force_field_source,),
+        )
+
+    with open(
+        output_path, "w" if output_offset is None else "r+", newline=""
+    ) as output_file, open(
+        checkpoint_path, "w" if output_offset is None else "a"
+    ) as checkpoint_file:
+
+        writer = csv.writer(output_file)
+
+        if output_offset is None:
+            writer.writerow(["record", "name", *columns, "error"])
+        else:
+            # Discard any rows written after the last checkpoint.
+            output_file.seek(output_offset)
+            output_file.truncate()
+
+        n_processed, n_failed = 0, 0
+
+        for record_id, rows in results:
+
+            writer.writerows(rows)
+            output_file.flush()
+
+            checkpoint_file.write(f"{record_id}\t{output_file.tell()}\n")
+            checkpoint_file.flush()
+
+            n_processed += 1
+            n_failed += int(len(rows) > 0 and rows[0][-1] is not None)
+
+    click.echo(f"Processed {n_processed} molecules ({n_failed} failed).")
+
+
+def _batch_command(
+    name: str, help_text: str, requires_force_field: bool
+) -> Callable[[Callable], click.Command]:
+    """A decorator which adds the options shared by all batch commands."""
+
+    def decorator(function: Callable) -> click.Command:
+
+        function = click.option(
+            "--resume/--no-resume",
+            default=True,
+            help="Whether to resume from the checkpoint of a previous run if one "
+            "exists.",
+            show_default=True,
+        )(function)
+        function = click.option(
+            "--n-workers",
+            default=1,
+            type=click.IntRange(min=1),
+            help="The number of worker processes to use.",
+            show_default=True,
+        )(function)
+
+        if requires_force_field:
+
+            function = click.option(
+                "--force-field",
+                "force_field_source",
+                required=True,
+                type=click.STRING,
+                help="The name of an OpenFF released force field, or the path to a "
+                "SMIRNOFF serialized force field.",
+            )(function)
+
+        function = click.option(
+            "--output",
+            "output_path",
+            required=True,
+            type=click.Path(dir_okay=False, writable=True),
+            help="The path to the CSV file to write the results to.",
+        )(function)
+        function = click.option(
+            "--input",
+            "input_path",
+            required=True,
+            type=click.Path(exists=True),
+            help="The path to an SDF file or a directory of SDF files.",
+        )(function)
+
+        return click.command(name, help=help_text)(function)
+
+    return decorator
+
+
+@_batch_command(
+    "label",
+    "Apply a force field to each molecule in a dataset.",
+    requires_force_field=True,
+)
+def label_cli(input_path, output_path, force_field_source, n_workers, resume):
+
+    _run_batch("label", input_path, output_path, force_field_source, n_workers, resume)
+
+
+@_batch_command(
+    "geometry",
+    "Summarize the geometry of each molecule in a dataset.",
+    requires_force_field=False,
+)
+def geometry_cli(input_path, output_path, n_workers, resume):
+
+    _run_batch("geometry", input_path, output_path, None, n_workers, resume)
+
+
+@_batch_command(
+    "decompose",
+    "Decompose the potential energy of each molecule in a dataset into the "
+    "contributions of each force field parameter [kJ / mol].",
+    requires_force_field=True,
+)
+def decompose_cli(input_path, output_path, force_field_source, n_workers, resume):
+
+    _run_batch(
+        "decompose", input_path, output_path, force_field_source, n_workers, resume
+    )
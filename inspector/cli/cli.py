@@ -1,5 +1,6 @@
 import click
-import uvicorn
+
+from inspector.cli.batch import decompose_cli, geometry_cli, label_cli
 
 
 @click.group()
@@ -29,14 +30,79 @@ def cli():
     help="The verbosity of the API logger.",
     show_default=True,
 )
-def launch_cli(host, port, log_level):
+@click.option(
+    "--workers",
+    "n_workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="The number of worker processes to serve the API from. Workers are forked "
+    "from a single parent process once it has been warmed up. The executor limits "
+    "apply to each worker separately, and profiling is not supported with multiple "
+    "workers.",
+    show_default=True,
+)
+@click.option(
+    "--preload-force-field",
+    "preload_force_fields",
+    multiple=True,
+    type=click.STRING,
+    help="The name of an OpenFF released force field to load before serving any "
+    "requests. This option may be specified multiple times.",
+)
+@click.option(
+    "--warmup",
+    is_flag=True,
+    default=False,
+    help="Import the toolkits used by the API before serving any requests rather "
+    "than when they are first needed.",
+)
+def launch_cli(host, port, log_level, n_workers, preload_force_fields, warmup):
+
+    import uvicorn
+
+    from inspector.backend.core.config import settings
+
+    if n_workers > 1 and settings.PROFILING:
+        raise click.UsageError("Profiling is not supported with multiple workers.")
+
+    # Warm up in this process so that any forked workers share the loaded modules
+    # and force fields rather than each loading their own.
+    if warmup:
+
+        from inspector.backend.core.warmup import warm_up
+
+        warm_up(preload_force_fields)
+
+    elif len(preload_force_fields) > 0:
+
+        from inspector.backend.core.forcefield import load_force_field
+
+        for force_field_name in preload_force_fields:
+            load_force_field(openff_name=force_field_name)
+
+    if n_workers == 1:
+
+        uvicorn.run(
+            "inspector.backend.app:app",
+            host=host,
+            port=port,
+            log_level=log_level,
+        )
+
+    else:
+
+        from inspector.backend.core.server import serve_forked
 
-    uvicorn.run(
-        "inspector.backend.app:app",
-        host=host,
-        port=port,
-        log_level=log_level,
-    )
+        serve_forked(
+            "inspector.backend.app:app",
+            host=host,
+            port=port,
+            log_level=log_level,
+            n_workers=n_workers,
+        )
 
 
 cli.add_command(launch_cli)
+cli.add_command(label_cli)
+cli.add_command(geometry_cli)
+cli.add_command(decompose_cli)
@@ -0,0 +1,142 @@
+"""A module containing utilities for caching expensive to construct objects."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+from inspector.library.models.cache import CacheInfo
+
+T = TypeVar("T")
+
+
+class LRUCache(Generic[T]):
+    """A thread-safe, bounded cache which evicts the least recently used entry once
+    the maximum size has been reached, and optionally any entry which is older than
+    a specified time-to-live.
+    """
+
+    def __init__(self, max_size: int, time_to_live: Optional[float] = None):
+        """
+
+        Args:
+            max_size: The maximum number of entries to store in the cache. A value of
+                zero disables the cache entirely.
+            time_to_live: The maximum amount of time [s] that an entry may be stored
+                in the cache before it is evicted. If ``None``, entries are only
+                evicted once the cache is full.
+        """
+
+        self._max_size = max_size
+        self._time_to_live = time_to_live
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, T]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self._hits = 0
+        self._misses = 0
+
+    def _is_expired(self, created_at: float) -> bool:
+        return (
+            self._time_to_live is not None
+            and time.monotonic() - created_at > self._time_to_live
+        )
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Retrieves an entry from the cache, returning ``None`` if no entry exists."""
+
+        with self._lock:
+
+            if key not in self._entries:
+
+                self._misses += 1
+                return None
+
+            created_at, value = self._entries[key]
+
+            if self._is_expired(created_at):
+
+                del self._entries[key]
+
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return value
+
+    def set(self, key: Hashable, value: T):
+        """Stores an entry in the cache, evicting the least recently used entries if
+        the cache is full."""
+
+        if self._max_size <= 0:
+            return
+
+        with self._lock:
+
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Retrieves an entry from the cache, creating and storing it using the
+        ``factory`` function if it is not present.
+
+        Notes:
+            * The lock is not held while ``factory`` is called so that slow factories
+              do not block access to the cache. Concurrent misses for the same key may
+              therefore each call the factory.
+        """
+
+        value = self.get(key)
+
+        if value is None:
+
+            value = factory()
+            self.set(key, value)
+
+        return value
+
+    def resize(self, max_size: int):
+        """Changes the maximum number of entries stored in the cache, evicting the
+        least recently used entries if the cache now contains too many."""
+
+        with self._lock:
+
+            self._max_size = max_size
+
+            while len(self._entries) > max(self._max_size, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries from the cache and resets the hit and miss counters."""
+
+        with self._lock:
+
+            self._entries.clear()
+
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> CacheInfo:
+        """Returns statistics about the current usage of the cache."""
+
+        with self._lock:
+
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                max_size=self._max_size,
+                current_size=len(self._entries),
+            )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+
+        with self._lock:
+
+            return key in self._entries and not self._is_expired(self._entries[key][0])
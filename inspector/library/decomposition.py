@@ -1,6 +1,6 @@
 import logging
 from collections import defaultdict
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 import numpy
 from openforcefield.topology import Molecule
@@ -8,13 +8,25 @@ from openforcefield.typing.engines.smirnoff import ForceField, ParameterHandler
 from simtk import unit
 from simtk.openmm import copy, openmm
 
-from inspector.library.forcefield import label_molecule
-from inspector.library.models.energy import DecomposedEnergy
+from inspector.library.forcefield import (
+    create_labelled_system,
+    create_system,
+    has_constraints,
+    label_molecule,
+    nonbonded_force_field,
+    unconstrained_force_field,
+)
+from inspector.library.models.energy import DecomposedEnergy, DecomposedEnergyBatch
 from inspector.library.models.molecule import RESTMolecule
 from inspector.library.models.smirnoff import SMIRNOFFParameterType
+from inspector.library.timing import timed
+from inspector.library.valence import ValenceEnergyEngine
 
 logger = logging.getLogger(__name__)
 
+# The maximum number of force groups supported by OpenMM.
+_MAX_FORCE_GROUPS = 32
+
 _SUPPORTED_VALENCE_TAGS = [
     "Bonds",
     "Angles",
@@ -166,32 +178,39 @@ def group_force_by_parameter_id(
     return grouped_forces
 
 
+@timed("group_forces")
 def group_forces_by_parameter_id(
-    molecule: Molecule, force_field: ForceField
+    molecule: Molecule, force_field: ForceField, use_partial_charges: bool = False
 ) -> Tuple[openmm.System, Dict[str, Dict[str, int]]]:
     """Applies a particular force field to a specified molecule creating an OpenMM
     system object where each valence parameter (as identified by it's unique id)
-    is separated into a different force group.
+    is separated into a different force.
 
     Notes:
-        * All nonbonded forces will be assigned to force group 0.
+        * All nonbonded interactions will be stored in a single ``NonbondedForce``
+          at index 0.
+        * Forces are not assigned to separate force groups as OpenMM only supports
+          a maximum of 32. Use ``evaluate_energy`` to compute the energy of each
+          force.
 
     Args:
         molecule: The molecule to apply thr force field to.
         force_field: The force field to apply.
+        use_partial_charges: Whether to use any partial charges already assigned to
+            the molecule in place of those assigned by the force field.
 
     Returns:
         A tuple of the created OpenMM system, and a dictionary of the form
-        ``force_groups[HANDLER_TAG][PARAMETER_ID] = FORCE_GROUP_INDEX``.
+        ``force_indices[HANDLER_TAG][PARAMETER_ID] = FORCE_INDEX``.
     """
 
     # Label the molecule with the parameters which will be assigned so we can access
     # which 'slot' is filled by which parameter. This allows us to carefully split the
-    # potential energy terms into different force groups.
-    applied_parameters = label_molecule(molecule, force_field)
-
-    # Create an OpenMM system which will not have force groups yet.
-    omm_system: openmm.System = force_field.create_openmm_system(molecule.to_topology())
+    # potential energy terms into different forces. The labels and the OpenMM system,
+    # which will not have grouped forces yet, are created from a single matching pass.
+    applied_parameters, omm_system = create_labelled_system(
+        molecule, force_field, use_partial_charges
+    )
 
     # Create a new OpenMM system to store the grouped forces in and copy over the
     # nonbonded forces.
@@ -213,9 +232,8 @@ def group_forces_by_parameter_id(
     grouped_omm_system.addForce(copy.deepcopy(nonbonded_forces[0][1]))
     matched_forces.add(nonbonded_forces[0][0])
 
-    # Split the potential energy terms into per-parameter-type force groups.
-    force_group_indices = defaultdict(dict)  # force_groups[HANDLER][PARAM_ID] = INDEX
-    force_group_counter = 1
+    # Split the potential energy terms into per-parameter-type forces.
+    force_indices = defaultdict(dict)  # force_indices[HANDLER][PARAM_ID] = INDEX
 
     for handler_type in applied_parameters.parameters:
 
@@ -247,120 +265,527 @@ def group_forces_by_parameter_id(
 
         for parameter_id, grouped_force in grouped_forces.items():
 
-            force_group = force_group_counter
+            force_indices[handler_type][parameter_id] = grouped_omm_system.addForce(
+                grouped_force
+            )
+
+    return grouped_omm_system, force_indices
+
+
+class _ForceEnergyEvaluator:
+    """Evaluates the energy of each force in a system using a single OpenMM context
+    which is re-used across evaluations.
+
+    OpenMM only supports 32 force groups, and so forces are split into batches of at
+    most 31 forces, where each force in the active batch is assigned its own force
+    group and all other forces are assigned to group 0. The context is only
+    re-initialized when a different batch needs to be activated.
+    """
+
+    # Force group 0 is reserved for the forces outside of the current batch.
+    _BATCH_SIZE = _MAX_FORCE_GROUPS - 1
+
+    def __init__(self, omm_system: openmm.System):
+
+        self._omm_system = omm_system
+        self._forces = omm_system.getForces()
+
+        self._original_force_groups = [force.getForceGroup() for force in self._forces]
+
+        self._context: Optional[openmm.Context] = None
+        self._active_batch: Optional[int] = None
+
+        self._activate_batch(0)
+
+    @property
+    def context(self) -> openmm.Context:
+        """The context used to evaluate the energies."""
+        return self._context
+
+    def _activate_batch(self, batch_index: int):
+        """Assigns the forces in a given batch to their own force groups."""
+
+        if batch_index == self._active_batch:
+            return
+
+        batch_start = batch_index * self._BATCH_SIZE
+
+        for force_index, force in enumerate(self._forces):
+
+            force_group = force_index - batch_start + 1
+            force.setForceGroup(
+                force_group if 0 < force_group < _MAX_FORCE_GROUPS else 0
+            )
+
+        if self._context is None:
+
+            integrator = openmm.VerletIntegrator(0.001 * unit.femtoseconds)
+            platform = openmm.Platform.getPlatformByName("Reference")
+
+            self._context = openmm.Context(self._omm_system, integrator, platform)
+
+        else:
+            # Force groups are only read when the context is (re-)initialized.
+            self._context.reinitialize(preserveState=True)
+
+        self._active_batch = batch_index
+
+    def set_positions(self, conformer: unit.Quantity):
+        """Sets the conformer whose energy should be evaluated."""
+        self._context.setPositions(conformer.value_in_unit(unit.nanometers))
+
+    def total_energy(self) -> unit.Quantity:
+        """Evaluates the total potential energy of the current conformer."""
+        return self._context.getState(getEnergy=True).getPotentialEnergy()
+
+    def force_energies(
+        self, force_indices: Optional[List[int]] = None
+    ) -> Dict[int, unit.Quantity]:
+        """Evaluates the potential energy of the current conformer per force.
+
+        Args:
+            force_indices: The indices of the forces to evaluate the energy of. By
+                default the energy of all forces is evaluated.
+
+        Returns:
+            A dictionary of the potential energy per force where each key is the index
+            of the force in the system.
+        """
+
+        energy_per_force_id = {}
+
+        for batch_index, batch_force_indices in self._group_by_batch(force_indices):
+
+            self._activate_batch(batch_index)
+            self._evaluate_active_batch(batch_force_indices, energy_per_force_id)
+
+        return energy_per_force_id
+
+    def evaluate_batch(
+        self, conformers: unit.Quantity, force_indices: Optional[List[int]] = None
+    ) -> Tuple[List[unit.Quantity], List[Dict[int, unit.Quantity]]]:
+        """Evaluates the total potential energy, and the potential energy per force, of
+        each of a set of conformers.
+
+        Notes:
+            * The conformers are looped over within each batch of forces so that the
+              context is re-initialized at most once per batch, rather than once per
+              batch per conformer.
+
+        Args:
+            conformers: The conformers to evaluate the energies of with
+                shape=(n_conformers, n_atoms, 3).
+            force_indices: The indices of the forces to evaluate the energy of. By
+                default the energy of all forces is evaluated.
+
+        Returns:
+            The total potential energy of each conformer, and a dictionary of the
+            potential energy per force of each conformer where each key is the index
+            of the force in the system.
+        """
+
+        total_energies = []
+        energies_per_force_id = [{} for _ in range(len(conformers))]
+
+        for batch_index, batch_force_indices in self._group_by_batch(force_indices):
+
+            self._activate_batch(batch_index)
+
+            for conformer_index in range(len(conformers)):
+
+                self.set_positions(conformers[conformer_index])
+
+                if len(total_energies) < len(conformers):
+                    total_energies.append(self.total_energy())
 
-            grouped_force.setForceGroup(force_group)
-            grouped_omm_system.addForce(grouped_force)
+                self._evaluate_active_batch(
+                    batch_force_indices, energies_per_force_id[conformer_index]
+                )
 
-            force_group_indices[handler_type][parameter_id] = force_group
-            force_group_counter += 1
+        for conformer_index in range(len(total_energies), len(conformers)):
 
-    return grouped_omm_system, force_group_indices
+            self.set_positions(conformers[conformer_index])
+            total_energies.append(self.total_energy())
 
+        return total_energies, energies_per_force_id
 
+    def _group_by_batch(
+        self, force_indices: Optional[List[int]]
+    ) -> List[Tuple[int, List[int]]]:
+        """Groups force indices by the batch they belong to, ordered such that the
+        currently active batch is evaluated first to avoid needlessly re-initializing
+        the context."""
+
+        if force_indices is None:
+            force_indices = range(len(self._forces))
+
+        force_indices_per_batch = defaultdict(list)
+
+        for force_index in force_indices:
+            force_indices_per_batch[force_index // self._BATCH_SIZE].append(force_index)
+
+        batch_indices = sorted(
+            force_indices_per_batch, key=lambda i: (i != self._active_batch, i)
+        )
+
+        return [
+            (batch_index, force_indices_per_batch[batch_index])
+            for batch_index in batch_indices
+        ]
+
+    def _evaluate_active_batch(
+        self,
+        force_indices: List[int],
+        energy_per_force_id: Dict[int, unit.Quantity],
+    ):
+        """Evaluates the energy of the current conformer for forces in the active
+        batch, storing them in ``energy_per_force_id``."""
+
+        for force_index in force_indices:
+
+            force_group = self._forces[force_index].getForceGroup()
+
+            state = self._context.getState(getEnergy=True, groups=1 << force_group)
+            energy_per_force_id[force_index] = state.getPotentialEnergy()
+
+    def restore_force_groups(self):
+        """Restores the original force group of each force in the system."""
+
+        for force, force_group in zip(self._forces, self._original_force_groups):
+            force.setForceGroup(force_group)
+
+
+@timed("evaluate_energy")
 def evaluate_energy(
     omm_system: openmm.System, conformer: unit.Quantity
 ) -> Tuple[unit.Quantity, Dict[int, unit.Quantity]]:
-    """Computes both the total potential energy, and potential energy per force group,
+    """Computes both the total potential energy, and potential energy per force,
     of a given conformer.
 
+    Notes:
+        * OpenMM only supports 32 force groups, and so the energy of systems with
+          more forces than this is evaluated in batches, with each force in a batch
+          temporarily being assigned to its own force group.
+
     Args:
         omm_system: The system encoding the potential energy function.
         conformer: The conformer to compute the energy of.
 
     Returns
         A tuple of the total potential energy, and a dictionary of the potential energy
-        per force group.
+        per force where each key is the index of the force in the system.
     """
 
-    integrator = openmm.VerletIntegrator(0.001 * unit.femtoseconds)
-    platform = openmm.Platform.getPlatformByName("Reference")
+    evaluator = _ForceEnergyEvaluator(omm_system)
 
-    openmm_context = openmm.Context(omm_system, integrator, platform)
-    openmm_context.setPositions(conformer.value_in_unit(unit.nanometers))
+    try:
 
-    energy_per_force_id = {}
+        evaluator.set_positions(conformer)
+        return evaluator.total_energy(), evaluator.force_energies()
 
-    for force in omm_system.getForces():
+    finally:
+        evaluator.restore_force_groups()
 
-        state = openmm_context.getState(
-            getEnergy=True, groups=1 << force.getForceGroup()
-        )
-        energy_per_force_id[force.getForceGroup()] = state.getPotentialEnergy()
 
-    state = openmm_context.getState(getEnergy=True)
-    total_energy = state.getPotentialEnergy()
+@timed("nonbonded_energies")
+def _decompose_nonbonded_energies(
+    evaluator: _ForceEnergyEvaluator,
+    omm_system: openmm.System,
+    conformers: unit.Quantity,
+    energies_per_force_id: List[Dict[int, unit.Quantity]],
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Decomposes the energy of the nonbonded force of a system into the contributions
+    of the vdW and electrostatic interactions for each of a set of conformers.
 
-    return total_energy, energy_per_force_id
+    Notes:
+        * The charges of the nonbonded force will be set to zero in-place, and
+          updated in the context of the ``evaluator``.
 
+    Args:
+        evaluator: The evaluator to compute the energies using.
+        omm_system: The system encoding the potential energy function.
+        conformers: The conformers of interest with shape=(n_conformers, n_atoms, 3).
+        energies_per_force_id: The energy of each force in the system for each
+            conformer evaluated using the ``evaluator``.
 
-def evaluate_per_term_energies(
-    molecule: Union[Molecule, RESTMolecule],
-    conformer: unit.Quantity,
-    force_field: ForceField,
-) -> DecomposedEnergy:
+    Returns:
+        The vdW and electrostatic energies [kJ / mol] with shape=(n_conformers,).
+    """
 
-    molecule = copy.deepcopy(molecule)
-    force_field = copy.deepcopy(force_field)
+    nonbonded_force_index, nonbonded_force = [
+        (i, force)
+        for i, force in enumerate(omm_system.getForces())
+        if isinstance(force, openmm.NonbondedForce)
+    ][0]
 
-    if isinstance(molecule, RESTMolecule):
-        molecule = molecule.to_openff()
+    nonbonded_energies = numpy.array(
+        [
+            energy_per_force_id[nonbonded_force_index].value_in_unit(
+                unit.kilojoules_per_mole
+            )
+            for energy_per_force_id in energies_per_force_id
+        ]
+    )
 
-    # Remove constraints so we can access the bond energies.
-    if len(force_field.get_parameter_handler("Constraints").parameters) > 0:
+    for i in range(nonbonded_force.getNumParticles()):
+        _, sigma, epsilon = nonbonded_force.getParticleParameters(i)
+        nonbonded_force.setParticleParameters(i, 0.0, sigma, epsilon)
 
-        logger.warning(
-            "Constraints will be removed when evaluating the per term energy."
-        )
-        force_field.deregister_parameter_handler("Constraints")
+    for i in range(nonbonded_force.getNumExceptions()):
+        index_a, index_b, _, sigma, epsilon = nonbonded_force.getExceptionParameters(i)
+        nonbonded_force.setExceptionParameters(i, index_a, index_b, 0.0, sigma, epsilon)
+
+    nonbonded_force.updateParametersInContext(evaluator.context)
+
+    _, vdw_energies_per_force_id = evaluator.evaluate_batch(
+        conformers, [nonbonded_force_index]
+    )
+    vdw_energies = numpy.array(
+        [
+            energy_per_force_id[nonbonded_force_index].value_in_unit(
+                unit.kilojoules_per_mole
+            )
+            for energy_per_force_id in vdw_energies_per_force_id
+        ]
+    )
+
+    electrostatic_energies = nonbonded_energies - vdw_energies
+
+    return vdw_energies, electrostatic_energies
+
+
+def _evaluate_force_energies(
+    evaluator: _ForceEnergyEvaluator, conformers: unit.Quantity
+) -> Tuple[numpy.ndarray, List[Dict[int, unit.Quantity]]]:
+    """Evaluates the total energy and the energy of each force of each conformer.
+
+    Returns:
+        The total energy [kJ / mol] of each conformer with shape=(n_conformers,), and
+        the energy of each force in the system for each conformer.
+    """
+
+    total_energies, energies_per_force_id = evaluator.evaluate_batch(conformers)
+
+    total_energies = numpy.array(
+        [energy.value_in_unit(unit.kilojoules_per_mole) for energy in total_energies]
+    )
+
+    return total_energies, energies_per_force_id
+
+
+@timed("valence_energies")
+def _evaluate_valence_energies_openmm(
+    molecule: Molecule,
+    conformers: unit.Quantity,
+    force_field: ForceField,
+    use_partial_charges: bool,
+) -> Tuple[
+    Dict[str, Dict[str, numpy.ndarray]],
+    openmm.System,
+    _ForceEnergyEvaluator,
+    List[Dict[int, unit.Quantity]],
+]:
+    """Evaluates the valence energy contributions by splitting each valence parameter
+    into a separate OpenMM force.
+
+    Returns:
+        The valence energies [kJ / mol] of the form
+        ``energies[HANDLER_TAG][PARAMETER_ID]`` with shape=(n_conformers,), the system
+        the energies were computed using, the evaluator used to compute the energies,
+        and the energy of each force in that system for each conformer.
+    """
 
     # Apply the force field to the molecule, making sure to add each parameter type into
-    # a separate force group.
-    omm_system, id_to_force_group = group_forces_by_parameter_id(molecule, force_field)
+    # a separate force.
+    omm_system, id_to_force_index = group_forces_by_parameter_id(
+        molecule, force_field, use_partial_charges
+    )
 
     # Evaluate the energy.
-    total_energy, energy_per_force_id = evaluate_energy(omm_system, conformer)
+    evaluator = _ForceEnergyEvaluator(omm_system)
 
-    summed_energy = sum(
-        x.value_in_unit(unit.kilojoules_per_mole) for x in energy_per_force_id.values()
+    total_energies, energies_per_force_id = _evaluate_force_energies(
+        evaluator, conformers
     )
 
-    assert numpy.isclose(
-        total_energy.value_in_unit(unit.kilojoules_per_mole), summed_energy
+    summed_energies = [
+        sum(
+            x.value_in_unit(unit.kilojoules_per_mole)
+            for x in energy_per_force_id.values()
+        )
+        for energy_per_force_id in energies_per_force_id
+    ]
+
+    assert numpy.allclose(
+        total_energies, summed_energies
     ), "the ungrouped and grouped energies do not match."
 
-    # Decompose the contributions of the vdW and electrostatic interactions.
-    nonbonded_energy = energy_per_force_id[0].value_in_unit(unit.kilojoules_per_mole)
+    valence_energies = {
+        handler_name: {
+            parameter_id: numpy.array(
+                [
+                    energy_per_force_id[
+                        id_to_force_index[handler_name][parameter_id]
+                    ].value_in_unit(unit.kilojoules_per_mole)
+                    for energy_per_force_id in energies_per_force_id
+                ]
+            )
+            for parameter_id in id_to_force_index[handler_name]
+        }
+        for handler_name in id_to_force_index
+    }
 
-    nonbonded_force = [
-        force
-        for force in omm_system.getForces()
-        if isinstance(force, openmm.NonbondedForce)
-    ][0]
+    return valence_energies, omm_system, evaluator, energies_per_force_id
 
-    for i in range(nonbonded_force.getNumParticles()):
-        _, sigma, epsilon = nonbonded_force.getParticleParameters(i)
-        nonbonded_force.setParticleParameters(i, 0.0, sigma, epsilon)
 
-    for i in range(nonbonded_force.getNumExceptions()):
-        index_a, index_b, _, sigma, epsilon = nonbonded_force.getExceptionParameters(i)
-        nonbonded_force.setExceptionParameters(i, index_a, index_b, 0.0, sigma, epsilon)
+@timed("valence_energies")
+def _evaluate_valence_energies_numpy(
+    molecule: Molecule,
+    conformers: unit.Quantity,
+    force_field: ForceField,
+    use_partial_charges: bool,
+) -> Tuple[
+    Dict[str, Dict[str, numpy.ndarray]],
+    openmm.System,
+    _ForceEnergyEvaluator,
+    List[Dict[int, unit.Quantity]],
+]:
+    """Evaluates the valence energy contributions directly from the applied parameters
+    using the ``ValenceEnergyEngine``. An OpenMM system containing only the nonbonded
+    terms is created so that the nonbonded energy can still be decomposed.
+
+    Returns:
+        The valence energies [kJ / mol] of the form
+        ``energies[HANDLER_TAG][PARAMETER_ID]`` with shape=(n_conformers,), the
+        nonbonded system, the evaluator used to compute its energies, and the energy
+        of each force in that system for each conformer.
+    """
 
-    _, no_charge_energies = evaluate_energy(omm_system, conformer)
+    applied_parameters = label_molecule(molecule, force_field)
+
+    valence_engine = ValenceEnergyEngine(applied_parameters, force_field)
+    valence_energies = valence_engine.evaluate_parameter_energies(
+        conformers.value_in_unit(unit.angstrom)
+    )
+
+    omm_system = create_system(
+        molecule, nonbonded_force_field(force_field), use_partial_charges
+    )
 
-    vdw_energy = no_charge_energies[0].value_in_unit(unit.kilojoules_per_mole)
-    electrostatic_energy = nonbonded_energy - vdw_energy
+    evaluator = _ForceEnergyEvaluator(omm_system)
+    _, energies_per_force_id = _evaluate_force_energies(evaluator, conformers)
 
-    return DecomposedEnergy(
+    return valence_energies, omm_system, evaluator, energies_per_force_id
+
+
+def evaluate_per_term_energies_batch(
+    molecule: Union[Molecule, RESTMolecule],
+    conformers: unit.Quantity,
+    force_field: ForceField,
+    engine: Literal["numpy", "openmm"] = "numpy",
+    use_partial_charges: bool = False,
+) -> DecomposedEnergyBatch:
+    """Computes the contribution of each valence parameter, and of the vdW and
+    electrostatic interactions, to the total potential energy of each of a set of
+    conformers of the same molecule.
+
+    Notes:
+        * The molecule is only parameterized once, and the same OpenMM system and
+          context are used to evaluate the energies of every conformer.
+
+    Args:
+        molecule: The molecule of interest.
+        conformers: The conformers to compute the energies of with
+            shape=(n_conformers, n_atoms, 3). A single conformer with
+            shape=(n_atoms, 3) is treated as a batch of one.
+        force_field: The force field which defines the potential energy function.
+        engine: The engine to use when computing the valence energies. ``"numpy"``
+            evaluates the valence terms directly from the applied parameters, while
+            ``"openmm"`` evaluates each valence parameter as a separate OpenMM force.
+        use_partial_charges: Whether to use any partial charges already assigned to
+            the molecule in place of those assigned by the force field.
+
+    Returns:
+        The decomposed energies of each conformer.
+    """
+
+    if isinstance(molecule, RESTMolecule):
+        molecule = molecule.to_openff()
+
+    conformers = (
+        numpy.asarray(conformers.value_in_unit(unit.angstrom)).reshape(
+            -1, molecule.n_atoms, 3
+        )
+        * unit.angstrom
+    )
+
+    # Remove constraints so we can access the bond energies.
+    if has_constraints(force_field):
+
+        logger.warning(
+            "Constraints will be removed when evaluating the per term energy."
+        )
+        force_field = unconstrained_force_field(force_field)
+
+    if engine == "numpy":
+        evaluate_valence_energies = _evaluate_valence_energies_numpy
+    elif engine == "openmm":
+        evaluate_valence_energies = _evaluate_valence_energies_openmm
+    else:
+        raise NotImplementedError
+
+    (
+        valence_energies,
+        omm_system,
+        evaluator,
+        energies_per_force_id,
+    ) = evaluate_valence_energies(
+        molecule, conformers, force_field, use_partial_charges
+    )
+
+    # Decompose the contributions of the vdW and electrostatic interactions re-using
+    # the context which the valence energies were computed using.
+    vdw_energies, electrostatic_energies = _decompose_nonbonded_energies(
+        evaluator, omm_system, conformers, energies_per_force_id
+    )
+
+    return DecomposedEnergyBatch(
         valence_energies={
             handler_name: {
-                parameter_id: energy_per_force_id[
-                    id_to_force_group[handler_name][parameter_id]
-                ].value_in_unit(unit.kilojoules_per_mole)
-                for parameter_id in id_to_force_group[handler_name]
+                parameter_id: energies.tolist()
+                for parameter_id, energies in handler_energies.items()
             }
-            for handler_name in id_to_force_group
+            for handler_name, handler_energies in valence_energies.items()
         },
-        vdw_energy=vdw_energy,
-        electrostatic_energy=electrostatic_energy,
+        vdw_energies=vdw_energies.tolist(),
+        electrostatic_energies=electrostatic_energies.tolist(),
     )
+
+
+def evaluate_per_term_energies(
+    molecule: Union[Molecule, RESTMolecule],
+    conformer: unit.Quantity,
+    force_field: ForceField,
+    engine: Literal["numpy", "openmm"] = "numpy",
+    use_partial_charges: bool = False,
+) -> DecomposedEnergy:
+    """Computes the contribution of each valence parameter, and of the vdW and
+    electrostatic interactions, to the total potential energy of a conformer.
+
+    Args:
+        molecule: The molecule of interest.
+        conformer: The conformer to compute the energy of with shape=(n_atoms, 3).
+        force_field: The force field which defines the potential energy function.
+        engine: The engine to use when computing the valence energies. ``"numpy"``
+            evaluates the valence terms directly from the applied parameters, while
+            ``"openmm"`` evaluates each valence parameter as a separate OpenMM force.
+        use_partial_charges: Whether to use any partial charges already assigned to
+            the molecule in place of those assigned by the force field.
+
+    Returns:
+        The decomposed energy.
+    """
+
+    return evaluate_per_term_energies_batch(
+        molecule, conformer, force_field, engine, use_partial_charges
+    ).conformer(0)
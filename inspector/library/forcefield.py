@@ -1,33 +1,338 @@
 """A module containing utilities for assigning force field parameters to molecules
 """
+import copy
+import functools
+import hashlib
+import json
+import threading
+import weakref
 from collections import defaultdict
-from typing import Union
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar, Union
 
-from openforcefield.topology import Molecule
+import numpy
+import openforcefield
+from openforcefield.topology import Molecule, Topology
 from openforcefield.typing.engines.smirnoff import ForceField
+from simtk import openmm, unit
 
+from inspector.library.cache import LRUCache
 from inspector.library.models import smirnoff as smirnoff_models
-from inspector.library.models.forcefield import AppliedParameters
+from inspector.library.models.forcefield import (
+    AppliedParameters,
+    AppliedParametersResult,
+)
 from inspector.library.models.molecule import RESTMolecule
+from inspector.library.parallel import map_ordered
+from inspector.library.timing import span, timed
 
+T = TypeVar("T")
 
-def label_molecule(
-    molecule: Union[Molecule, RESTMolecule], force_field: ForceField
-) -> AppliedParameters:
+# The parameter handlers which affect the partial charges assigned to a molecule.
+_CHARGE_HANDLERS = ["LibraryCharges", "ChargeIncrementModel", "ToolkitAM1BCC"]
 
-    if isinstance(molecule, RESTMolecule):
-        molecule = molecule.to_openff()
+# The releases of the toolkit (as ``(major, minor)``) against which the private
+# ``ForceField`` attributes used by ``_with_precomputed_matches`` have been verified.
+_PRECOMPUTED_MATCH_VERSIONS = [(0, 8)]
+
+# The parameter handlers whose matches are re-used when creating an OpenMM system.
+_PRECOMPUTED_MATCH_HANDLERS = [
+    "Constraints",
+    "Bonds",
+    "Angles",
+    "ProperTorsions",
+    "ImproperTorsions",
+    "vdW",
+]
+
+# The parameter handlers which only contribute valence terms to an OpenMM system.
+_VALENCE_HANDLERS = [
+    "Constraints",
+    "Bonds",
+    "Angles",
+    "ProperTorsions",
+    "ImproperTorsions",
+]
+
+# A cache of the partial charges [e] assigned to molecules, keyed by the mapped SMILES
+# pattern of the molecule and a hash of the charge model used to assign them. The
+# API resizes this cache using the ``PARTIAL_CHARGE_CACHE_SIZE`` setting.
+partial_charge_cache: LRUCache[numpy.ndarray] = LRUCache(max_size=1024)
+# A cache of the parameters applied to molecules, keyed by the mapped SMILES pattern
+# of the molecule and a hash of the force field used to apply them. The labels only
+# depend on the molecular graph and so are shared between conformers. The API resizes
+# this cache using the ``LABEL_CACHE_SIZE`` setting.
+label_cache: LRUCache[AppliedParameters] = LRUCache(max_size=1024)
+# A cache of the SMIRKS matches found for molecules, keyed in the same way as, and
+# resized alongside, the ``label_cache``. The matches allow an OpenMM system to be
+# created without matching the SMIRKS patterns against the molecule again.
+match_cache: LRUCache[Dict[str, Dict]] = LRUCache(max_size=1024)
+
+# The force field loaded by each worker process spawned by ``label_molecules_batch``.
+_worker_force_field: Optional[ForceField] = None
+
+
+# Copies of force fields derived by, e.g., ``unconstrained_force_field``, keyed by the
+# name of the deriving function and a hash of the contents of the original force
+# field.
+_derived_force_field_cache: LRUCache[ForceField] = LRUCache(max_size=16)
+
+
+def _hash_handlers(force_field: ForceField, handler_names: Iterable[str]) -> str:
+    """Returns a hash of the contents of a subset of the parameter handlers of a
+    force field."""
+
+    handler_data = {
+        handler_name: force_field.get_parameter_handler(handler_name).to_dict()
+        for handler_name in handler_names
+        if handler_name in force_field.registered_parameter_handlers
+    }
+
+    return hashlib.sha256(
+        json.dumps(
+            [force_field.aromaticity_model, handler_data], sort_keys=True, default=str
+        ).encode()
+    ).hexdigest()
+
+
+def _memoize_per_force_field(
+    function: Callable[[ForceField], T]
+) -> Callable[[ForceField], T]:
+    """Memoizes a function whose only argument is a force field, storing the result
+    for as long as the force field instance is alive.
+
+    Notes:
+        * Force fields are treated as immutable once passed to a memoized function,
+          i.e. a force field must not be modified after it has been used.
+    """
+
+    results: "weakref.WeakKeyDictionary[ForceField, T]" = weakref.WeakKeyDictionary()
+    lock = threading.Lock()
+
+    @functools.wraps(function)
+    def wrapper(force_field: ForceField) -> T:
+
+        with lock:
+
+            if force_field in results:
+                return results[force_field]
+
+        result = function(force_field)
+
+        with lock:
+            results[force_field] = result
+
+        return result
+
+    return wrapper
+
+
+def _memoize_by_content(
+    function: Callable[[ForceField], ForceField]
+) -> Callable[[ForceField], ForceField]:
+    """Memoizes a function which derives a new force field from an existing one,
+    keying the result on the contents of the force field rather than on its identity
+    so that separately loaded copies of the same force field share the result.
+
+    Notes:
+        * The derived force fields are shared and so must not be modified.
+    """
+
+    @functools.wraps(function)
+    def wrapper(force_field: ForceField) -> ForceField:
+
+        return _derived_force_field_cache.get_or_create(
+            (function.__name__, force_field_hash(force_field)),
+            lambda: function(force_field),
+        )
+
+    return wrapper
+
+
+@_memoize_per_force_field
+def force_field_hash(force_field: ForceField) -> str:
+    """Returns a hash of the contents of all of the parameter handlers of a force
+    field.
+
+    Notes:
+        * The hash is computed once per force field instance, which must therefore
+          not be modified after it has been hashed.
+    """
+    return _hash_handlers(force_field, force_field.registered_parameter_handlers)
+
+
+@_memoize_per_force_field
+def charge_model_hash(force_field: ForceField) -> str:
+    """Returns a hash of the parameter handlers of a force field which affect the
+    partial charges assigned to a molecule. Force fields which only differ in, for
+    example, their valence parameters will therefore share the same hash.
+
+    Notes:
+        * As with ``force_field_hash`` the hash is computed once per force field
+          instance.
+    """
+
+    return _hash_handlers(force_field, _CHARGE_HANDLERS)
+
+
+@_memoize_by_content
+def _remove_constraints(force_field: ForceField) -> ForceField:
+
+    # Copy the force field so that the callers instance is left unmodified.
+    force_field = copy.deepcopy(force_field)
+    force_field.deregister_parameter_handler("Constraints")
+
+    return force_field
+
+
+def has_constraints(force_field: ForceField) -> bool:
+    """Returns whether a force field contains any constraint parameters.
+
+    Notes:
+        * ``ForceField.get_parameter_handler`` registers a new handler when one is
+          missing, so the handler is only accessed once it is known to exist so as
+          to not modify the (shared) force field.
+    """
+
+    return (
+        "Constraints" in force_field.registered_parameter_handlers
+        and len(force_field.get_parameter_handler("Constraints").parameters) > 0
+    )
+
+
+def unconstrained_force_field(force_field: ForceField) -> ForceField:
+    """Returns a copy of a force field with any constraints removed, or the force
+    field itself if it does not contain any constraints. The copy is re-used for
+    any force field with the same contents.
+    """
+
+    if not has_constraints(force_field):
+        return force_field
+
+    return _remove_constraints(force_field)
+
+
+@_memoize_by_content
+def nonbonded_force_field(force_field: ForceField) -> ForceField:
+    """Returns a copy of a force field with all of its valence parameter handlers
+    removed, such that the systems it creates only contain the nonbonded (and any
+    other non-valence) terms. The copy is re-used for any force field with the same
+    contents.
+    """
+
+    # Copy the force field so that the callers instance is left unmodified.
+    force_field = copy.deepcopy(force_field)
+
+    for handler_name in _VALENCE_HANDLERS:
+
+        if handler_name in force_field.registered_parameter_handlers:
+            force_field.deregister_parameter_handler(handler_name)
+
+    return force_field
+
+
+@timed("find_matches")
+def _find_matches(topology: Topology, force_field: ForceField) -> Dict[str, Dict]:
+    """Finds the parameters which each handler of a force field would apply to a
+    topology in the same way as ``ForceField.label_molecules``.
+
+    Returns:
+        A dictionary of the form ``matches[HANDLER_TAG][ATOM_INDICES] = MATCH``.
+    """
+
+    return {
+        handler_name: force_field.get_parameter_handler(handler_name).find_matches(
+            topology
+        )
+        for handler_name in force_field.registered_parameter_handlers
+    }
+
+
+def _supports_precomputed_matches(force_field: ForceField) -> bool:
+    """Returns whether ``_with_precomputed_matches`` can be applied to a force field
+    created by the installed version of the toolkit."""
+
+    version = tuple(
+        int(part) if part.isdigit() else -1
+        for part in openforcefield.__version__.split("+")[0].split(".")[:2]
+    )
+
+    return version in _PRECOMPUTED_MATCH_VERSIONS and isinstance(
+        getattr(force_field, "_parameter_handlers", None), dict
+    )
+
+
+def _with_precomputed_matches(
+    force_field: ForceField, matches: Dict[str, Dict]
+) -> ForceField:
+    """Returns a shallow copy of a force field whose parameter handlers return
+    precomputed matches rather than re-running the SMIRKS matching when creating an
+    OpenMM system.
+
+    This is the only place which relies on the private internals of ``ForceField``,
+    namely that ``create_openmm_system`` retrieves matches by calling ``find_matches``
+    on each handler stored in the ``_parameter_handlers`` dictionary. The force field
+    is returned unchanged, so that the matching is simply repeated, for releases of
+    the toolkit which have not been verified to behave this way.
+
+    Notes:
+        * Only the handlers and the dictionary of handlers are copied so that the
+          original, possibly shared, force field is left untouched.
+        * The returned force field must only be applied to a molecule with the same
+          (mapped) molecular graph as the one which the matches were found for.
+    """
+
+    if not _supports_precomputed_matches(force_field):
+        return force_field
+
+    force_field = copy.copy(force_field)
+
+    parameter_handlers = {}
+
+    for handler_name, handler in force_field._parameter_handlers.items():
+
+        if handler_name in _PRECOMPUTED_MATCH_HANDLERS and handler_name in matches:
+
+            handler = copy.copy(handler)
+            handler.find_matches = functools.partial(
+                _return_matches, matches[handler_name]
+            )
+
+        parameter_handlers[handler_name] = handler
+
+    force_field._parameter_handlers = parameter_handlers
 
-    off_parameters = force_field.label_molecules(molecule.to_topology())[0]
+    return force_field
+
+
+def _return_matches(matches: Dict, *_, **__) -> Dict:
+    return matches
+
+
+def _cached_matches(
+    molecule: Molecule, force_field: ForceField, cache_key: Tuple[str, str]
+) -> Dict[str, Dict]:
+    """Returns the matches found for a molecule by ``_find_matches``, only matching
+    the SMIRKS patterns against the molecule if they are not already cached."""
+
+    return match_cache.get_or_create(
+        cache_key, lambda: _find_matches(molecule.to_topology(), force_field)
+    )
+
+
+def _applied_parameters_from_matches(matches: Dict[str, Dict]) -> AppliedParameters:
+    """Converts the matches found by each parameter handler into the unique
+    parameters which were applied and the atoms that they were applied to."""
 
     parameter_map = defaultdict(list)
     unique_parameters = defaultdict(list)
 
-    for handler_name, off_handler_parameters in off_parameters.items():
+    for handler_name, handler_matches in matches.items():
 
         unique_parameter_ids = set()
 
-        for atom_indices, off_parameter in off_handler_parameters.items():
+        for atom_indices, match in handler_matches.items():
+
+            off_parameter = match.parameter_type
 
             if off_parameter.id not in unique_parameter_ids:
 
@@ -43,3 +348,240 @@ def label_molecule(
         parameters=unique_parameters,
         parameter_map=parameter_map,
     )
+
+
+@timed("create_system")
+def _create_system(
+    molecule: Molecule,
+    force_field: ForceField,
+    matches: Optional[Dict[str, Dict]] = None,
+    use_partial_charges: bool = False,
+) -> openmm.System:
+    """Applies a force field to a molecule to create an OpenMM system, optionally
+    re-using the matches found for the topology of the molecule by
+    ``_find_matches``. See ``create_system`` for details about the partial charges."""
+
+    topology = molecule.to_topology()
+
+    system_force_field = (
+        force_field
+        if matches is None
+        else _with_precomputed_matches(force_field, matches)
+    )
+
+    if use_partial_charges and molecule.partial_charges is not None:
+
+        return system_force_field.create_openmm_system(
+            topology, charge_from_molecules=[molecule]
+        )
+
+    cache_key = molecule.to_smiles(mapped=True), charge_model_hash(force_field)
+    partial_charges = partial_charge_cache.get(cache_key)
+
+    if partial_charges is not None:
+
+        charged_molecule = Molecule(molecule)
+        charged_molecule.partial_charges = unit.Quantity(
+            partial_charges.copy(), unit.elementary_charge
+        )
+
+        return system_force_field.create_openmm_system(
+            topology, charge_from_molecules=[charged_molecule]
+        )
+
+    # The partial charges are only computed (e.g. using AM1BCC) when they are not
+    # provided by the molecule or the cache, and dominate the cost of this call.
+    with span("assign_charges"):
+        omm_system = system_force_field.create_openmm_system(topology)
+
+    nonbonded_force = next(
+        (
+            force
+            for force in omm_system.getForces()
+            if isinstance(force, openmm.NonbondedForce)
+        ),
+        None,
+    )
+
+    # Force fields without any nonbonded terms, e.g. valence only force fields, do not
+    # assign any partial charges which could be cached.
+    if nonbonded_force is None:
+        return omm_system
+
+    partial_charge_cache.set(
+        cache_key,
+        numpy.array(
+            [
+                nonbonded_force.getParticleParameters(i)[0].value_in_unit(
+                    unit.elementary_charge
+                )
+                for i in range(molecule.n_atoms)
+            ]
+        ),
+    )
+
+    return omm_system
+
+
+def create_system(
+    molecule: Molecule, force_field: ForceField, use_partial_charges: bool = False
+) -> openmm.System:
+    """Applies a force field to a molecule to create an OpenMM system, re-using any
+    partial charges which were previously assigned to the same molecule using the
+    same charge model.
+
+    Notes:
+        * By default the partial charges are always assigned by the force field, even
+          if the molecule already has partial charges (e.g. those loaded from an SDF
+          file).
+
+    Args:
+        molecule: The molecule to apply the force field to.
+        force_field: The force field to apply.
+        use_partial_charges: Whether to use any partial charges already assigned to
+            the molecule in place of those assigned by the force field.
+
+    Returns:
+        The created OpenMM system.
+    """
+
+    return _create_system(
+        molecule, force_field, use_partial_charges=use_partial_charges
+    )
+
+
+def label_molecule(
+    molecule: Union[Molecule, RESTMolecule], force_field: ForceField
+) -> AppliedParameters:
+    """Returns the parameters which a force field would apply to a molecule.
+
+    Notes:
+        * The applied parameters are cached based on the molecular graph and the
+          force field, and so the returned object is shared and must not be modified.
+
+    Args:
+        molecule: The molecule to apply the parameters to.
+        force_field: The force field to apply.
+
+    Returns:
+        The applied parameters.
+    """
+
+    if isinstance(molecule, RESTMolecule):
+        molecule = molecule.to_openff()
+
+    cache_key = molecule.to_smiles(mapped=True), force_field_hash(force_field)
+
+    return label_cache.get_or_create(
+        cache_key,
+        lambda: _applied_parameters_from_matches(
+            _cached_matches(molecule, force_field, cache_key)
+        ),
+    )
+
+
+def create_labelled_system(
+    molecule: Union[Molecule, RESTMolecule],
+    force_field: ForceField,
+    use_partial_charges: bool = False,
+) -> Tuple[AppliedParameters, openmm.System]:
+    """Applies a force field to a molecule, returning both the parameters which were
+    applied and the corresponding OpenMM system.
+
+    Notes:
+        * The SMIRKS patterns of the force field are only matched against a given
+          molecular graph once, and the (cached) matches are then used both to label
+          the molecule and to create the system.
+        * The applied parameters are shared with ``label_molecule`` and so must not
+          be modified.
+
+    Args:
+        molecule: The molecule to apply the force field to.
+        force_field: The force field to apply.
+        use_partial_charges: Whether to use any partial charges already assigned to
+            the molecule in place of those assigned by the force field.
+
+    Returns:
+        The applied parameters and the created OpenMM system.
+    """
+
+    if isinstance(molecule, RESTMolecule):
+        molecule = molecule.to_openff()
+
+    cache_key = molecule.to_smiles(mapped=True), force_field_hash(force_field)
+
+    matches = _cached_matches(molecule, force_field, cache_key)
+
+    applied_parameters = label_cache.get_or_create(
+        cache_key, lambda: _applied_parameters_from_matches(matches)
+    )
+    omm_system = _create_system(molecule, force_field, matches, use_partial_charges)
+
+    return applied_parameters, omm_system
+
+
+def _label_molecule_safely(
+    molecule: Union[Molecule, RESTMolecule], force_field: ForceField
+) -> AppliedParametersResult:
+    """Labels a molecule, capturing any exception raised rather than propagating it."""
+
+    try:
+        return AppliedParametersResult(
+            applied_parameters=label_molecule(molecule, force_field)
+        )
+    except Exception as e:
+        return AppliedParametersResult(error=f"{e.__class__.__name__}: {e}")
+
+
+def _initialize_label_worker(smirnoff_xml: str):
+    """Loads the force field to label molecules with in a worker process."""
+
+    global _worker_force_field
+    _worker_force_field = ForceField(smirnoff_xml)
+
+
+def _label_molecule_in_worker(
+    molecule: Union[Molecule, RESTMolecule]
+) -> AppliedParametersResult:
+    return _label_molecule_safely(molecule, _worker_force_field)
+
+
+def label_molecules_batch(
+    molecules: Iterable[Union[Molecule, RESTMolecule]],
+    force_field: ForceField,
+    n_workers: int = 1,
+) -> Iterator[AppliedParametersResult]:
+    """Returns the parameters which a force field would apply to each of a batch of
+    molecules.
+
+    Notes:
+        * The force field is serialized and loaded once by each worker process rather
+          than being sent along with every molecule.
+        * A failure to label one molecule does not abort the batch, but is instead
+          reported in the corresponding result.
+
+    Args:
+        molecules: The molecules to apply the parameters to.
+        force_field: The force field to apply.
+        n_workers: The number of worker processes to label the molecules using. If
+            one, the molecules are labelled in the current process.
+
+    Returns:
+        An iterator over the result of labelling each molecule, yielded in the same
+        order as the input molecules.
+    """
+
+    if n_workers <= 1:
+
+        for molecule in molecules:
+            yield _label_molecule_safely(molecule, force_field)
+
+        return
+
+    yield from map_ordered(
+        _label_molecule_in_worker,
+        molecules,
+        n_workers,
+        initializer=_initialize_label_worker,
+        initargs=(force_field.to_string(),),
+    )
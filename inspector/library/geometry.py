@@ -1,4 +1,3 @@
-import copy
 from typing import Union
 
 import mdtraj
@@ -8,17 +7,15 @@ from simtk import unit
 
 from inspector.library.models.geometry import GeometrySummary
 from inspector.library.models.molecule import RESTMolecule
+from inspector.library.timing import timed
 
 
+@timed("summarize_geometry")
 def summarize_geometry(
     molecule: Union[Molecule, RESTMolecule], conformer: unit.Quantity
 ) -> GeometrySummary:
 
-    molecule = copy.deepcopy(molecule)
-
-    if isinstance(molecule, Molecule):
-        molecule._conformers = [conformer]
-    elif isinstance(molecule, RESTMolecule):
+    if isinstance(molecule, RESTMolecule):
         molecule = molecule.to_openff()
 
     topology = mdtraj.Topology.from_openmm(molecule.to_topology().to_openmm())
@@ -0,0 +1,152 @@
+"""A module containing utilities for reading molecules from files."""
+import io
+import os
+from typing import TYPE_CHECKING, BinaryIO, Iterator, List, Optional, Tuple
+
+from inspector.library.timing import timed
+
+if TYPE_CHECKING:
+    from openforcefield.topology import Molecule
+    from rdkit import Chem
+
+
+class SDFRecordSplitter:
+    """Incrementally splits the contents of an SDF file into the text of each of its
+    records as chunks of the file become available, e.g. while the file is being
+    uploaded. Only the current, incomplete record is held in memory."""
+
+    def __init__(self):
+
+        self._partial_line = ""
+        self._record_lines: List[str] = []
+
+    def feed(self, chunk: str) -> List[str]:
+        """Adds the next chunk of the file, returning the text of any records which
+        were completed by it."""
+
+        *lines, self._partial_line = (self._partial_line + chunk).split("\n")
+
+        records = []
+
+        for line in lines:
+
+            self._record_lines.append(line)
+
+            if line.strip() != "$$$$":
+                continue
+
+            records.append("\n".join(self._record_lines) + "\n")
+            self._record_lines = []
+
+        return records
+
+    def flush(self) -> Optional[str]:
+        """Returns the text of the final record if the file did not end with a record
+        delimiter, or ``None`` otherwise."""
+
+        lines = [*self._record_lines]
+
+        if len(self._partial_line) > 0:
+            lines.append(self._partial_line)
+
+        record = "\n".join(lines)
+
+        self._partial_line = ""
+        self._record_lines = []
+
+        return None if len(record.strip()) == 0 else record + "\n"
+
+
+def iter_sdf_records(file: BinaryIO) -> Iterator[Optional["Chem.Mol"]]:
+    """Lazily parses each record of an SDF file into an un-sanitized RDKit molecule.
+
+    Args:
+        file: The SDF file opened in binary mode.
+
+    Returns:
+        An iterator over each record, where ``None`` is yielded for any record which
+        could not be parsed.
+    """
+
+    from rdkit import Chem
+
+    yield from Chem.ForwardSDMolSupplier(
+        file, removeHs=False, sanitize=False, strictParsing=True
+    )
+
+
+def iter_sdf_string(contents: str) -> Iterator[Optional["Chem.Mol"]]:
+    """Lazily parses each record of the contents of an SDF file held in memory into
+    an un-sanitized RDKit molecule.
+
+    Args:
+        contents: The contents of the SDF file.
+
+    Returns:
+        An iterator over each record, where ``None`` is yielded for any record which
+        could not be parsed.
+    """
+
+    yield from iter_sdf_records(io.BytesIO(contents.encode()))
+
+
+def iter_sdf_path(path: str) -> Iterator[Tuple[str, Optional["Chem.Mol"]]]:
+    """Lazily parses each record of an SDF file, or of every SDF file in a directory,
+    into an un-sanitized RDKit molecule.
+
+    Args:
+        path: The path to either an SDF file or a directory containing SDF files
+            with a ``.sdf`` extension. Files in a directory are read in alphabetical
+            order.
+
+    Returns:
+        An iterator over tuples of a unique id of the form ``FILE_NAME:RECORD_INDEX``
+        and the parsed record, which will be ``None`` if the record could not be
+        parsed.
+    """
+
+    file_paths = (
+        [path]
+        if not os.path.isdir(path)
+        else [
+            os.path.join(path, file_name)
+            for file_name in sorted(os.listdir(path))
+            if file_name.lower().endswith(".sdf")
+        ]
+    )
+
+    for file_path in file_paths:
+
+        file_name = os.path.basename(file_path)
+
+        with open(file_path, "rb") as file:
+
+            for record_index, rdkit_molecule in enumerate(iter_sdf_records(file)):
+                yield f"{file_name}:{record_index}", rdkit_molecule
+
+
+@timed("parse_sdf")
+def molecule_from_sdf_record(rdkit_molecule: "Chem.Mol") -> "Molecule":
+    """Converts an un-sanitized RDKit molecule parsed from an SDF record into an
+    OpenFF molecule, sanitizing it in the same way as ``Molecule.from_file``.
+
+    Args:
+        rdkit_molecule: The parsed record. This will be modified in-place.
+
+    Returns:
+        The OpenFF molecule.
+    """
+
+    from openforcefield.topology import Molecule
+    from rdkit import Chem
+
+    # Sanitize, but exclude the steps which would alter the hydrogen counts or apply
+    # the RDKit aromaticity model, in the same way as the OpenFF RDKit wrapper.
+    Chem.SanitizeMol(
+        rdkit_molecule,
+        Chem.SANITIZE_ALL ^ Chem.SANITIZE_ADJUSTHS ^ Chem.SANITIZE_SETAROMATICITY,
+    )
+    Chem.SetAromaticity(rdkit_molecule, Chem.AromaticityModel.AROMATICITY_MDL)
+    Chem.AssignStereochemistryFrom3D(rdkit_molecule)
+
+    return Molecule.from_rdkit(rdkit_molecule)
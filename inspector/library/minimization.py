@@ -1,6 +1,4 @@
 import abc
-import copy
-import functools
 from typing import List, Literal, Optional, Tuple, Union
 
 import numpy
@@ -9,40 +7,85 @@ from openforcefield.typing.engines.smirnoff import ForceField
 from scipy import optimize
 from simtk import openmm, unit
 
-from inspector.library.models.minimization import (
-    MinimizationFrame,
-    MinimizationTrajectory,
+from inspector.library.forcefield import (
+    create_labelled_system,
+    unconstrained_force_field,
 )
+from inspector.library.models.array import ArrayDType
+from inspector.library.models.minimization import MinimizationTrajectory
 from inspector.library.models.molecule import RESTMolecule
+from inspector.library.timing import timed
 
 
 class MinimizationError(ValueError):
     """An exception raised when the energy minimizer fails to successfully run."""
 
 
+class _MemoizedObjective:
+    """Wraps ``EnergyMinimizer._evaluate_energy_and_force`` so that the energy and
+    gradient of the most recently evaluated conformer can be retrieved again without
+    re-evaluating them."""
+
+    def __init__(self, context: openmm.Context):
+        """
+
+        Args:
+            context: The context (created using ``EnergyMinimizer._create_context``)
+                which encodes the potential energy function.
+        """
+
+        self._context = context
+
+        self._last_conformer: Optional[numpy.ndarray] = None
+        self._last_result: Optional[Tuple[float, numpy.ndarray]] = None
+
+    def __call__(self, conformer: numpy.ndarray) -> Tuple[float, numpy.ndarray]:
+
+        if self._last_conformer is None or not numpy.array_equal(
+            conformer, self._last_conformer
+        ):
+
+            self._last_result = EnergyMinimizer._evaluate_energy_and_force(
+                conformer, self._context
+            )
+            # Copy the conformer as the optimizer may modify its array in-place.
+            self._last_conformer = numpy.array(conformer, copy=True)
+
+        return self._last_result
+
+
 class EnergyMinimizer(abc.ABC):
     """A class which provides methods for performing energy minimization on the conformer
     of a molecule."""
 
     @staticmethod
-    def _evaluate_energy_and_force(
-        conformer: numpy.ndarray, system: openmm.System
-    ) -> Tuple[float, numpy.ndarray]:
-        """Evaluates the energy and it's gradient with respect to coordinates (i.e.
-        -F(x)) of a given conformer.
+    def _create_context(system: openmm.System) -> openmm.Context:
+        """Creates an OpenMM context which can be used to repeatedly evaluate the
+        energy and forces of conformers using a given system.
 
         Args:
-            conformer: The conformer with shape=(n_atoms, 3) and units of nm.
             system: The system which encodes the potential energy function.
         """
         integrator = openmm.VerletIntegrator(0.001 * unit.femtoseconds)
 
         platform = openmm.Platform.getPlatformByName("Reference")
-        openmm_context = openmm.Context(system, integrator, platform)
+        return openmm.Context(system, integrator, platform)
 
-        openmm_context.setPositions(conformer.reshape(system.getNumParticles(), 3))
+    @staticmethod
+    def _evaluate_energy_and_force(
+        conformer: numpy.ndarray, context: openmm.Context
+    ) -> Tuple[float, numpy.ndarray]:
+        """Evaluates the energy and it's gradient with respect to coordinates (i.e.
+        -F(x)) of a given conformer.
+
+        Args:
+            conformer: The conformer with shape=(n_atoms, 3) and units of nm.
+            context: The context (created using ``_create_context``) which
+                encodes the potential energy function.
+        """
+        context.setPositions(conformer.reshape(-1, 3))
 
-        state = openmm_context.getState(getEnergy=True, getForces=True)
+        state = context.getState(getEnergy=True, getForces=True)
 
         return (
             state.getPotentialEnergy().value_in_unit(unit.kilojoules_per_mole),
@@ -52,12 +95,65 @@ class EnergyMinimizer(abc.ABC):
         )
 
     @staticmethod
+    def _select_frames(
+        energies: numpy.ndarray,
+        frame_stride: int = 1,
+        frame_energy_threshold: Optional[float] = None,
+        endpoints_only: bool = False,
+    ) -> numpy.ndarray:
+        """Selects which iterations of a minimization should be stored in its
+        trajectory. The first and last iterations are always selected.
+
+        Args:
+            energies: The energy of each iteration with shape=(n_iterations,).
+            frame_stride: Only every ``frame_stride``th iteration will be selected.
+            frame_energy_threshold: If specified, an iteration will only be selected if
+                its energy differs from the previously selected iteration by more than
+                this threshold.
+            endpoints_only: Whether to only select the first and last iterations.
+
+        Returns:
+            The indices of the selected iterations.
+        """
+
+        n_frames = len(energies)
+
+        if n_frames == 0:
+            return numpy.array([], dtype=int)
+
+        if endpoints_only:
+            return numpy.unique([0, n_frames - 1])
+
+        candidate_indices = numpy.arange(0, n_frames, frame_stride)
+
+        if frame_energy_threshold is None:
+            return numpy.unique(numpy.append(candidate_indices, n_frames - 1))
+
+        selected_indices = [0]
+
+        for index in candidate_indices[1:]:
+
+            if (
+                numpy.abs(energies[index] - energies[selected_indices[-1]])
+                > frame_energy_threshold
+            ):
+                selected_indices.append(index)
+
+        return numpy.unique(numpy.append(selected_indices, n_frames - 1))
+
+    @staticmethod
+    @timed("minimize")
     def minimize(
         molecule: Union[Molecule, RESTMolecule],
         conformer: unit.Quantity,
         force_field: ForceField,
         method: Literal["L-BFGS-B"] = "L-BFGS-B",
         energy_tolerance: Optional[float] = None,
+        frame_stride: int = 1,
+        frame_energy_threshold: Optional[float] = None,
+        endpoints_only: bool = False,
+        geometry_encoding: Optional[ArrayDType] = None,
+        use_partial_charges: bool = False,
     ) -> MinimizationTrajectory:
         """Performs energy minimization of a specified conformer of a molecule.
 
@@ -69,45 +165,58 @@ class EnergyMinimizer(abc.ABC):
             method: The minimization algorithm to use.
             energy_tolerance: The target tolerance to converge the energy within-in
                 [kJ / mol]
+            frame_stride: Only every ``frame_stride``th iteration will be stored in
+                the returned trajectory.
+            frame_energy_threshold: If specified, an iteration will only be stored in
+                the returned trajectory if its energy differs from the previously
+                stored iteration by more than this threshold [kJ / mol].
+            endpoints_only: Whether to only store the first and last iterations.
+            geometry_encoding: The data type to encode the conformer of each
+                iteration as. If ``None``, the conformers will be stored as lists of
+                floats.
+            use_partial_charges: Whether to use any partial charges already assigned
+                to the molecule in place of those assigned by the force field.
 
         Returns:
             The trajectory of each iteration of the minimization, including both the
-            conformer and energy at each iteration.
+            conformer and energy at each iteration. The first and last iterations are
+            always included.
         """
 
-        molecule = copy.deepcopy(molecule)
-
         if isinstance(molecule, RESTMolecule):
             molecule = molecule.to_openff()
 
-        if len(force_field.get_parameter_handler("Constraints").parameters) > 0:
-            force_field.deregister_parameter_handler("Constraints")
+        force_field = unconstrained_force_field(force_field)
 
-        # Apply the force field to the molecule.
-        omm_system = force_field.create_openmm_system(molecule.to_topology())
+        # Apply the force field to the molecule and create a single context which is
+        # re-used for every evaluation of the energy and force. The labels are not
+        # needed here, but are stored so that the molecule does not need to be
+        # labelled again by later requests.
+        _, omm_system = create_labelled_system(
+            molecule, force_field, use_partial_charges
+        )
+        omm_context = EnergyMinimizer._create_context(omm_system)
 
-        # Create an array to store each frame in and a callback function
-        # to create and store the frame.
-        frames: List[MinimizationFrame] = []
+        # Create lists to store the conformer and energy of each iteration in and a
+        # callback function to store them.
+        conformers: List[numpy.ndarray] = []
+        energies: List[float] = []
+
+        objective_function = _MemoizedObjective(omm_context)
 
         def callback(current_conformer: numpy.ndarray):
 
-            energy = EnergyMinimizer._evaluate_energy_and_force(
-                current_conformer, omm_system
-            )[0]
+            # The optimizer will have just evaluated the current conformer so its
+            # energy can be retrieved without an additional evaluation.
+            energy = objective_function(current_conformer)[0]
 
-            frames.append(
-                MinimizationFrame(
-                    geometry=[*(current_conformer * 10.0)], potential_energy=energy
-                )
-            )
+            conformers.append(numpy.array(current_conformer, copy=True))
+            energies.append(energy)
 
             return numpy.isnan(energy)
 
         result = optimize.minimize(
-            functools.partial(
-                EnergyMinimizer._evaluate_energy_and_force, system=omm_system
-            ),
+            objective_function,
             conformer.value_in_unit(unit.nanometer),
             method=method,
             jac=True,
@@ -118,4 +227,17 @@ class EnergyMinimizer(abc.ABC):
         if not result.success:
             raise MinimizationError(result.message)
 
-        return MinimizationTrajectory(frames=frames)
+        # Store the trajectory as a single array of conformers with
+        # shape=(n_frames, n_atoms, 3) and a vector of energies.
+        geometries = numpy.array(conformers).reshape(-1, len(conformer), 3) * 10.0
+        potential_energies = numpy.array(energies)
+
+        frame_indices = EnergyMinimizer._select_frames(
+            potential_energies, frame_stride, frame_energy_threshold, endpoints_only
+        )
+
+        return MinimizationTrajectory.from_arrays(
+            geometries[frame_indices],
+            potential_energies[frame_indices],
+            geometry_encoding,
+        )
@@ -0,0 +1,92 @@
+import base64
+import re
+from typing import Literal, Optional, Tuple
+
+import numpy
+from pydantic import BaseModel, Field, PrivateAttr, validator
+
+ArrayDType = Literal["float32", "float64"]
+
+_BASE64_REGEX = re.compile(
+    r"(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?"
+)
+
+
+class EncodedArray(BaseModel):
+    """A compact representation of a flat array of floating point numbers which stores
+    the raw little-endian bytes of the array as a base64 encoded string.
+
+    Decoding (and encoding) the array requires only a single pass over the underlying
+    buffer, rather than the per-value validation and formatting required by a list of
+    floats.
+    """
+
+    dtype: ArrayDType = Field(
+        ..., description="The (little-endian) data type of each value in the array."
+    )
+    data: str = Field(..., description="The base64 encoded bytes of the array.")
+
+    # The decoded array, and the data type and string it was decoded from.
+    _decoded: Optional[Tuple[str, str, numpy.ndarray]] = PrivateAttr(None)
+
+    @validator("data")
+    def _validate_data(cls, v, values):
+
+        if "dtype" not in values:
+            return v
+
+        # Validate the encoding without decoding the data, such that large arrays are
+        # only decoded once they are actually needed.
+        assert (
+            _BASE64_REGEX.fullmatch(v) is not None
+        ), "the data is not a valid base64 encoded string."
+
+        n_bytes = len(v) // 4 * 3 - v[-2:].count("=")
+
+        assert (
+            n_bytes % numpy.dtype(values["dtype"]).itemsize == 0
+        ), "the number of bytes is not divisible by the size of the data type."
+
+        return v
+
+    @property
+    def size(self) -> int:
+        """The number of values in the array."""
+
+        n_bytes = len(self.data) // 4 * 3 - self.data[-2:].count("=")
+        return n_bytes // numpy.dtype(self.dtype).itemsize
+
+    @classmethod
+    def from_numpy(cls, array: numpy.ndarray, dtype: ArrayDType) -> "EncodedArray":
+        """Encodes an array of any shape, which will be flattened.
+
+        Args:
+            array: The array to encode.
+            dtype: The data type to store the values of the array as.
+        """
+
+        array = numpy.asarray(array, dtype=numpy.dtype(dtype).newbyteorder("<"))
+        return cls(dtype=dtype, data=base64.b64encode(array.tobytes()).decode())
+
+    def to_numpy(self) -> numpy.ndarray:
+        """Decodes the array. The returned array is a read-only view over the decoded
+        bytes and has shape=(n_values,).
+
+        Notes:
+            * The data is only decoded once, after which the same (read-only) array is
+              returned until ``data`` or ``dtype`` is replaced.
+        """
+
+        if (
+            self._decoded is None
+            or self._decoded[0] is not self.data
+            or self._decoded[1] != self.dtype
+        ):
+
+            array = numpy.frombuffer(
+                base64.b64decode(self.data),
+                dtype=numpy.dtype(self.dtype).newbyteorder("<"),
+            )
+            self._decoded = (self.data, self.dtype, array)
+
+        return self._decoded[2]
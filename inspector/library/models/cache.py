@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+
+class CacheInfo(BaseModel):
+    """Statistics about the usage of a cache."""
+
+    hits: int = Field(..., description="The number of successful cache lookups.")
+    misses: int = Field(..., description="The number of unsuccessful cache lookups.")
+
+    max_size: int = Field(
+        ..., description="The maximum number of entries the cache can store."
+    )
+    current_size: int = Field(
+        ..., description="The number of entries currently stored in the cache."
+    )
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 
 from pydantic import BaseModel, Field
 
@@ -24,3 +24,47 @@ class DecomposedEnergy(BaseModel):
         description="The contribution of the electrostatic interactions to the total "
         "potential energy [kJ / mol].",
     )
+
+
+class DecomposedEnergyBatch(BaseModel):
+    """A class which stores the contribution of each SMIRNOFF parameter to the total
+    potential energy of each of a set of conformers of the same system."""
+
+    valence_energies: Dict[str, Dict[str, List[float]]] = Field(
+        ...,
+        description="The energy contributions of each valence parameter type to each "
+        "conformer stored in a dictionary of the form "
+        "``energy_per_parameter[HANDLER_TAG][PARAMETER_ID][CONFORMER_INDEX]`` with "
+        "units of [kJ / mol].",
+    )
+
+    vdw_energies: List[float] = Field(
+        ...,
+        description="The contribution of the vdW interactions to the total potential "
+        "energy of each conformer [kJ / mol].",
+    )
+    electrostatic_energies: List[float] = Field(
+        ...,
+        description="The contribution of the electrostatic interactions to the total "
+        "potential energy of each conformer [kJ / mol].",
+    )
+
+    @property
+    def n_conformers(self) -> int:
+        """The number of conformers in the batch."""
+        return len(self.vdw_energies)
+
+    def conformer(self, index: int) -> DecomposedEnergy:
+        """Returns the decomposed energy of a single conformer in the batch."""
+
+        return DecomposedEnergy(
+            valence_energies={
+                handler_name: {
+                    parameter_id: energies[index]
+                    for parameter_id, energies in handler_energies.items()
+                }
+                for handler_name, handler_energies in self.valence_energies.items()
+            },
+            vdw_energy=self.vdw_energies[index],
+            electrostatic_energy=self.electrostatic_energies[index],
+        )
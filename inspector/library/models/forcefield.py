@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -21,3 +21,18 @@ class AppliedParameters(BaseModel):
         "For bond parameters for e.g. the value will be a list of tuples of two "
         "indices, while for torsions each tuple will contain four atom indices.",
     )
+
+
+class AppliedParametersResult(BaseModel):
+    """The result of applying a force field to one molecule of a batch."""
+
+    applied_parameters: Optional[AppliedParameters] = Field(
+        None,
+        description="The parameters applied to the molecule, or ``None`` if the force "
+        "field could not be applied.",
+    )
+    error: Optional[str] = Field(
+        None,
+        description="A description of why the force field could not be applied to the "
+        "molecule, or ``None`` if it was applied successfully.",
+    )
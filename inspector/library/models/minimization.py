@@ -1,15 +1,21 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence, Union, overload
 
-from pydantic import BaseModel, Field, conlist, validator
+import numpy
+from pydantic import BaseModel, Field, conlist, parse_obj_as, validator
+
+from inspector.library.models.array import ArrayDType, EncodedArray
 
 
 class MinimizationFrame(BaseModel):
     """Contains the output of a single iteration from an energy minimization."""
 
-    geometry: conlist(float, min_items=1) = Field(
+    geometry: Union[EncodedArray, conlist(float, min_items=1)] = Field(
         ...,
         description="A flattened array of the molecules XYZ atomic coordinates [Å] "
-        "with length=n_atoms*3 which can be reshaped to array with shape=(n_atoms, 3).",
+        "with length=n_atoms*3 which can be reshaped to array with shape=(n_atoms, 3)."
+        "\n"
+        "The coordinates may either be specified as a list of floats, or more "
+        "compactly as a base64 encoded array.",
     )
     potential_energy: float = Field(
         ...,
@@ -18,15 +24,211 @@ class MinimizationFrame(BaseModel):
 
     @validator("geometry")
     def _validate_geometry(cls, v):
-        assert len(v) % 3 == 0, "geometry length not divisible by three."
+        n_values = v.size if isinstance(v, EncodedArray) else len(v)
+        assert n_values % 3 == 0, "geometry length not divisible by three."
         return v
 
 
+class MinimizationFrames(Sequence[MinimizationFrame]):
+    """The frames of a minimization trajectory, stored as a single array of
+    geometries and a vector of energies rather than as one model per frame.
+
+    Individual ``MinimizationFrame`` objects are only created when a frame is
+    accessed, and the arrays are only converted to their JSON representation when
+    the trajectory is serialized (see ``to_json_compatible``).
+
+    Notes:
+        * This is a pydantic compatible type which may be validated from either an
+          existing ``MinimizationFrames`` object, which is used as is, or from a list
+          of (serialized) ``MinimizationFrame`` objects.
+    """
+
+    @property
+    def geometries(self) -> numpy.ndarray:
+        """The geometry of each frame [Å] with shape=(n_frames, n_atoms, 3)."""
+        return self._geometries
+
+    @property
+    def energies(self) -> numpy.ndarray:
+        """The potential energy of each frame [kJ / mol] with shape=(n_frames,)."""
+        return self._energies
+
+    def __init__(
+        self,
+        geometries: numpy.ndarray,
+        energies: numpy.ndarray,
+        geometry_encoding: Optional[ArrayDType] = None,
+    ):
+        """
+
+        Args:
+            geometries: The geometry of each frame with shape=(n_frames, n_atoms, 3)
+                and units of [Å].
+            energies: The potential energy of each frame with shape=(n_frames,) and
+                units of [kJ / mol].
+            geometry_encoding: The data type to encode the geometry of each frame
+                as when serialized. If ``None``, the geometries will be serialized as
+                lists of floats.
+        """
+
+        geometries = numpy.asarray(geometries, dtype=float)
+        energies = numpy.asarray(energies, dtype=float)
+
+        assert len(geometries) == len(energies), "the number of frames do not match."
+
+        self._geometries = geometries.reshape(
+            len(geometries), -1 if geometries.size else 0, 3
+        )
+        self._energies = energies.reshape(-1)
+
+        self._geometry_encoding = geometry_encoding
+
+    @classmethod
+    def from_frames(cls, frames: Sequence[MinimizationFrame]) -> "MinimizationFrames":
+        """Stores a list of frames as arrays. The geometries are encoded as the data
+        type of the encoded frame geometries when serialized if all of the frames
+        share the same encoding.
+        """
+
+        encodings = {
+            frame.geometry.dtype if isinstance(frame.geometry, EncodedArray) else None
+            for frame in frames
+        }
+
+        geometries = [
+            frame.geometry.to_numpy()
+            if isinstance(frame.geometry, EncodedArray)
+            else numpy.asarray(frame.geometry, dtype=float)
+            for frame in frames
+        ]
+
+        assert (
+            len({len(geometry) for geometry in geometries}) <= 1
+        ), "the number of atoms in each frame do not match."
+
+        return cls(
+            numpy.array(geometries, dtype=float),
+            numpy.array([frame.potential_energy for frame in frames], dtype=float),
+            encodings.pop() if len(encodings) == 1 else None,
+        )
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: Any) -> "MinimizationFrames":
+
+        if isinstance(value, MinimizationFrames):
+            return value
+
+        return cls.from_frames(parse_obj_as(List[MinimizationFrame], value))
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: Dict[str, Any]):
+
+        # Inline any models referenced by the frame schema as the definitions of a
+        # custom type are not collected by pydantic.
+        frame_schema = {**MinimizationFrame.schema()}
+        definitions = frame_schema.pop("definitions", {})
+
+        def inline_references(value: Any) -> Any:
+
+            if isinstance(value, dict) and "$ref" in value:
+                return inline_references(definitions[value["$ref"].split("/")[-1]])
+            elif isinstance(value, dict):
+                return {key: inline_references(item) for key, item in value.items()}
+            elif isinstance(value, list):
+                return [inline_references(item) for item in value]
+
+            return value
+
+        field_schema.update(type="array", items=inline_references(frame_schema))
+
+    def _encode_geometry(self, index: int) -> Union[EncodedArray, numpy.ndarray]:
+
+        geometry = self._geometries[index].reshape(-1)
+
+        return (
+            geometry
+            if self._geometry_encoding is None
+            else EncodedArray.from_numpy(geometry, self._geometry_encoding)
+        )
+
+    def __len__(self) -> int:
+        return len(self._energies)
+
+    @overload
+    def __getitem__(self, index: int) -> MinimizationFrame:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[MinimizationFrame]:
+        ...
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+
+        index = range(len(self))[index]
+        geometry = self._encode_geometry(index)
+
+        return MinimizationFrame(
+            geometry=geometry if isinstance(geometry, EncodedArray) else [*geometry],
+            potential_energy=float(self._energies[index]),
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Sequence) and [*self] == [*other]
+
+    def __repr__(self) -> str:
+        return f"MinimizationFrames(n_frames={len(self)})"
+
+    def to_json_compatible(self) -> List[Dict[str, Any]]:
+        """Returns the frames as a list of dictionaries in which each geometry is
+        either a (flat) view into the underlying array or an encoded array. The views
+        can be serialized directly by ``orjson``."""
+
+        return [
+            {"geometry": self._encode_geometry(index), "potential_energy": energy}
+            for index, energy in enumerate(self._energies.tolist())
+        ]
+
+
 class MinimizationTrajectory(BaseModel):
     """Contains the trajectory of outputs (both conformers and energies) produced by each
     iteration of an energy minimization."""
 
-    frames: List[MinimizationFrame] = Field(
+    class Config:
+        # Used by ``.json()`` and ``jsonable_encoder``. The ``orjson`` based responses
+        # instead serialize the frames using ``to_json_compatible``.
+        json_encoders = {
+            MinimizationFrames: lambda frames: [frame.dict() for frame in frames]
+        }
+
+    frames: MinimizationFrames = Field(
         ...,
         description="The outputs of each iteration of the minimization.",
     )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        geometries: numpy.ndarray,
+        energies: numpy.ndarray,
+        geometry_encoding: Optional[ArrayDType] = None,
+    ) -> "MinimizationTrajectory":
+        """Creates a trajectory from an array of conformers and their corresponding
+        energies without copying them into individual frames.
+
+        Args:
+            geometries: The conformer of each frame with shape=(n_frames, n_atoms, 3)
+                and units of [Å].
+            energies: The potential energy of each frame with shape=(n_frames,) and
+                units of [kJ / mol].
+            geometry_encoding: The data type to encode the geometry of each frame
+                as. If ``None``, the geometries will be stored as lists of floats.
+        """
+
+        return cls(frames=MinimizationFrames(geometries, energies, geometry_encoding))
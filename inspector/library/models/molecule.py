@@ -1,10 +1,25 @@
-from typing import Literal, Optional, Tuple, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import numpy
-from openforcefield.topology import Molecule
-from pydantic import BaseModel, Field, conlist, constr, validator
+from pydantic import BaseModel, Field, PrivateAttr, conlist, constr, validator
 from simtk import unit
 
+from inspector.library.cache import LRUCache
+from inspector.library.models.array import ArrayDType, EncodedArray
+from inspector.library.timing import timed
+
+if TYPE_CHECKING:
+    from openforcefield.topology import Molecule
+
 T = TypeVar("T", bound="RESTMolecule")
 
 AtomicSymbol = Literal["C", "O", "H", "N", "S", "F", "Br", "Cl", "I", "P"]
@@ -19,7 +34,16 @@ SEMVER_REGEX = (
     r"(?:\.[0-9a-zA-Z-]+)*))?$"
 )
 
-REST_MOLECULE_SCHEMA_VERSION = "0.0.1-alpha.1"
+# 0.0.1-alpha.2: added the optional ``partial_charges`` field.
+REST_MOLECULE_SCHEMA_VERSION = "0.0.1-alpha.2"
+
+
+# The OpenFF molecules created from ``RESTMolecule`` objects, keyed by their symbols,
+# connectivity, geometry and partial charges.
+molecule_cache: "LRUCache[Molecule]" = LRUCache(max_size=1024)
+# The RDKit molecule (without a conformer), its stereochemistry and the OpenFF
+# molecule most recently created from each unique set of symbols and connectivity.
+topology_cache: "LRUCache[Tuple[object, Hashable, Molecule]]" = LRUCache(max_size=1024)
 
 
 class InvalidMoleculeError(ValueError):
@@ -53,15 +77,37 @@ class RESTMolecule(BaseModel):
         "item must be a tuple of the form ``(atom_index_a, atom_index_b, bond_order)``.",
     )
 
-    geometry: conlist(float, min_items=1) = Field(
+    geometry: Union[EncodedArray, conlist(float, min_items=1)] = Field(
         ...,
         description="A flattened array of the molecules XYZ atomic coordinates [Å] "
         "with length=n_atoms*3 which can be reshaped to array with shape=(n_atoms, 3)."
         "\n"
         "The ordering of the coordinates must match the ordering of the ``symbols`` "
-        "and ``connectivity`` lists.",
+        "and ``connectivity`` lists."
+        "\n"
+        "The coordinates may either be specified as a list of floats, or more "
+        "compactly as a base64 encoded array.",
+    )
+
+    partial_charges: Optional[conlist(float, min_items=1)] = Field(
+        None,
+        description="The partial charge [e] of each atom with length=n_atoms. These "
+        "charges are only used in place of those which would otherwise be "
+        "generated by a force field (e.g. AM1BCC charges) when explicitly "
+        "requested, e.g. by setting ``use_partial_charges``."
+        "\n"
+        "Molecules loaded from files which store partial charges, such as SDF files "
+        "with a ``PartialCharges`` property, will have this field populated."
+        "\n"
+        "The ordering of the charges must match the ordering of the ``symbols`` list.",
     )
 
+    # The array representation of the geometry and the field value it was created
+    # from.
+    _geometry_array: Optional[
+        Tuple[Union[EncodedArray, List[float]], numpy.ndarray]
+    ] = PrivateAttr(None)
+
     @validator("connectivity")
     def _validate_connectivity(cls, v, values):
 
@@ -77,13 +123,67 @@ class RESTMolecule(BaseModel):
     @validator("geometry")
     def _validate_geometry(cls, v, values):
 
-        assert len(v) % 3 == 0, "geometry length not divisible by three."
-        assert len(v) / 3 == len(values["symbols"]), "incorrect geometry length."
+        n_values = v.size if isinstance(v, EncodedArray) else len(v)
+
+        assert n_values % 3 == 0, "geometry length not divisible by three."
+        assert n_values / 3 == len(values["symbols"]), "incorrect geometry length."
+
+        return v
+
+    @validator("partial_charges")
+    def _validate_partial_charges(cls, v, values):
+
+        assert v is None or len(v) == len(
+            values["symbols"]
+        ), "incorrect number of partial charges."
 
         return v
 
+    @property
+    def geometry_array(self) -> numpy.ndarray:
+        """The coordinates [Å] of each atom in the molecule with shape=(n_atoms, 3).
+
+        Notes:
+            * The geometry is only converted (or decoded) once, after which the same
+              read-only array is returned until ``geometry`` is replaced. Modifying
+              the ``geometry`` list in-place will not be reflected in this array.
+        """
+
+        if self._geometry_array is None or self._geometry_array[0] is not self.geometry:
+
+            geometry = (
+                self.geometry.to_numpy()
+                if isinstance(self.geometry, EncodedArray)
+                else numpy.array(self.geometry)
+            )
+
+            geometry_array = numpy.asarray(geometry, dtype=float).reshape(
+                len(self.symbols), 3
+            )
+            geometry_array.flags.writeable = False
+
+            self._geometry_array = (self.geometry, geometry_array)
+
+        return self._geometry_array[1]
+
     @classmethod
-    def from_openff(cls: "RESTMolecule", molecule: Molecule) -> "RESTMolecule":
+    def from_openff(
+        cls: "RESTMolecule",
+        molecule: "Molecule",
+        geometry_encoding: Optional[ArrayDType] = None,
+    ) -> "RESTMolecule":
+        """Creates a model from an OpenFF molecule which contains a single conformer.
+
+        Notes:
+            * Any partial charges assigned to the molecule are stored in the model, but
+              are only used in place of those of a force field when this is
+              explicitly requested.
+
+        Args:
+            molecule: The molecule to convert.
+            geometry_encoding: The data type to encode the geometry as. If ``None``,
+                the geometry will be stored as a list of floats.
+        """
 
         if molecule.n_conformers != 1:
 
@@ -92,35 +192,61 @@ class RESTMolecule(BaseModel):
                 f"({molecule.n_conformers} found)."
             )
 
+        geometry = molecule.conformers[0].value_in_unit(unit.angstrom)
+
         return cls(
             symbols=[atom.element.symbol for atom in molecule.atoms],
             connectivity=[
                 (bond.atom1_index, bond.atom2_index, bond.bond_order)
                 for bond in molecule.bonds
             ],
-            geometry=[*molecule.conformers[0].value_in_unit(unit.angstrom).flatten()],
+            geometry=[*geometry.flatten()]
+            if geometry_encoding is None
+            else EncodedArray.from_numpy(geometry, geometry_encoding),
+            partial_charges=None
+            if molecule.partial_charges is None
+            else [*molecule.partial_charges.value_in_unit(unit.elementary_charge)],
+        )
+
+    @classmethod
+    def _stereochemistry(cls, rdkit_molecule) -> Hashable:
+        """Returns the chirality of each atom and the stereochemistry of each bond of
+        an RDKit molecule."""
+
+        return (
+            tuple(int(atom.GetChiralTag()) for atom in rdkit_molecule.GetAtoms()),
+            tuple(int(bond.GetStereo()) for bond in rdkit_molecule.GetBonds()),
         )
 
-    def to_openff(self) -> Molecule:
+    def _topology_key(self) -> Hashable:
+        return tuple(self.symbols), tuple(map(tuple, self.connectivity))
+
+    def _rdkit_conformer(self):
 
         from rdkit import Chem
-        from rdkit.Chem import rdmolops
         from rdkit.Geometry.rdGeometry import Point3D
 
-        geometry = numpy.array(self.geometry).reshape(int(len(self.geometry) / 3), 3)
         conformer = Chem.Conformer(len(self.symbols))
 
-        # noinspection PyArgumentList
-        rdkit_rw_molecule = Chem.RWMol(Chem.Mol())
+        for i, (x, y, z) in enumerate(self.geometry_array):
+            conformer.SetAtomPosition(i, Point3D(x, y, z))
 
-        # Add the atoms and set the conformer coordinates.
-        for i, symbol in enumerate(self.symbols):
+        return conformer
 
-            atom = rdkit_rw_molecule.AddAtom(Chem.Atom(symbol))
+    def _build_openff(self) -> "Molecule":
+        """Builds an OpenFF molecule from scratch via RDKit, storing the result in the
+        topology cache."""
 
-            conformer.SetAtomPosition(
-                atom, Point3D(geometry[i][0], geometry[i][1], geometry[i][2])
-            )
+        from openforcefield.topology import Molecule
+        from rdkit import Chem
+        from rdkit.Chem import rdmolops
+
+        # noinspection PyArgumentList
+        rdkit_rw_molecule = Chem.RWMol(Chem.Mol())
+
+        # Add the atoms.
+        for symbol in self.symbols:
+            rdkit_rw_molecule.AddAtom(Chem.Atom(symbol))
 
         # Add the bond connectivity.
         for index_a, index_b, bond_order in self.connectivity:
@@ -137,11 +263,110 @@ class RESTMolecule(BaseModel):
         rdkit_molecule = rdkit_rw_molecule.GetMol()
         Chem.SanitizeMol(rdkit_molecule)
 
+        rdkit_template = Chem.Mol(rdkit_molecule)
+
         # Add the coordinates to the molecule and assign stereochemistry.
-        conformer_id = rdkit_molecule.AddConformer(conformer, assignId=True)
+        conformer_id = rdkit_molecule.AddConformer(
+            self._rdkit_conformer(), assignId=True
+        )
         rdmolops.AssignStereochemistryFrom3D(
             rdkit_molecule, confId=conformer_id, replaceExistingTags=True
         )
 
         molecule = Molecule.from_rdkit(rdkit_molecule)
+
+        topology_cache.set(
+            self._topology_key(),
+            (rdkit_template, self._stereochemistry(rdkit_molecule), Molecule(molecule)),
+        )
+
         return molecule
+
+    def _swap_geometry(self) -> Optional["Molecule"]:
+        """Attempts to create an OpenFF molecule by replacing the coordinates of a
+        previously created molecule with the same symbols and connectivity.
+
+        Returns:
+            The created molecule, or ``None`` if no molecule with the same symbols and
+            connectivity has been created or the stereochemistry of the new geometry
+            differs from that of the cached molecule.
+        """
+
+        from openforcefield.topology import Molecule
+        from rdkit import Chem
+        from rdkit.Chem import rdmolops
+
+        cached_value = topology_cache.get(self._topology_key())
+
+        if cached_value is None:
+            return None
+
+        rdkit_template, stereochemistry, template = cached_value
+
+        atom_stereo, bond_stereo = stereochemistry
+
+        # Stereochemistry can only differ between geometries if the molecule has at
+        # least one stereocenter or stereogenic bond.
+        if any(atom_stereo) or any(bond_stereo):
+
+            rdkit_molecule = Chem.Mol(rdkit_template)
+
+            conformer_id = rdkit_molecule.AddConformer(
+                self._rdkit_conformer(), assignId=True
+            )
+            rdmolops.AssignStereochemistryFrom3D(
+                rdkit_molecule, confId=conformer_id, replaceExistingTags=True
+            )
+
+            if self._stereochemistry(rdkit_molecule) != stereochemistry:
+                return None
+
+        molecule = Molecule(template)
+        molecule._conformers = [
+            unit.Quantity(numpy.array(self.geometry_array), unit.angstrom)
+        ]
+
+        return molecule
+
+    @timed("to_openff")
+    def to_openff(self) -> "Molecule":
+        """Converts this model into an OpenFF molecule.
+
+        Notes:
+            * The created molecules are cached based on the contents of this model,
+              and the molecules for models which differ only by their geometry are
+              created by swapping the coordinates of a cached molecule whenever the
+              stereochemistry of the two geometries is the same.
+            * A copy of the cached molecule is returned and so may be freely
+              modified.
+
+        Returns:
+            The OpenFF molecule.
+        """
+
+        from openforcefield.topology import Molecule
+
+        cache_key = (
+            self._topology_key(),
+            self.geometry_array.tobytes(),
+            None if self.partial_charges is None else tuple(self.partial_charges),
+        )
+
+        molecule = molecule_cache.get(cache_key)
+
+        if molecule is None:
+
+            molecule = self._swap_geometry()
+
+            if molecule is None:
+                molecule = self._build_openff()
+
+            if self.partial_charges is not None:
+
+                molecule.partial_charges = unit.Quantity(
+                    numpy.array(self.partial_charges), unit.elementary_charge
+                )
+
+            molecule_cache.set(cache_key, molecule)
+
+        return Molecule(molecule)
@@ -1,19 +1,21 @@
 import abc
-from typing import List, Literal, Optional, TypeVar, Union
-
-from openforcefield.typing.engines.smirnoff.parameters import (
-    AngleHandler,
-    BondHandler,
-    ChargeIncrementModelHandler,
-    ConstraintHandler,
-    ImproperTorsionHandler,
-    LibraryChargeHandler,
-    ProperTorsionHandler,
-    vdWHandler,
-)
+from typing import TYPE_CHECKING, List, Literal, Optional, TypeVar, Union
+
 from pydantic import BaseModel, Field, conlist, validator
 from simtk import unit
 
+if TYPE_CHECKING:
+    from openforcefield.typing.engines.smirnoff.parameters import (
+        AngleHandler,
+        BondHandler,
+        ChargeIncrementModelHandler,
+        ConstraintHandler,
+        ImproperTorsionHandler,
+        LibraryChargeHandler,
+        ProperTorsionHandler,
+        vdWHandler,
+    )
+
 T = TypeVar("T", bound="_ParameterType")
 
 
@@ -37,7 +39,7 @@ class ConstraintType(_ParameterType):
 
     @classmethod
     def from_openff(
-        cls, parameter: ConstraintHandler.ConstraintType
+        cls, parameter: "ConstraintHandler.ConstraintType"
     ) -> "ConstraintType":
         """Creates an instance of the model from the corresponding OpenFF model."""
 
@@ -49,9 +51,11 @@ class ConstraintType(_ParameterType):
             else parameter.distance.value_in_unit(unit.angstrom),
         )
 
-    def to_openff(self) -> ConstraintHandler.ConstraintType:
+    def to_openff(self) -> "ConstraintHandler.ConstraintType":
         """Create an corresponding OpenFF instance of this model."""
 
+        from openforcefield.typing.engines.smirnoff.parameters import ConstraintHandler
+
         return ConstraintHandler.ConstraintType(
             smirks=self.smirks,
             id=self.id,
@@ -68,7 +72,7 @@ class BondType(_ParameterType):
     k: float = Field(..., description="The spring constant [kcal / mol / Å**2].")
 
     @classmethod
-    def from_openff(cls, parameter: BondHandler.BondType) -> "BondType":
+    def from_openff(cls, parameter: "BondHandler.BondType") -> "BondType":
         """Creates an instance of the model from the corresponding OpenFF model."""
 
         return cls(
@@ -80,9 +84,11 @@ class BondType(_ParameterType):
             ),
         )
 
-    def to_openff(self) -> BondHandler.BondType:
+    def to_openff(self) -> "BondHandler.BondType":
         """Create an corresponding OpenFF instance of this model."""
 
+        from openforcefield.typing.engines.smirnoff.parameters import BondHandler
+
         return BondHandler.BondType(
             smirks=self.smirks,
             id=self.id,
@@ -100,7 +106,7 @@ class AngleType(_ParameterType):
     k: float = Field(..., description="The spring constant [kcal / mol / deg**2]")
 
     @classmethod
-    def from_openff(cls, parameter: AngleHandler.AngleType) -> "AngleType":
+    def from_openff(cls, parameter: "AngleHandler.AngleType") -> "AngleType":
         """Creates an instance of the model from the corresponding OpenFF model."""
 
         return cls(
@@ -110,9 +116,11 @@ class AngleType(_ParameterType):
             k=parameter.k.value_in_unit(unit.kilocalories_per_mole / unit.degrees ** 2),
         )
 
-    def to_openff(self) -> AngleHandler.AngleType:
+    def to_openff(self) -> "AngleHandler.AngleType":
         """Create an corresponding OpenFF instance of this model."""
 
+        from openforcefield.typing.engines.smirnoff.parameters import AngleHandler
+
         return AngleHandler.AngleType(
             smirks=self.smirks,
             id=self.id,
@@ -188,15 +196,19 @@ class ProperTorsionType(_TorsionType):
 
     @classmethod
     def _openff_parameter_class(cls):
+        from openforcefield.typing.engines.smirnoff.parameters import (
+            ProperTorsionHandler,
+        )
+
         return ProperTorsionHandler.ProperTorsionType
 
     @classmethod
     def from_openff(
-        cls, parameter: ProperTorsionHandler.ProperTorsionType
+        cls, parameter: "ProperTorsionHandler.ProperTorsionType"
     ) -> "ProperTorsionType":
         return super(ProperTorsionType, cls).from_openff(parameter)
 
-    def to_openff(self) -> ProperTorsionHandler.ProperTorsionType:
+    def to_openff(self) -> "ProperTorsionHandler.ProperTorsionType":
         return super(ProperTorsionType, self).to_openff()
 
 
@@ -207,15 +219,19 @@ class ImproperTorsionType(_TorsionType):
 
     @classmethod
     def _openff_parameter_class(cls):
+        from openforcefield.typing.engines.smirnoff.parameters import (
+            ImproperTorsionHandler,
+        )
+
         return ImproperTorsionHandler.ImproperTorsionType
 
     @classmethod
     def from_openff(
-        cls, parameter: ImproperTorsionHandler.ImproperTorsionType
+        cls, parameter: "ImproperTorsionHandler.ImproperTorsionType"
     ) -> "ImproperTorsionType":
         return super(ImproperTorsionType, cls).from_openff(parameter)
 
-    def to_openff(self) -> ImproperTorsionHandler.ImproperTorsionType:
+    def to_openff(self) -> "ImproperTorsionHandler.ImproperTorsionType":
         return super(ImproperTorsionType, self).to_openff()
 
 
@@ -228,7 +244,7 @@ class vdWType(_ParameterType):
     sigma: float = Field(..., description="The sigma parameter [Å].")
 
     @classmethod
-    def from_openff(cls, parameter: vdWHandler.vdWType) -> "vdWType":
+    def from_openff(cls, parameter: "vdWHandler.vdWType") -> "vdWType":
         """Creates an instance of the model from the corresponding OpenFF model."""
 
         return cls(
@@ -238,9 +254,11 @@ class vdWType(_ParameterType):
             sigma=parameter.sigma.value_in_unit(unit.angstrom),
         )
 
-    def to_openff(self) -> vdWHandler.vdWType:
+    def to_openff(self) -> "vdWHandler.vdWType":
         """Create an corresponding OpenFF instance of this model."""
 
+        from openforcefield.typing.engines.smirnoff.parameters import vdWHandler
+
         return vdWHandler.vdWType(
             smirks=self.smirks,
             id=self.id,
@@ -260,7 +278,7 @@ class LibraryChargeType(_ParameterType):
 
     @classmethod
     def from_openff(
-        cls, parameter: LibraryChargeHandler.LibraryChargeType
+        cls, parameter: "LibraryChargeHandler.LibraryChargeType"
     ) -> "LibraryChargeType":
         """Creates an instance of the model from the corresponding OpenFF model."""
 
@@ -270,9 +288,13 @@ class LibraryChargeType(_ParameterType):
             charge=[x.value_in_unit(unit.elementary_charge) for x in parameter.charge],
         )
 
-    def to_openff(self) -> LibraryChargeHandler.LibraryChargeType:
+    def to_openff(self) -> "LibraryChargeHandler.LibraryChargeType":
         """Create an corresponding OpenFF instance of this model."""
 
+        from openforcefield.typing.engines.smirnoff.parameters import (
+            LibraryChargeHandler,
+        )
+
         return LibraryChargeHandler.LibraryChargeType(
             smirks=self.smirks,
             id=self.id,
@@ -291,7 +313,7 @@ class ChargeIncrementType(_ParameterType):
 
     @classmethod
     def from_openff(
-        cls, parameter: ChargeIncrementModelHandler.ChargeIncrementType
+        cls, parameter: "ChargeIncrementModelHandler.ChargeIncrementType"
     ) -> "ChargeIncrementType":
         """Creates an instance of the model from the corresponding OpenFF model."""
 
@@ -304,9 +326,13 @@ class ChargeIncrementType(_ParameterType):
             ],
         )
 
-    def to_openff(self) -> ChargeIncrementModelHandler.ChargeIncrementType:
+    def to_openff(self) -> "ChargeIncrementModelHandler.ChargeIncrementType":
         """Create an corresponding OpenFF instance of this model."""
 
+        from openforcefield.typing.engines.smirnoff.parameters import (
+            ChargeIncrementModelHandler,
+        )
+
         return ChargeIncrementModelHandler.ChargeIncrementType(
             smirks=self.smirks,
             id=self.id,
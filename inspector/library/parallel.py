@@ -0,0 +1,67 @@
+"""A module containing utilities for distributing work across a pool of processes."""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Tuple, TypeVar
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+
+def map_ordered(
+    function: Callable[[S], T],
+    items: Iterable[S],
+    n_workers: int,
+    initializer: Optional[Callable[..., Any]] = None,
+    initargs: Tuple = (),
+    max_pending: Optional[int] = None,
+) -> Iterator[T]:
+    """Applies a function to each item of an iterable using a pool of worker
+    processes, yielding the results in the same order as the inputs.
+
+    Notes:
+        * Only ``max_pending`` items are submitted to the pool ahead of the result
+          currently being waited on, so that large (or lazily generated) iterables are
+          never fully loaded into memory.
+        * The function, items and results must all be picklable.
+
+    Args:
+        function: The function to apply. This must be defined at the module level.
+        items: The items to apply the function to.
+        n_workers: The number of worker processes to spawn.
+        initializer: An optional function which will be called once by each worker
+            when it starts, e.g. to load any expensive shared state.
+        initargs: The arguments to pass to ``initializer``.
+        max_pending: The maximum number of items which may be submitted to the pool
+            but whose results have not yet been yielded. By default this is four times
+            the number of workers.
+
+    Returns:
+        An iterator over the result of applying the function to each item.
+    """
+
+    max_pending = 4 * n_workers if max_pending is None else max_pending
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=initializer, initargs=initargs
+    ) as pool:
+
+        pending: Deque[Future] = deque()
+
+        try:
+
+            for item in items:
+
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+
+                pending.append(pool.submit(function, item))
+
+            while len(pending) > 0:
+                yield pending.popleft().result()
+
+        finally:
+
+            # Make sure not to wait on any remaining work if the caller stops
+            # iterating early.
+            for future in pending:
+                future.cancel()
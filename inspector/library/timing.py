@@ -0,0 +1,121 @@
+"""Lightweight utilities for recording how long each stage of a library function
+takes.
+
+Timings are only recorded within a ``collect_timings`` block, e.g. one opened for the
+duration of an API request. Outside of such a block each span reduces to a single
+context variable lookup.
+"""
+import contextlib
+import contextvars
+import functools
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# The timings being collected in the current context, or ``None`` if timings are not
+# being collected.
+_timings: contextvars.ContextVar[Optional["Timings"]] = contextvars.ContextVar(
+    "timings", default=None
+)
+
+
+class Timings:
+    """The durations of each span recorded within a ``collect_timings`` block."""
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+
+    def summarize(self) -> Dict[str, Tuple[float, int]]:
+        """Returns the total duration [ms] of, and number of, the spans with each
+        unique name, in the order in which each name was first completed."""
+
+        durations: Dict[str, List[float]] = defaultdict(list)
+
+        for name, duration in self.spans:
+            durations[name].append(duration)
+
+        return {name: (sum(values), len(values)) for name, values in durations.items()}
+
+
+@contextlib.contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """A context manager which records the duration of every span entered within it,
+    including those entered by functions run on other threads using a copy of the
+    current context.
+
+    Notes:
+        * If timings are already being collected, the enclosing collection is yielded
+          so that nested blocks share (rather than hide) each other's spans.
+    """
+
+    timings = _timings.get()
+
+    if timings is not None:
+
+        yield timings
+        return
+
+    timings = Timings()
+    token = _timings.set(timings)
+
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """A context manager which records how long its body takes to execute when
+    timings are being collected.
+
+    Args:
+        name: The name of the stage being timed.
+    """
+
+    timings = _timings.get()
+
+    if timings is None:
+
+        yield
+        return
+
+    start_time = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timings.spans.append((name, (time.perf_counter() - start_time) * 1000.0))
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """A decorator which records how long each call of a function takes when timings
+    are being collected.
+
+    Args:
+        name: The name of the stage being timed.
+    """
+
+    def decorator(function: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs) -> T:
+
+            timings = _timings.get()
+
+            if timings is None:
+                return function(*args, **kwargs)
+
+            start_time = time.perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings.spans.append(
+                    (name, (time.perf_counter() - start_time) * 1000.0)
+                )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,358 @@
+"""A module containing a vectorized, pure NumPy implementation of the SMIRNOFF valence
+potential energy functions which can be used to compute the energy contribution of
+each individual valence term without constructing an OpenMM system."""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+from openforcefield.typing.engines.smirnoff import ForceField
+
+from inspector.library.models.forcefield import AppliedParameters
+from inspector.library.models.smirnoff import ImproperTorsionType
+
+_KCAL_TO_KJ = 4.184
+
+# The number of atoms involved in each term of the supported valence handlers.
+_N_ATOMS_PER_TERM = {
+    "Bonds": 2,
+    "Angles": 3,
+    "ProperTorsions": 4,
+    "ImproperTorsions": 4,
+}
+
+
+class _ValenceTerms:
+    """The atom indices and parameters of each term of a particular valence handler
+    stored as flat arrays."""
+
+    def __init__(
+        self,
+        parameter_ids: List[str],
+        atom_indices: numpy.ndarray,
+        parameter_indices: numpy.ndarray,
+        parameters: Dict[str, numpy.ndarray],
+    ):
+        """
+
+        Args:
+            parameter_ids: The unique ids of the parameters applied by the handler.
+            atom_indices: The indices of the atoms involved in each term with
+                shape=(n_terms, n_atoms_per_term).
+            parameter_indices: The index into ``parameter_ids`` of the parameter
+                which each term was created from with shape=(n_terms,).
+            parameters: The values of each term of the potential energy function
+                with shape=(n_terms,).
+        """
+
+        self.parameter_ids = parameter_ids
+        self.atom_indices = atom_indices
+        self.parameters = parameters
+
+        # A matrix with shape=(n_terms, n_parameter_ids) which maps the energy of each
+        # term onto the parameter id it was created from.
+        self.assignment_matrix = numpy.zeros(
+            (len(parameter_indices), len(parameter_ids))
+        )
+        self.assignment_matrix[
+            numpy.arange(len(parameter_indices)), parameter_indices
+        ] = 1.0
+
+
+def _compute_distances(conformers: numpy.ndarray, indices: numpy.ndarray):
+    """Computes the distance between pairs of atoms with shape=(n_conformers,
+    n_pairs)."""
+
+    return numpy.linalg.norm(
+        conformers[:, indices[:, 1], :] - conformers[:, indices[:, 0], :], axis=-1
+    )
+
+
+def _compute_angles(conformers: numpy.ndarray, indices: numpy.ndarray):
+    """Computes the angle [deg] between triplets of atoms with shape=(n_conformers,
+    n_triplets)."""
+
+    vector_a = conformers[:, indices[:, 0], :] - conformers[:, indices[:, 1], :]
+    vector_b = conformers[:, indices[:, 2], :] - conformers[:, indices[:, 1], :]
+
+    cos_angles = (vector_a * vector_b).sum(axis=-1) / (
+        numpy.linalg.norm(vector_a, axis=-1) * numpy.linalg.norm(vector_b, axis=-1)
+    )
+
+    return numpy.degrees(numpy.arccos(numpy.clip(cos_angles, -1.0, 1.0)))
+
+
+def _compute_dihedrals(conformers: numpy.ndarray, indices: numpy.ndarray):
+    """Computes the dihedral angle [deg] between quartets of atoms with
+    shape=(n_conformers, n_quartets) using the IUPAC sign convention."""
+
+    vector_a = conformers[:, indices[:, 1], :] - conformers[:, indices[:, 0], :]
+    vector_b = conformers[:, indices[:, 2], :] - conformers[:, indices[:, 1], :]
+    vector_c = conformers[:, indices[:, 3], :] - conformers[:, indices[:, 2], :]
+
+    normal_ab = numpy.cross(vector_a, vector_b)
+    normal_bc = numpy.cross(vector_b, vector_c)
+
+    return numpy.degrees(
+        numpy.arctan2(
+            numpy.linalg.norm(vector_b, axis=-1) * (vector_a * normal_bc).sum(axis=-1),
+            (normal_ab * normal_bc).sum(axis=-1),
+        )
+    )
+
+
+class ValenceEnergyEngine:
+    """Computes the energy contribution of each valence term (bonds, angles, proper and
+    improper torsions) of a molecule directly from the parameters applied to it.
+
+    The index and parameter arrays are built once from the applied parameters so that
+    the energies of any number of conformers can then be evaluated using only a few
+    vectorized NumPy operations.
+    """
+
+    def __init__(
+        self,
+        applied_parameters: AppliedParameters,
+        force_field: Optional[ForceField] = None,
+    ):
+        """
+
+        Args:
+            applied_parameters: The parameters applied to the molecule, as returned
+                by ``label_molecule``.
+            force_field: The force field the parameters were taken from. This is used
+                to retrieve the default ``idivf`` of any torsions which do not
+                specify one.
+        """
+
+        self._terms: Dict[str, _ValenceTerms] = {}
+
+        for handler_type, parameters in applied_parameters.parameters.items():
+
+            if handler_type not in _N_ATOMS_PER_TERM:
+                continue
+
+            default_idivf = None
+
+            if (
+                handler_type in ["ProperTorsions", "ImproperTorsions"]
+                and force_field is not None
+                and handler_type in force_field.registered_parameter_handlers
+            ):
+                default_idivf = force_field.get_parameter_handler(
+                    handler_type
+                ).default_idivf
+
+            self._terms[handler_type] = self._build_terms(
+                handler_type,
+                parameters,
+                applied_parameters.parameter_map,
+                default_idivf,
+            )
+
+    @classmethod
+    def _build_terms(
+        cls,
+        handler_type: str,
+        parameters: List,
+        parameter_map: Dict[str, List[Tuple[int, ...]]],
+        default_idivf=None,
+    ) -> _ValenceTerms:
+        """Flattens the parameters applied by a single handler into arrays."""
+
+        parameter_ids = [parameter.id for parameter in parameters]
+
+        atom_indices = []
+        parameter_indices = []
+        values = defaultdict(list)
+
+        for parameter_index, parameter in enumerate(parameters):
+
+            for mapped_atom_indices in parameter_map[parameter.id]:
+
+                if handler_type == "Bonds":
+
+                    atom_indices.append(mapped_atom_indices)
+                    parameter_indices.append(parameter_index)
+
+                    values["k"].append(parameter.k)
+                    values["length"].append(parameter.length)
+
+                elif handler_type == "Angles":
+
+                    atom_indices.append(mapped_atom_indices)
+                    parameter_indices.append(parameter_index)
+
+                    values["k"].append(parameter.k)
+                    values["angle"].append(parameter.angle)
+
+                else:
+
+                    cls._append_torsion_terms(
+                        parameter,
+                        parameter_index,
+                        mapped_atom_indices,
+                        default_idivf,
+                        atom_indices,
+                        parameter_indices,
+                        values,
+                    )
+
+        return _ValenceTerms(
+            parameter_ids=parameter_ids,
+            atom_indices=numpy.array(atom_indices, dtype=int).reshape(
+                -1, _N_ATOMS_PER_TERM[handler_type]
+            ),
+            parameter_indices=numpy.array(parameter_indices, dtype=int),
+            parameters={key: numpy.array(value) for key, value in values.items()},
+        )
+
+    @classmethod
+    def _append_torsion_terms(
+        cls,
+        parameter,
+        parameter_index: int,
+        mapped_atom_indices: Tuple[int, ...],
+        default_idivf,
+        atom_indices: List[Tuple[int, ...]],
+        parameter_indices: List[int],
+        values: Dict[str, List[float]],
+    ):
+        """Appends one term per periodicity of a torsion parameter. Improper torsions
+        are applied around each of the three paths of the trefoil in the same way as
+        the OpenFF toolkit."""
+
+        if isinstance(parameter, ImproperTorsionType):
+
+            others = [
+                mapped_atom_indices[0],
+                mapped_atom_indices[2],
+                mapped_atom_indices[3],
+            ]
+
+            enumerated_atom_indices = [
+                (mapped_atom_indices[1], others[i], others[j], others[k])
+                for (i, j, k) in [(0, 1, 2), (1, 2, 0), (2, 0, 1)]
+            ]
+
+            auto_idivf = 3.0
+
+        else:
+
+            enumerated_atom_indices = [mapped_atom_indices]
+            auto_idivf = 1.0
+
+        if parameter.idivf is not None:
+            idivfs = parameter.idivf
+        elif default_idivf is None or default_idivf == "auto":
+            idivfs = [auto_idivf] * len(parameter.k)
+        else:
+            idivfs = [float(default_idivf)] * len(parameter.k)
+
+        for torsion_atom_indices in enumerated_atom_indices:
+
+            for periodicity, phase, k, idivf in zip(
+                parameter.periodicity, parameter.phase, parameter.k, idivfs
+            ):
+
+                atom_indices.append(torsion_atom_indices)
+                parameter_indices.append(parameter_index)
+
+                values["k"].append(k / idivf)
+                values["periodicity"].append(periodicity)
+                values["phase"].append(phase)
+
+    @classmethod
+    def _compute_term_energies(
+        cls, handler_type: str, terms: _ValenceTerms, conformers: numpy.ndarray
+    ) -> numpy.ndarray:
+        """Computes the energy [kcal / mol] of each term with shape=(n_conformers,
+        n_terms)."""
+
+        parameters = terms.parameters
+
+        if handler_type == "Bonds":
+
+            distances = _compute_distances(conformers, terms.atom_indices)
+            return 0.5 * parameters["k"] * (distances - parameters["length"]) ** 2
+
+        elif handler_type == "Angles":
+
+            angles = _compute_angles(conformers, terms.atom_indices)
+            return 0.5 * parameters["k"] * (angles - parameters["angle"]) ** 2
+
+        elif handler_type in ["ProperTorsions", "ImproperTorsions"]:
+
+            dihedrals = _compute_dihedrals(conformers, terms.atom_indices)
+
+            return parameters["k"] * (
+                1.0
+                + numpy.cos(
+                    numpy.radians(
+                        parameters["periodicity"] * dihedrals - parameters["phase"]
+                    )
+                )
+            )
+
+        raise NotImplementedError
+
+    def evaluate_term_energies(
+        self, conformers: numpy.ndarray
+    ) -> Dict[str, Tuple[numpy.ndarray, numpy.ndarray]]:
+        """Computes the energy of each individual valence term.
+
+        Args:
+            conformers: The conformers to evaluate the energies of with
+                shape=(n_atoms, 3) or shape=(n_conformers, n_atoms, 3) and units of
+                [Å].
+
+        Returns:
+            A dictionary of the form ``terms[HANDLER_TAG] = (ATOM_INDICES, ENERGIES)``
+            where the atom indices have shape=(n_terms, n_atoms_per_term) and the
+            energies [kJ / mol] shape=(n_conformers, n_terms). Torsions contribute one
+            term per periodicity, and improper torsions one term per trefoil path.
+        """
+
+        conformers = numpy.asarray(conformers, dtype=float).reshape(
+            -1, *numpy.shape(conformers)[-2:]
+        )
+
+        return {
+            handler_type: (
+                terms.atom_indices,
+                self._compute_term_energies(handler_type, terms, conformers)
+                * _KCAL_TO_KJ,
+            )
+            for handler_type, terms in self._terms.items()
+        }
+
+    def evaluate_parameter_energies(
+        self, conformers: numpy.ndarray
+    ) -> Dict[str, Dict[str, numpy.ndarray]]:
+        """Computes the total energy contribution of each valence parameter.
+
+        Args:
+            conformers: The conformers to evaluate the energies of with
+                shape=(n_atoms, 3) or shape=(n_conformers, n_atoms, 3) and units of
+                [Å].
+
+        Returns:
+            A dictionary of the form ``energies[HANDLER_TAG][PARAMETER_ID]`` where
+            each value is an array of the energy [kJ / mol] contributed by the
+            parameter to each conformer with shape=(n_conformers,).
+        """
+
+        term_energies = self.evaluate_term_energies(conformers)
+
+        parameter_energies = {}
+
+        for handler_type, terms in self._terms.items():
+
+            _, energies = term_energies[handler_type]
+            energies = energies @ terms.assignment_matrix
+
+            parameter_energies[handler_type] = {
+                parameter_id: energies[:, i]
+                for i, parameter_id in enumerate(terms.parameter_ids)
+            }
+
+        return parameter_energies
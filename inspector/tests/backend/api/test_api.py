@@ -1,24 +1,43 @@
 from io import StringIO
+from typing import List
 
 import numpy
 import pytest
 from fastapi.testclient import TestClient
 from openforcefield.topology import Molecule
 from openforcefield.typing.engines.smirnoff import ForceField
+from prometheus_client import CONTENT_TYPE_PLAIN_0_0_4
+from pydantic import parse_raw_as
 from simtk import unit
 
+from inspector.backend.app import app
 from inspector.backend.core.config import settings
+from inspector.backend.core.forcefield import UnknownForceFieldError
+from inspector.backend.core.profiling import RequestProfile, profile_buffer
+from inspector.backend.core.timing import ServerTimingMiddleware
+from inspector.backend.models.forcefield import (
+    RegisteredForceField,
+    RegisterForceFieldBody,
+)
 from inspector.backend.models.molecules import (
+    ApplyParametersBatchBody,
     ApplyParametersBody,
+    DecomposeEnergyBatchBody,
     DecomposeEnergyBody,
     MinimizeConformerBody,
+    MoleculeRecordResult,
     MoleculeToJSONBody,
     SummarizeGeometryBody,
 )
+from inspector.backend.models.profiling import ProfileInfo
 from inspector.library.forcefield import label_molecule
 from inspector.library.geometry import summarize_geometry
-from inspector.library.models.energy import DecomposedEnergy
-from inspector.library.models.forcefield import AppliedParameters
+from inspector.library.models.cache import CacheInfo
+from inspector.library.models.energy import DecomposedEnergy, DecomposedEnergyBatch
+from inspector.library.models.forcefield import (
+    AppliedParameters,
+    AppliedParametersResult,
+)
 from inspector.library.models.geometry import GeometrySummary
 from inspector.library.models.minimization import MinimizationTrajectory
 from inspector.library.models.molecule import RESTMolecule
@@ -48,6 +67,89 @@ def test_molecule_to_json(rest_client: TestClient, methane: Molecule):
     )
 
 
+def test_molecule_to_json_encoded(rest_client: TestClient, methane: Molecule):
+
+    with StringIO() as file_buffer:
+
+        methane.to_file(file_buffer, "SDF")
+        file_contents = file_buffer.getvalue()
+
+    body = MoleculeToJSONBody(file_contents=file_contents, geometry_encoding="float32")
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/json", data=body.json()
+    )
+    request.raise_for_status()
+
+    response_model = RESTMolecule.parse_raw(request.text)
+
+    assert response_model.geometry.dtype == "float32"
+    assert numpy.allclose(
+        methane.conformers[0].value_in_unit(unit.angstrom),
+        response_model.geometry_array,
+        atol=1e-4,
+    )
+
+
+@pytest.mark.parametrize(
+    "file_contents, expected_message",
+    [
+        ("invalid\n$$$$\n", "exactly one molecule (0 found)"),
+        (None, "exactly one molecule (2 found)"),
+    ],
+)
+def test_molecule_to_json_invalid(
+    rest_client: TestClient, methane: Molecule, file_contents, expected_message
+):
+
+    if file_contents is None:
+
+        with StringIO() as file_buffer:
+
+            methane.to_file(file_buffer, "SDF")
+            file_contents = file_buffer.getvalue() * 2
+
+    body = MoleculeToJSONBody(file_contents=file_contents)
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/json", data=body.json()
+    )
+
+    assert request.status_code == 400
+    assert expected_message in request.json()["detail"]
+
+
+def test_molecules_to_json_stream(rest_client: TestClient, methane: Molecule):
+
+    with StringIO() as file_buffer:
+
+        methane.to_file(file_buffer, "SDF")
+        file_contents = file_buffer.getvalue()
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/json/stream",
+        data=(file_contents * 2 + "invalid\n$$$$\n").encode(),
+        headers={"Content-Type": "chemical/x-mdl-sdfile"},
+    )
+    request.raise_for_status()
+
+    assert request.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [
+        MoleculeRecordResult.parse_raw(line) for line in request.text.splitlines()
+    ]
+
+    assert [result.index for result in results] == [0, 1, 2]
+
+    for result in results[:2]:
+
+        assert result.error is None
+        assert result.molecule.to_openff().to_smiles() == methane.to_smiles()
+
+    assert results[2].molecule is None
+    assert results[2].error is not None
+
+
 @pytest.mark.parametrize("as_object", [False, True])
 def test_apply_parameters(rest_client: TestClient, methane: Molecule, as_object: bool):
 
@@ -74,6 +176,67 @@ def test_apply_parameters(rest_client: TestClient, methane: Molecule, as_object:
     compare_pydantic_models(response_model, expected_model)
 
 
+@pytest.mark.parametrize("chunk_size, max_workers", [(16, 1), (1, 2)])
+def test_apply_parameters_batch(
+    rest_client: TestClient,
+    methane: Molecule,
+    z_propenal: Molecule,
+    chunk_size: int,
+    max_workers: int,
+    monkeypatch,
+):
+
+    monkeypatch.setattr(settings, "BATCH_CHUNK_SIZE", chunk_size)
+    monkeypatch.setattr(settings, "BATCH_MAX_WORKERS", max_workers)
+
+    force_field = ForceField("openff-1.0.0.offxml")
+
+    z_propenal._conformers = [z_propenal.conformers[0]]
+    molecules = [methane, z_propenal, methane]
+
+    body = ApplyParametersBatchBody(
+        molecules=[RESTMolecule.from_openff(molecule) for molecule in molecules],
+        openff_name="openff-1.0.0.offxml",
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters/batch", data=body.json()
+    )
+    request.raise_for_status()
+
+    assert request.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [
+        AppliedParametersResult.parse_raw(line) for line in request.text.splitlines()
+    ]
+    assert len(results) == 3
+
+    # The results should be returned in the same order as the input molecules.
+    for molecule, result in zip(molecules, results):
+
+        assert result.error is None
+        compare_pydantic_models(
+            result.applied_parameters, label_molecule(molecule, force_field)
+        )
+
+
+def test_apply_parameters_batch_too_large(
+    rest_client: TestClient, methane: Molecule, monkeypatch
+):
+
+    monkeypatch.setattr(settings, "BATCH_MAX_SIZE", 1)
+
+    body = ApplyParametersBatchBody.construct(
+        molecules=[RESTMolecule.from_openff(methane)] * 2,
+        openff_name="openff-1.0.0.offxml",
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters/batch", data=body.json()
+    )
+    assert request.status_code == 422
+
+
 def test_summarize_geometry(rest_client: TestClient, methane: Molecule):
 
     body = SummarizeGeometryBody(molecule=RESTMolecule.from_openff(methane))
@@ -89,6 +252,127 @@ def test_summarize_geometry(rest_client: TestClient, methane: Molecule):
     compare_pydantic_models(response_model, expected_model)
 
 
+def test_server_timing(methane: Molecule):
+
+    body = SummarizeGeometryBody(molecule=RESTMolecule.from_openff(methane))
+
+    # Server timings are opt-in and so the middleware is applied here explicitly.
+    with TestClient(ServerTimingMiddleware(app)) as timing_client:
+
+        request = timing_client.post(
+            f"{settings.API_DEV_STR}/molecule/geometry", data=body.json()
+        )
+        request.raise_for_status()
+
+    metric_names = [
+        metric.split(";")[0].strip()
+        for metric in request.headers["Server-Timing"].split(",")
+    ]
+
+    assert "to_openff" in metric_names
+    assert "summarize_geometry" in metric_names
+    assert metric_names[-1] == "total"
+
+
+def test_metrics_disabled(rest_client: TestClient):
+
+    request = rest_client.get("/metrics")
+    assert request.status_code == 404
+
+
+def test_metrics(rest_client: TestClient, methane: Molecule, monkeypatch):
+
+    monkeypatch.setattr(settings, "METRICS", True)
+
+    body = SummarizeGeometryBody(molecule=RESTMolecule.from_openff(methane))
+
+    rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/geometry", data=body.json()
+    ).raise_for_status()
+
+    with StringIO() as file_buffer:
+
+        methane.to_file(file_buffer, "SDF")
+        file_contents = file_buffer.getvalue()
+
+    rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/json/stream",
+        data=(file_contents + "invalid\n$$$$\n").encode(),
+        headers={"Content-Type": "chemical/x-mdl-sdfile"},
+    ).raise_for_status()
+
+    request = rest_client.get("/metrics")
+    request.raise_for_status()
+
+    assert request.headers["Content-Type"] == CONTENT_TYPE_PLAIN_0_0_4
+
+    metrics = request.text.splitlines()
+
+    for endpoint in ["/molecule/geometry", "/molecule/json/stream"]:
+
+        assert any(
+            line.startswith(f'inspector_molecule_atoms_count{{endpoint="{endpoint}"}}')
+            for line in metrics
+        )
+
+    assert any(line.startswith("inspector_executor_max_pending") for line in metrics)
+
+
+def test_metrics_token(rest_client: TestClient, monkeypatch):
+
+    monkeypatch.setattr(settings, "METRICS", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+
+    assert rest_client.get("/metrics").status_code == 401
+    assert (
+        rest_client.get(
+            "/metrics", headers={"Authorization": "Bearer invalid"}
+        ).status_code
+        == 401
+    )
+
+    request = rest_client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    request.raise_for_status()
+
+
+def test_get_profiles_disabled(rest_client: TestClient):
+
+    request = rest_client.get(f"{settings.API_DEV_STR}/profiles")
+    assert request.status_code == 404
+
+
+def test_get_profile(rest_client: TestClient, monkeypatch):
+
+    monkeypatch.setattr(settings, "PROFILING", True)
+
+    request_profile = RequestProfile("GET", "/")
+    profile_buffer.add(request_profile)
+
+    profile_id = request_profile.info.profile_id
+
+    request = rest_client.get(f"{settings.API_DEV_STR}/profiles")
+    request.raise_for_status()
+
+    assert profile_id in {
+        info.profile_id for info in parse_raw_as(List[ProfileInfo], request.text)
+    }
+
+    request = rest_client.get(f"{settings.API_DEV_STR}/profiles/{profile_id}")
+    request.raise_for_status()
+
+    assert request.headers["Content-Type"].startswith("text/plain")
+
+    request = rest_client.get(
+        f"{settings.API_DEV_STR}/profiles/{profile_id}", params={"format": "pstats"}
+    )
+    request.raise_for_status()
+
+    assert request.headers["Content-Type"] == "application/octet-stream"
+
+    request = rest_client.get(f"{settings.API_DEV_STR}/profiles/unknown")
+    assert request.status_code == 404
+
+
 @pytest.mark.parametrize("as_object", [False, True])
 def test_minimize_conformer(
     rest_client: TestClient, methane: Molecule, as_object: bool
@@ -141,3 +425,240 @@ def test_decompose_energy(rest_client: TestClient, methane: Molecule, as_object:
     request.raise_for_status()
 
     DecomposedEnergy.parse_raw(request.text)
+
+
+def test_decompose_energy_batch(rest_client: TestClient, methane: Molecule):
+
+    molecule = RESTMolecule.from_openff(methane)
+
+    geometry = numpy.array(molecule.geometry)
+    conformers = [geometry.tolist(), (geometry * 1.05).tolist()]
+
+    body = DecomposeEnergyBatchBody(
+        molecule=molecule,
+        openff_name="openff_unconstrained-1.0.0.offxml",
+        conformers=conformers,
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/energy/batch", data=body.json()
+    )
+    request.raise_for_status()
+
+    response_model = DecomposedEnergyBatch.parse_raw(request.text)
+
+    assert response_model.n_conformers == 2
+    assert all(
+        len(energies) == 2
+        for handler_energies in response_model.valence_energies.values()
+        for energies in handler_energies.values()
+    )
+
+
+def test_force_field_cache_info(rest_client: TestClient):
+
+    request = rest_client.get(f"{settings.API_DEV_STR}/forcefield/cache")
+    request.raise_for_status()
+
+    cache_info = CacheInfo.parse_raw(request.text)
+    assert cache_info.max_size == settings.FORCE_FIELD_CACHE_SIZE
+
+
+def test_register_force_field(rest_client: TestClient, methane: Molecule):
+
+    force_field = ForceField("openff-1.0.0.offxml")
+
+    body = RegisterForceFieldBody(smirnoff_xml=force_field.to_string())
+
+    request = rest_client.post(f"{settings.API_DEV_STR}/forcefield", data=body.json())
+    request.raise_for_status()
+
+    force_field_id = RegisteredForceField.parse_raw(request.text).force_field_id
+
+    body = ApplyParametersBody(
+        molecule=RESTMolecule.from_openff(methane), force_field_id=force_field_id
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters", data=body.json()
+    )
+    request.raise_for_status()
+
+    response_model = AppliedParameters.parse_raw(request.text)
+    expected_model = label_molecule(methane, force_field)
+
+    compare_pydantic_models(response_model, expected_model)
+
+
+def test_register_invalid_force_field(rest_client: TestClient):
+
+    body = RegisterForceFieldBody(smirnoff_xml="<SMIRNOFF")
+
+    request = rest_client.post(f"{settings.API_DEV_STR}/forcefield", data=body.json())
+    assert request.status_code == 400
+
+
+def test_unknown_force_field_id(rest_client: TestClient, methane: Molecule):
+
+    body = ApplyParametersBody(
+        molecule=RESTMolecule.from_openff(methane), force_field_id="unknown"
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters", data=body.json()
+    )
+    assert request.status_code == 404
+    assert "expire" in request.json()["detail"]
+
+
+def test_expired_force_field_id(
+    rest_client: TestClient, methane: Molecule, tmp_path, monkeypatch
+):
+
+    from inspector.backend.core.forcefield import force_field_registry
+
+    # Use a fresh registry directory so that the force field can be expired from
+    # disk as well as from memory, as happens when the server restarts.
+    monkeypatch.setattr(settings, "FORCE_FIELD_REGISTRY_DIR", str(tmp_path))
+
+    smirnoff_xml = ForceField("openff-1.0.0.offxml").to_string()
+
+    body = RegisterForceFieldBody(smirnoff_xml=smirnoff_xml)
+
+    request = rest_client.post(f"{settings.API_DEV_STR}/forcefield", data=body.json())
+    request.raise_for_status()
+
+    force_field_id = RegisteredForceField.parse_raw(request.text).force_field_id
+    registered_path = tmp_path / f"{force_field_id}.offxml"
+
+    assert registered_path.is_file()
+
+    force_field_registry.clear()
+    registered_path.unlink()
+
+    molecule = RESTMolecule.from_openff(methane)
+
+    body = ApplyParametersBody(molecule=molecule, force_field_id=force_field_id)
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters", data=body.json()
+    )
+    assert request.status_code == 404
+    assert request.json()["detail"] == str(UnknownForceFieldError(force_field_id))
+
+    # Including the contents of the force field should re-register it.
+    body = ApplyParametersBody(
+        molecule=molecule, force_field_id=force_field_id, smirnoff_xml=smirnoff_xml
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters", data=body.json()
+    )
+    request.raise_for_status()
+
+    assert force_field_id in force_field_registry
+    assert registered_path.is_file()
+
+    # As should explicitly registering it again, after which the id alone is enough.
+    force_field_registry.clear()
+    registered_path.unlink()
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/forcefield",
+        data=RegisterForceFieldBody(smirnoff_xml=smirnoff_xml).json(),
+    )
+    request.raise_for_status()
+
+    assert RegisteredForceField.parse_raw(request.text).force_field_id == (
+        force_field_id
+    )
+
+    body = ApplyParametersBody(molecule=molecule, force_field_id=force_field_id)
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters", data=body.json()
+    )
+    request.raise_for_status()
+
+
+def test_executor_saturated(rest_client: TestClient, methane: Molecule, monkeypatch):
+
+    from inspector.backend.core.executor import executor
+
+    monkeypatch.setattr(executor, "_n_pending", executor.max_pending)
+
+    body = SummarizeGeometryBody(molecule=RESTMolecule.from_openff(methane))
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/geometry", data=body.json()
+    )
+    assert request.status_code == 503
+
+
+def test_executor_saturated_stream(
+    rest_client: TestClient, methane: Molecule, monkeypatch
+):
+
+    from inspector.backend.core.executor import executor
+
+    with StringIO() as file_buffer:
+
+        methane.to_file(file_buffer, "SDF")
+        file_contents = file_buffer.getvalue()
+
+    monkeypatch.setattr(settings, "STREAM_MAX_WAIT", 0.05)
+
+    # Only saturate the executor once the response has started streaming.
+    def request_stream():
+
+        monkeypatch.setattr(executor, "_n_pending", executor.max_pending)
+        yield (file_contents * 2).encode()
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/json/stream",
+        data=request_stream(),
+        headers={"Content-Type": "chemical/x-mdl-sdfile"},
+    )
+    request.raise_for_status()
+
+    results = [
+        MoleculeRecordResult.parse_raw(line) for line in request.text.splitlines()
+    ]
+
+    assert [result.index for result in results] == [0, 1]
+
+    for result in results:
+
+        assert result.molecule is None
+        assert result.error.startswith("ExecutorSaturatedError: The server is busy")
+
+
+def test_executor_saturated_parameters_batch(
+    rest_client: TestClient, methane: Molecule, monkeypatch
+):
+
+    from inspector.backend.core.executor import executor
+
+    monkeypatch.setattr(settings, "STREAM_MAX_WAIT", 0.05)
+    monkeypatch.setattr(executor, "_n_pending", executor.max_pending)
+
+    body = ApplyParametersBatchBody(
+        molecules=[RESTMolecule.from_openff(methane)] * 2,
+        openff_name="openff-1.0.0.offxml",
+    )
+
+    request = rest_client.post(
+        f"{settings.API_DEV_STR}/molecule/parameters/batch", data=body.json()
+    )
+    request.raise_for_status()
+
+    results = [
+        AppliedParametersResult.parse_raw(line) for line in request.text.splitlines()
+    ]
+
+    assert len(results) == 2
+
+    for result in results:
+
+        assert result.applied_parameters is None
+        assert result.error.startswith("ExecutorSaturatedError: The server is busy")
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from inspector.backend.core.executor import BoundedExecutor, ExecutorSaturatedError
+from inspector.backend.core.forcefield import _registered_xml, _store_registered_xml
+
+
+def test_bounded_executor_run():
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=0)
+
+    result = asyncio.run(executor.run(lambda a, b=0: a + b, 1, b=2))
+
+    assert result == 3
+    assert executor.n_pending == 0
+
+    executor.shutdown()
+
+
+def test_bounded_executor_run_context():
+
+    variable = contextvars.ContextVar("variable", default=None)
+    variable.set("value")
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=0)
+
+    assert asyncio.run(executor.run(variable.get)) == "value"
+
+    executor.shutdown()
+
+
+def test_bounded_executor_saturated():
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=1)
+    release_event = threading.Event()
+
+    async def run_all():
+
+        blocked = [
+            asyncio.ensure_future(executor.run(release_event.wait))
+            for _ in range(executor.max_pending)
+        ]
+        await asyncio.sleep(0)
+
+        assert executor.n_pending == executor.max_pending
+
+        with pytest.raises(ExecutorSaturatedError, match="The server is busy"):
+            await executor.run(lambda: None)
+
+        release_event.set()
+        await asyncio.gather(*blocked)
+
+    asyncio.run(run_all())
+
+    assert executor.n_pending == 0
+    executor.shutdown()
+
+
+def test_bounded_executor_run_when_available():
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=0)
+    release_event = threading.Event()
+
+    async def run_all():
+
+        blocked = asyncio.ensure_future(executor.run(release_event.wait))
+        await asyncio.sleep(0)
+
+        waiting = asyncio.ensure_future(
+            executor.run_when_available(10.0, lambda a, b=0: a + b, 1, b=2)
+        )
+        await asyncio.sleep(0.05)
+
+        assert not waiting.done()
+
+        # The waiting caller should be woken once the blocking function finishes.
+        release_event.set()
+
+        assert await asyncio.wait_for(waiting, 5.0) == 3
+        await blocked
+
+    asyncio.run(run_all())
+
+    assert executor.n_pending == 0
+    executor.shutdown()
+
+
+def test_bounded_executor_run_when_available_timeout():
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=0)
+    release_event = threading.Event()
+
+    async def run_all():
+
+        blocked = asyncio.ensure_future(executor.run(release_event.wait))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run_when_available(0.05, lambda: None)
+
+        assert executor.n_pending == 1
+        assert executor._waiters == []
+
+        release_event.set()
+        await blocked
+
+    asyncio.run(run_all())
+
+    assert executor.n_pending == 0
+    executor.shutdown()
+
+
+def test_bounded_executor_cancelled():
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=0)
+
+    started_event = threading.Event()
+    release_event = threading.Event()
+
+    def blocking_function():
+
+        started_event.set()
+        release_event.wait()
+
+    async def run_cancelled():
+
+        task = asyncio.ensure_future(executor.run(blocking_function))
+        await asyncio.get_running_loop().run_in_executor(None, started_event.wait)
+
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The function is still running and so must still count towards the limit.
+        assert executor.n_pending == 1
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: None)
+
+        release_event.set()
+
+    asyncio.run(run_cancelled())
+    executor.shutdown(wait=True)
+
+    assert executor.n_pending == 0
+
+
+def test_bounded_executor_process_registry():
+
+    executor = BoundedExecutor("process", max_workers=1, max_queue_size=0)
+
+    # Start the worker before registering the force field to ensure that it is read
+    # from the shared registry rather than inherited from the parent.
+    asyncio.run(executor.run(abs, -1))
+
+    registered_id = _store_registered_xml("<SMIRNOFF/>")
+
+    assert asyncio.run(executor.run(_registered_xml, registered_id)) == "<SMIRNOFF/>"
+    executor.shutdown()
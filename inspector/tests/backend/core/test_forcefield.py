@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from inspector.backend.core.config import settings
+from inspector.backend.core.forcefield import (
+    ForceFieldSource,
+    UnknownForceFieldError,
+    configure_library_caches,
+    force_field_cache,
+    force_field_key,
+    force_field_registry,
+    force_field_source,
+    load_force_field,
+    register_force_field,
+    registry_directory,
+)
+
+
+def test_force_field_key():
+
+    assert force_field_key(None, "openff-1.0.0.offxml") == (
+        "openff_name",
+        "openff-1.0.0.offxml",
+    )
+    assert force_field_key("<xml/>", None) == force_field_key("<xml/>", None)
+    assert force_field_key("<xml/>", None) != force_field_key("<xml />", None)
+
+
+def test_load_force_field():
+
+    force_field_cache.clear()
+
+    force_field_a = load_force_field(openff_name="openff-1.0.0.offxml")
+    force_field_b = load_force_field(openff_name="openff-1.0.0.offxml")
+
+    assert force_field_a is force_field_b
+
+    force_field_c = load_force_field(smirnoff_xml=force_field_a.to_string())
+    assert force_field_c is not force_field_a
+
+    info = force_field_cache.info()
+
+    assert info.hits == 1
+    assert info.misses == 2
+
+
+def test_register_force_field():
+
+    smirnoff_xml = load_force_field(openff_name="openff-1.0.0.offxml").to_string()
+    registered_id = register_force_field(smirnoff_xml)
+
+    assert registered_id == force_field_key(smirnoff_xml, None)[1]
+
+    assert load_force_field(registered_id=registered_id) is load_force_field(
+        smirnoff_xml=smirnoff_xml
+    )
+
+
+def test_load_unknown_force_field():
+
+    with pytest.raises(UnknownForceFieldError, match="id=unknown"):
+        load_force_field(registered_id="unknown")
+
+
+def test_load_expired_force_field():
+
+    smirnoff_xml = load_force_field(openff_name="openff-1.0.0.offxml").to_string()
+    registered_id = register_force_field(smirnoff_xml)
+
+    # Simulate the id expiring, e.g. due to the server restarting.
+    force_field_registry.clear()
+    os.remove(os.path.join(registry_directory(), f"{registered_id}.offxml"))
+
+    with pytest.raises(UnknownForceFieldError, match="expire"):
+        load_force_field(registered_id=registered_id)
+
+    load_force_field(smirnoff_xml=smirnoff_xml, registered_id=registered_id)
+    assert registered_id in force_field_registry
+
+    assert load_force_field(registered_id=registered_id) is not None
+
+
+def test_load_registered_force_field_from_disk():
+
+    smirnoff_xml = load_force_field(openff_name="openff-1.0.0.offxml").to_string()
+    registered_id = register_force_field(smirnoff_xml)
+
+    # Registered force fields which are no longer held in memory, e.g. because they
+    # were registered by a different worker, should be read from the registry
+    # directory.
+    force_field_registry.clear()
+    force_field_cache.clear()
+
+    assert force_field_source(registered_id=registered_id) == ForceFieldSource(
+        ("smirnoff_xml", registered_id)
+    )
+    assert load_force_field(registered_id=registered_id).to_string() == smirnoff_xml
+
+
+def test_force_field_source_invalid_id():
+
+    with pytest.raises(UnknownForceFieldError):
+        force_field_source(registered_id="../openff-1.0.0")
+
+
+def test_configure_library_caches(monkeypatch):
+
+    from inspector.library.forcefield import label_cache, partial_charge_cache
+
+    monkeypatch.setattr(settings, "PARTIAL_CHARGE_CACHE_SIZE", 2)
+    monkeypatch.setattr(settings, "LABEL_CACHE_SIZE", 3)
+
+    try:
+
+        configure_library_caches()
+
+        assert partial_charge_cache.info().max_size == 2
+        assert label_cache.info().max_size == 3
+
+    finally:
+        monkeypatch.undo()
+        configure_library_caches()
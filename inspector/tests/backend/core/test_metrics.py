@@ -0,0 +1,69 @@
+import asyncio
+
+from inspector.backend.core.forcefield import force_field_cache
+from inspector.backend.core.metrics import (
+    MetricsMiddleware,
+    observe_molecule_sizes,
+    registry,
+    render_metrics,
+)
+from inspector.library.timing import span
+
+
+def _sample_value(name: str, **labels: str) -> float:
+
+    value = registry.get_sample_value(name, labels)
+    return 0.0 if value is None else value
+
+
+def test_observe_molecule_sizes():
+
+    samples = [
+        ("inspector_molecule_atoms_bucket", {"endpoint": "/test", "le": "8.0"}),
+        ("inspector_molecule_atoms_bucket", {"endpoint": "/test", "le": "16.0"}),
+        ("inspector_molecule_atoms_count", {"endpoint": "/test"}),
+    ]
+    initial_values = [_sample_value(name, **labels) for name, labels in samples]
+
+    observe_molecule_sizes("/test", 4, 12)
+
+    assert [
+        _sample_value(name, **labels) - initial_value
+        for (name, labels), initial_value in zip(samples, initial_values)
+    ] == [1.0, 2.0, 2.0]
+
+
+def test_cache_metrics():
+
+    force_field_cache.clear()
+    force_field_cache.get("missing")
+
+    metrics = render_metrics().decode().splitlines()
+
+    assert 'inspector_cache_hits{cache="force_field"} 0.0' in metrics
+    assert 'inspector_cache_misses{cache="force_field"} 1.0' in metrics
+
+
+def test_metrics_middleware():
+    async def app(scope, receive, send):
+
+        with span("test_stage"):
+            pass
+
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(_):
+        pass
+
+    labels = {"method": "GET", "path": "<unmatched>", "status": "201"}
+    n_requests = _sample_value("inspector_http_requests_total", **labels)
+
+    scope = {"type": "http", "method": "GET", "path": "/test", "headers": []}
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+
+    assert _sample_value("inspector_http_requests_total", **labels) == n_requests + 1
+    assert (
+        _sample_value("inspector_stage_duration_seconds_count", stage="test_stage") > 0
+    )
+    assert _sample_value("inspector_http_requests_in_flight") == 0.0
@@ -0,0 +1,120 @@
+import asyncio
+import marshal
+
+import pytest
+
+from inspector.backend.core.executor import BoundedExecutor
+from inspector.backend.core.profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    ProfileBuffer,
+    ProfilingMiddleware,
+    RequestProfile,
+    UnknownProfileError,
+    _request_profile,
+    profile_buffer,
+    profiled,
+)
+
+
+def _slow_function():
+    return sum(range(1000))
+
+
+def test_profiled_disabled():
+
+    assert profiled(_slow_function)() == sum(range(1000))
+    assert _request_profile.get() is None
+
+
+def test_profiled():
+
+    request_profile = RequestProfile("GET", "/")
+    token = _request_profile.set(request_profile)
+
+    try:
+        profiled(_slow_function)()
+    finally:
+        _request_profile.reset(token)
+
+    assert request_profile.info.n_calls == 1
+
+    assert "_slow_function" in request_profile.to_text()
+    assert any(
+        function_name == "_slow_function"
+        for _, _, function_name in marshal.loads(request_profile.to_pstats())
+    )
+
+
+def test_profiled_executor():
+
+    executor = BoundedExecutor("thread", max_workers=1, max_queue_size=0)
+
+    request_profile = RequestProfile("GET", "/")
+    token = _request_profile.set(request_profile)
+
+    try:
+        asyncio.run(executor.run(_slow_function))
+    finally:
+        _request_profile.reset(token)
+
+    assert request_profile.info.n_calls == 1
+    executor.shutdown()
+
+
+def test_profile_buffer():
+
+    buffer = ProfileBuffer(max_size=2)
+    profiles = [RequestProfile("GET", f"/{i}") for i in range(3)]
+
+    for profile in profiles:
+        buffer.add(profile)
+
+    assert [info.path for info in buffer.list_info()] == ["/2", "/1"]
+    assert buffer.get(profiles[2].info.profile_id) is profiles[2]
+
+    with pytest.raises(UnknownProfileError, match="No profile with id="):
+        buffer.get(profiles[0].info.profile_id)
+
+
+def test_profiling_middleware():
+    async def app(scope, receive, send):
+
+        profiled(_slow_function)()
+
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    profile_buffer.clear()
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/profiled",
+        "headers": [(PROFILE_HEADER.encode(), b"1")],
+    }
+    asyncio.run(ProfilingMiddleware(app)(scope, None, send))
+
+    profile_id = dict(messages[0]["headers"])[PROFILE_ID_HEADER.encode()].decode()
+    request_profile = profile_buffer.get(profile_id)
+
+    assert request_profile.info.path == "/profiled"
+    assert request_profile.info.status == 200
+    assert request_profile.info.n_calls == 1
+
+
+def test_profiling_middleware_no_header():
+    async def app(scope, receive, send):
+        assert _request_profile.get() is None
+
+    profile_buffer.clear()
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    asyncio.run(ProfilingMiddleware(app)(scope, None, None))
+
+    assert profile_buffer.list_info() == []
@@ -0,0 +1,40 @@
+import json
+
+import numpy
+
+from inspector.backend.core.responses import ORJSONResponse, dumps
+from inspector.library.models.minimization import MinimizationTrajectory
+
+
+def test_dumps_pydantic_model():
+
+    trajectory = MinimizationTrajectory.from_arrays(
+        numpy.arange(12.0).reshape((2, 2, 3)), numpy.array([1.0, 0.5])
+    )
+
+    assert json.loads(dumps(trajectory)) == json.loads(trajectory.json())
+
+
+def test_dumps_numpy():
+
+    content = {
+        "array": numpy.arange(4.0).reshape((2, 2)),
+        "strided": numpy.arange(4.0)[::2],
+        "scalar": numpy.float32(0.5),
+        1: "non-string key",
+    }
+
+    assert json.loads(dumps(content)) == {
+        "array": [[0.0, 1.0], [2.0, 3.0]],
+        "strided": [0.0, 2.0],
+        "scalar": 0.5,
+        "1": "non-string key",
+    }
+
+
+def test_orjson_response():
+
+    response = ORJSONResponse({"a": numpy.array([1, 2])})
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"a": [1, 2]}
@@ -0,0 +1,181 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from inspector.backend.core.forcefield import _registered_xml, _store_registered_xml
+from inspector.backend.core.metrics import (
+    MetricsMiddleware,
+    MetricsResponse,
+    render_metrics,
+)
+
+# A minimal app which reports which worker handled each request and exposes the
+# (shared) force field registry and metrics.
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/pid")
+def get_pid():
+    return os.getpid()
+
+
+@app.post("/registry/{smirnoff_xml}")
+def post_registry(smirnoff_xml: str):
+    return {"pid": os.getpid(), "id": _store_registered_xml(smirnoff_xml)}
+
+
+@app.get("/registry/{registered_id}")
+def get_registry(registered_id: str):
+
+    smirnoff_xml = _registered_xml(registered_id)
+
+    if smirnoff_xml is None:
+        raise HTTPException(status_code=404)
+
+    return {"pid": os.getpid(), "smirnoff_xml": smirnoff_xml}
+
+
+@app.get("/metrics", response_class=MetricsResponse)
+def get_metrics():
+    return MetricsResponse(render_metrics())
+
+
+SERVE_SCRIPT = """
+import sys
+
+from inspector.backend.core.server import serve_forked
+
+serve_forked(
+    "inspector.tests.backend.core.test_server:app",
+    host="127.0.0.1",
+    port=int(sys.argv[1]),
+    log_level="warning",
+    n_workers=2,
+)
+"""
+
+
+def _free_port() -> int:
+
+    with socket.socket() as free_socket:
+
+        free_socket.bind(("127.0.0.1", 0))
+        return free_socket.getsockname()[1]
+
+
+def _request(url: str, method: str = "GET") -> bytes:
+
+    # Use a new connection per request so that requests are spread across the
+    # workers which share the listening socket.
+    with urllib.request.urlopen(urllib.request.Request(url, method=method)) as response:
+        return response.read()
+
+
+def _request_json(url: str, method: str = "GET"):
+    return json.loads(_request(url, method))
+
+
+def _n_registry_requests(url: str) -> float:
+
+    metrics = _request(f"{url}/metrics").decode().splitlines()
+
+    return sum(
+        float(line.split(" ")[-1])
+        for line in metrics
+        if line.startswith(
+            'inspector_http_requests_total{method="GET",'
+            'path="/registry/{registered_id}",status="200"}'
+        )
+    )
+
+
+def _metrics_directories():
+
+    return {
+        name
+        for name in os.listdir(tempfile.gettempdir())
+        if name.startswith("inspector-metrics-")
+    }
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_serve_forked():
+
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+
+    environment = {**os.environ}
+    environment.pop("FORCE_FIELD_REGISTRY_DIR", None)
+    environment.pop("PROFILING", None)
+    environment.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    environment["METRICS"] = "true"
+
+    initial_metrics_directories = _metrics_directories()
+
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVE_SCRIPT, str(port)], env=environment
+    )
+
+    try:
+
+        start_time = time.monotonic()
+
+        while True:
+
+            assert process.poll() is None, "the server exited unexpectedly."
+
+            try:
+                _request_json(f"{url}/pid")
+                break
+            except (urllib.error.URLError, ConnectionError):
+
+                assert time.monotonic() - start_time < 30.0
+                time.sleep(0.1)
+
+        registered = _request_json(f"{url}/registry/force-field", method="POST")
+
+        # A force field registered with one worker should be available from both.
+        worker_ids = set()
+        n_requests = 0
+
+        for _ in range(200):
+
+            n_requests += 1
+
+            response = _request_json(f"{url}/registry/{registered['id']}")
+            assert response["smirnoff_xml"] == "force-field"
+
+            worker_ids.add(response["pid"])
+
+            if len(worker_ids) == 2:
+                break
+
+        assert len(worker_ids) == 2
+        assert process.pid not in worker_ids
+
+        # The requests handled by every worker should be included in the metrics
+        # regardless of which worker collects them. The metrics are recorded once
+        # each response has been sent and so may briefly lag behind.
+        start_time = time.monotonic()
+
+        while _n_registry_requests(url) != n_requests:
+
+            assert time.monotonic() - start_time < 10.0
+            time.sleep(0.1)
+
+    finally:
+        process.send_signal(signal.SIGTERM)
+
+    assert process.wait(timeout=30.0) == 0
+    assert _metrics_directories() == initial_metrics_directories
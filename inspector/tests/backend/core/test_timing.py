@@ -0,0 +1,37 @@
+import asyncio
+
+from inspector.backend.core.timing import ServerTimingMiddleware, format_server_timing
+from inspector.library.timing import span
+
+
+def test_format_server_timing():
+
+    assert (
+        format_server_timing({"a": (1.0, 1), "b": (2.5, 3)}, 4.0)
+        == 'a;dur=1.00;desc="1x", b;dur=2.50;desc="3x", total;dur=4.00'
+    )
+
+
+def test_server_timing_middleware():
+    async def app(scope, receive, send):
+
+        with span("stage"):
+            pass
+
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    asyncio.run(ServerTimingMiddleware(app)(scope, None, send))
+
+    headers = dict(messages[0]["headers"])
+    metrics = headers[b"server-timing"].decode().split(", ")
+
+    assert len(metrics) == 2
+    assert metrics[0].startswith("stage;dur=")
+    assert metrics[1].startswith("total;dur=")
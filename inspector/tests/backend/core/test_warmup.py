@@ -0,0 +1,14 @@
+import sys
+
+from inspector.backend.core.forcefield import force_field_cache, force_field_key
+from inspector.backend.core.warmup import DEFERRED_MODULES, warm_up
+
+
+def test_warm_up():
+
+    force_field_cache.clear()
+
+    warm_up(["openff-1.0.0.offxml"])
+
+    assert all(module_name in sys.modules for module_name in DEFERRED_MODULES)
+    assert force_field_key(None, "openff-1.0.0.offxml") in force_field_cache
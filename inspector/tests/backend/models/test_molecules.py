@@ -1,7 +1,13 @@
 import pytest
 from pydantic import ValidationError
 
-from inspector.backend.models.molecules import ApplyParametersBody
+from inspector.backend.core.config import settings
+from inspector.backend.core.forcefield import force_field_id
+from inspector.backend.models.molecules import (
+    ApplyParametersBatchBody,
+    ApplyParametersBody,
+    DecomposeEnergyBatchBody,
+)
 from inspector.library.models.molecule import RESTMolecule
 
 
@@ -12,13 +18,66 @@ def test_apply_parameters_body_validate(methane):
     # Mutually exclusive init
     ApplyParametersBody(molecule=molecule, smirnoff_xml="", openff_name=None)
     ApplyParametersBody(molecule=molecule, smirnoff_xml=None, openff_name="")
+    ApplyParametersBody(molecule=molecule, force_field_id="")
 
     with pytest.raises(ValidationError) as error_info:
         ApplyParametersBody(molecule=molecule, smirnoff_xml="", openff_name="")
 
     assert "exactly one of" in str(error_info.value)
 
+    with pytest.raises(ValidationError) as error_info:
+        ApplyParametersBody(molecule=molecule, openff_name="", force_field_id="")
+
+    assert "exactly one of" in str(error_info.value)
+
     with pytest.raises(ValidationError) as error_info:
         ApplyParametersBody(molecule=molecule, smirnoff_xml=None, openff_name=None)
 
     assert "exactly one of" in str(error_info.value)
+
+
+def test_force_field_id_with_smirnoff_xml(methane):
+
+    molecule = RESTMolecule.from_openff(methane)
+
+    ApplyParametersBody(
+        molecule=molecule,
+        smirnoff_xml="<xml/>",
+        force_field_id=force_field_id("<xml/>"),
+    )
+
+    with pytest.raises(ValidationError) as error_info:
+        ApplyParametersBody(molecule=molecule, smirnoff_xml="<xml/>", force_field_id="")
+
+    assert "does not match" in str(error_info.value)
+
+
+def test_decompose_energy_batch_body_validate(methane):
+
+    molecule = RESTMolecule.from_openff(methane)
+
+    DecomposeEnergyBatchBody(
+        molecule=molecule, openff_name="", conformers=[molecule.geometry]
+    )
+
+    with pytest.raises(ValidationError) as error_info:
+
+        DecomposeEnergyBatchBody(
+            molecule=molecule, openff_name="", conformers=[molecule.geometry[:-3]]
+        )
+
+    assert "incorrect conformer length" in str(error_info.value)
+
+
+def test_apply_parameters_batch_body_validate(methane, monkeypatch):
+
+    monkeypatch.setattr(settings, "BATCH_MAX_SIZE", 2)
+
+    molecule = RESTMolecule.from_openff(methane)
+
+    ApplyParametersBatchBody(molecules=[molecule] * 2, openff_name="")
+
+    with pytest.raises(ValidationError) as error_info:
+        ApplyParametersBatchBody(molecules=[molecule] * 3, openff_name="")
+
+    assert "at most 2 molecules" in str(error_info.value)
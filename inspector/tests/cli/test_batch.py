@@ -0,0 +1,108 @@
+import csv
+import os
+
+import pytest
+from openforcefield.topology import Molecule
+from rdkit import Chem
+
+from inspector.cli.batch import decompose_cli, geometry_cli, label_cli
+
+
+@pytest.fixture()
+def sdf_path(methane: Molecule, z_propenal: Molecule) -> str:
+
+    z_propenal._conformers = [z_propenal.conformers[0]]
+
+    writer = Chem.SDWriter("molecules.sdf")
+
+    for molecule in [methane, z_propenal]:
+        writer.write(molecule.to_rdkit())
+
+    writer.close()
+
+    # Add an invalid record.
+    with open("molecules.sdf", "a") as file:
+        file.write("invalid\n$$$$\n")
+
+    return "molecules.sdf"
+
+
+def _read_csv(file_path: str):
+
+    with open(file_path) as file:
+        return [*csv.DictReader(file)]
+
+
+@pytest.mark.parametrize(
+    "command, extra_args",
+    [
+        (label_cli, ["--force-field", "openff-1.0.0.offxml"]),
+        (geometry_cli, []),
+        (decompose_cli, ["--force-field", "openff_unconstrained-1.0.0.offxml"]),
+    ],
+)
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_batch_cli(runner, sdf_path, command, extra_args, n_workers):
+
+    result = runner.invoke(
+        command,
+        [
+            "--input",
+            sdf_path,
+            "--output",
+            "output.csv",
+            "--n-workers",
+            str(n_workers),
+            "--no-resume",
+            *extra_args,
+        ],
+    )
+
+    if result.exit_code != 0:
+        raise result.exception
+
+    assert "Processed 3 molecules (1 failed)" in result.output
+
+    rows = _read_csv("output.csv")
+
+    assert [*dict.fromkeys(row["record"] for row in rows)] == [
+        "molecules.sdf:0",
+        "molecules.sdf:1",
+        "molecules.sdf:2",
+    ]
+    assert all(row["error"] == "" for row in rows[:-1])
+    assert rows[-1]["error"] != ""
+
+
+def test_batch_cli_resume(runner, sdf_path):
+
+    arguments = ["--input", sdf_path, "--output", "output.csv"]
+
+    result = runner.invoke(geometry_cli, [*arguments, "--no-resume"])
+
+    if result.exit_code != 0:
+        raise result.exception
+
+    expected_rows = _read_csv("output.csv")
+
+    # Simulate a run which was interrupted after the first molecule was processed
+    # and while the rows of the second were being written.
+    with open("output.csv.checkpoint") as file:
+        first_checkpoint = file.readline()
+
+    with open("output.csv.checkpoint", "w") as file:
+        file.write(first_checkpoint)
+
+    with open("output.csv", "a") as file:
+        file.write("molecules.sdf:1,partial")
+
+    result = runner.invoke(geometry_cli, arguments)
+
+    if result.exit_code != 0:
+        raise result.exception
+
+    assert "Resuming after 1 completed molecules" in result.output
+    assert "Processed 2 molecules" in result.output
+
+    assert _read_csv("output.csv") == expected_rows
+    assert os.path.isfile("output.csv.checkpoint")
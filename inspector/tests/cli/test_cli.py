@@ -11,6 +11,9 @@ def test_root_cli(runner):
 
     assert "launch" in result.output
 
+    for command_name in ["label", "geometry", "decompose"]:
+        assert command_name in result.output
+
 
 def test_launch_cli(monkeypatch, runner):
 
@@ -29,3 +32,40 @@ def test_launch_cli(monkeypatch, runner):
         raise result.exception
 
     assert f"{expected_message}\n" == result.output
+
+
+def test_launch_cli_workers(monkeypatch, runner):
+
+    from inspector.backend.core import server, warmup
+
+    calls = {}
+
+    monkeypatch.setattr(
+        warmup, "warm_up", lambda names: calls.update(force_field_names=[*names])
+    )
+    monkeypatch.setattr(
+        server, "serve_forked", lambda *args, **kwargs: calls.update(kwargs)
+    )
+
+    result = runner.invoke(
+        launch_cli,
+        ["--workers", "2", "--warmup", "--preload-force-field", "openff-1.0.0.offxml"],
+    )
+
+    if result.exit_code != 0:
+        raise result.exception
+
+    assert calls["n_workers"] == 2
+    assert calls["force_field_names"] == ["openff-1.0.0.offxml"]
+
+
+def test_launch_cli_workers_profiling(monkeypatch, runner):
+
+    from inspector.backend.core.config import settings
+
+    monkeypatch.setattr(settings, "PROFILING", True)
+
+    result = runner.invoke(launch_cli, ["--workers", "2"])
+
+    assert result.exit_code != 0
+    assert "Profiling is not supported with multiple workers" in result.output
@@ -0,0 +1,60 @@
+import numpy
+import pytest
+from pydantic import ValidationError
+
+from inspector.library.models.array import EncodedArray
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_encoded_array_round_trip(dtype):
+
+    array = numpy.arange(12.0).reshape((4, 3)) * 0.5
+
+    encoded_array = EncodedArray.from_numpy(array, dtype)
+    assert encoded_array.size == 12
+
+    decoded_array = EncodedArray.parse_raw(encoded_array.json()).to_numpy()
+
+    assert decoded_array.dtype == numpy.dtype(dtype)
+    assert decoded_array.shape == (12,)
+    assert numpy.allclose(decoded_array, array.flatten())
+
+
+@pytest.mark.parametrize(
+    "data, expected_message",
+    [
+        ("not-base64!", "not a valid base64 encoded string"),
+        ("AAA=", "not divisible by the size of the data type"),
+    ],
+)
+def test_encoded_array_validation(data, expected_message):
+
+    with pytest.raises(ValidationError) as error_info:
+        EncodedArray(dtype="float64", data=data)
+
+    assert expected_message in str(error_info.value)
+
+
+def test_encoded_array_validation_no_decode(monkeypatch):
+
+    import base64
+
+    def b64decode(*_, **__):
+        raise NotImplementedError()
+
+    monkeypatch.setattr(base64, "b64decode", b64decode)
+
+    # The data should be validated without being decoded.
+    EncodedArray(dtype="float64", data="AAAAAAAA8D8=")
+
+
+def test_encoded_array_decoded_once():
+
+    encoded_array = EncodedArray.from_numpy(numpy.arange(3.0), "float64")
+
+    decoded_array = encoded_array.to_numpy()
+    assert encoded_array.to_numpy() is decoded_array
+
+    # Replacing the data should invalidate the decoded array.
+    encoded_array.data = EncodedArray.from_numpy(numpy.arange(2.0), "float64").data
+    assert numpy.allclose(encoded_array.to_numpy(), numpy.arange(2.0))
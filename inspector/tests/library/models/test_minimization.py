@@ -1,7 +1,13 @@
+import numpy
 import pytest
 from pydantic import ValidationError
 
-from inspector.library.models.minimization import MinimizationFrame
+from inspector.library.models.array import EncodedArray
+from inspector.library.models.minimization import (
+    MinimizationFrame,
+    MinimizationFrames,
+    MinimizationTrajectory,
+)
 
 
 def test_geometry_validation():
@@ -12,3 +18,93 @@ def test_geometry_validation():
         MinimizationFrame(geometry=[0.0], potential_energy=0.0)
 
     assert "geometry length not divisible by three" in str(error_info.value)
+
+
+def test_trajectory_from_arrays():
+
+    geometries = numpy.arange(12.0).reshape((2, 2, 3))
+    energies = numpy.array([1.0, 0.5])
+
+    trajectory = MinimizationTrajectory.from_arrays(geometries, energies)
+
+    assert len(trajectory.frames) == 2
+
+    assert trajectory.frames[1].geometry == [*geometries[1].flatten()]
+    assert trajectory.frames[1].potential_energy == 0.5
+
+
+def test_trajectory_from_arrays_encoded():
+
+    geometries = numpy.arange(12.0).reshape((2, 2, 3))
+    energies = numpy.array([1.0, 0.5])
+
+    trajectory = MinimizationTrajectory.from_arrays(geometries, energies, "float32")
+
+    assert isinstance(trajectory.frames[1].geometry, EncodedArray)
+    assert numpy.allclose(
+        trajectory.frames[1].geometry.to_numpy(), geometries[1].flatten()
+    )
+
+    round_tripped = MinimizationTrajectory.parse_raw(trajectory.json())
+    assert round_tripped.frames[1].geometry == trajectory.frames[1].geometry
+
+
+def test_trajectory_from_arrays_stores_arrays():
+
+    geometries = numpy.arange(12.0).reshape((2, 2, 3))
+    energies = numpy.array([1.0, 0.5])
+
+    trajectory = MinimizationTrajectory.from_arrays(geometries, energies)
+
+    assert isinstance(trajectory.frames, MinimizationFrames)
+
+    assert trajectory.frames.geometries.shape == (2, 2, 3)
+    assert numpy.allclose(trajectory.frames.geometries, geometries)
+    assert numpy.allclose(trajectory.frames.energies, energies)
+
+    assert trajectory.frames[-1] == trajectory.frames[1]
+    assert trajectory.frames[:1] == [trajectory.frames[0]]
+
+    round_tripped = MinimizationTrajectory.parse_raw(trajectory.json())
+
+    assert isinstance(round_tripped.frames, MinimizationFrames)
+    assert round_tripped.frames == trajectory.frames
+
+    assert isinstance(trajectory.dict()["frames"], MinimizationFrames)
+
+
+def test_trajectory_frames_validation():
+
+    trajectory = MinimizationTrajectory(
+        frames=[
+            MinimizationFrame(geometry=[0.0] * 6, potential_energy=1.0),
+            {"geometry": [1.0] * 6, "potential_energy": 0.5},
+        ]
+    )
+
+    assert isinstance(trajectory.frames, MinimizationFrames)
+    assert trajectory.frames.geometries.shape == (2, 2, 3)
+    assert trajectory.frames[1].potential_energy == 0.5
+
+    with pytest.raises(ValidationError, match="the number of atoms in each frame"):
+
+        MinimizationTrajectory(
+            frames=[
+                MinimizationFrame(geometry=[0.0] * 3, potential_energy=1.0),
+                MinimizationFrame(geometry=[0.0] * 6, potential_energy=1.0),
+            ]
+        )
+
+
+def test_trajectory_schema():
+
+    frames_schema = MinimizationTrajectory.schema()["properties"]["frames"]
+
+    assert frames_schema["type"] == "array"
+    assert frames_schema["items"]["title"] == "MinimizationFrame"
+
+
+def test_trajectory_from_arrays_mismatched():
+
+    with pytest.raises(AssertionError, match="the number of frames do not match"):
+        MinimizationTrajectory.from_arrays(numpy.zeros((2, 1, 3)), numpy.zeros(1))
@@ -1,9 +1,16 @@
 import numpy
 import pytest
+from openforcefield.topology import Molecule
 from pydantic import ValidationError
 from simtk import unit
 
-from inspector.library.models.molecule import InvalidMoleculeError, RESTMolecule
+from inspector.library.models.array import EncodedArray
+from inspector.library.models.molecule import (
+    InvalidMoleculeError,
+    RESTMolecule,
+    molecule_cache,
+    topology_cache,
+)
 from inspector.tests import does_not_raise
 
 
@@ -23,6 +30,17 @@ from inspector.tests import does_not_raise
             pytest.raises(ValidationError),
             "incorrect geometry length",
         ),
+        (
+            {"geometry": EncodedArray.from_numpy(numpy.zeros(12), "float32")},
+            pytest.raises(ValidationError),
+            "incorrect geometry length",
+        ),
+        # Incorrect number of partial charges.
+        (
+            {"partial_charges": [0.0] * 4},
+            pytest.raises(ValidationError),
+            "incorrect number of partial charges",
+        ),
         # Incorrect bond atom index.
         (
             {"connectivity": [(0, -1, 1)]},
@@ -77,3 +95,119 @@ def test_rest_off_molecule_round_trip(methane):
         methane.conformers[0].value_in_unit(unit.angstrom),
         off_molecule.conformers[0].value_in_unit(unit.angstrom),
     )
+
+
+@pytest.mark.parametrize("geometry_encoding", ["float32", "float64"])
+def test_rest_off_molecule_round_trip_encoded(methane, geometry_encoding):
+
+    rest_methane = RESTMolecule.from_openff(methane, geometry_encoding)
+
+    assert isinstance(rest_methane.geometry, EncodedArray)
+    assert rest_methane.geometry.dtype == geometry_encoding
+
+    rest_methane = RESTMolecule.parse_raw(rest_methane.json())
+    assert rest_methane.geometry_array.shape == (5, 3)
+
+    off_molecule = rest_methane.to_openff()
+    assert methane.to_smiles() == off_molecule.to_smiles()
+
+    assert numpy.allclose(
+        methane.conformers[0].value_in_unit(unit.angstrom),
+        off_molecule.conformers[0].value_in_unit(unit.angstrom),
+        atol=1.0e-6,
+    )
+
+
+@pytest.mark.parametrize("geometry_encoding", [None, "float64"])
+def test_rest_molecule_geometry_array_cached(methane, geometry_encoding):
+
+    rest_methane = RESTMolecule.from_openff(methane, geometry_encoding)
+
+    geometry_array = rest_methane.geometry_array
+
+    assert rest_methane.geometry_array is geometry_array
+    assert not geometry_array.flags.writeable
+
+    # Replacing the geometry should invalidate the cached array.
+    rest_methane.geometry = [0.0] * 15
+    assert numpy.allclose(rest_methane.geometry_array, 0.0)
+
+
+def test_rest_off_molecule_round_trip_charges(methane):
+
+    methane.partial_charges = (
+        numpy.array([-0.4, 0.1, 0.1, 0.1, 0.1]) * unit.elementary_charge
+    )
+
+    rest_methane = RESTMolecule.from_openff(methane)
+    assert numpy.allclose(rest_methane.partial_charges, [-0.4, 0.1, 0.1, 0.1, 0.1])
+
+    off_molecule = rest_methane.to_openff()
+
+    assert numpy.allclose(
+        methane.partial_charges.value_in_unit(unit.elementary_charge),
+        off_molecule.partial_charges.value_in_unit(unit.elementary_charge),
+    )
+
+
+def test_to_openff_cached(methane):
+
+    molecule_cache.clear()
+    topology_cache.clear()
+
+    rest_methane = RESTMolecule.from_openff(methane)
+
+    off_molecule_a = rest_methane.to_openff()
+    off_molecule_b = rest_methane.to_openff()
+
+    assert molecule_cache.info().hits == 1
+    assert molecule_cache.info().misses == 1
+
+    # The cached molecule should be copied so it can be safely modified.
+    assert off_molecule_a is not off_molecule_b
+    assert off_molecule_a == off_molecule_b
+
+
+def test_to_openff_swap_geometry(methane):
+
+    molecule_cache.clear()
+    topology_cache.clear()
+
+    rest_methane = RESTMolecule.from_openff(methane)
+    rest_methane.to_openff()
+
+    perturbed_methane = rest_methane.copy(
+        update={"geometry": [value * 1.1 for value in rest_methane.geometry]}
+    )
+    off_molecule = perturbed_methane.to_openff()
+
+    assert topology_cache.info().hits == 1
+    assert off_molecule.to_smiles() == methane.to_smiles()
+
+    assert numpy.allclose(
+        off_molecule.conformers[0].value_in_unit(unit.angstrom).flatten(),
+        perturbed_methane.geometry,
+    )
+
+
+def test_to_openff_swap_geometry_stereo():
+
+    molecule_cache.clear()
+    topology_cache.clear()
+
+    molecule: Molecule = Molecule.from_smiles("C[C@H](F)Cl")
+    molecule.generate_conformers(n_conformers=1)
+
+    rest_molecule = RESTMolecule.from_openff(molecule)
+    assert rest_molecule.to_openff().is_isomorphic_with(molecule)
+
+    # Reflecting the geometry inverts the stereocenter, and so the cached topology
+    # cannot be re-used.
+    geometry = numpy.array(rest_molecule.geometry).reshape(-1, 3) * [-1.0, 1.0, 1.0]
+
+    mirrored_molecule = rest_molecule.copy(
+        update={"geometry": [*geometry.flatten()]}
+    ).to_openff()
+
+    assert not mirrored_molecule.is_isomorphic_with(molecule)
+    assert mirrored_molecule.is_isomorphic_with(Molecule.from_smiles("C[C@@H](F)Cl"))
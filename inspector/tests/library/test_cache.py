@@ -0,0 +1,97 @@
+import pytest
+
+from inspector.library.cache import LRUCache
+
+
+def test_lru_cache_eviction():
+
+    cache = LRUCache(max_size=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1  # "b" is now the least recently used entry.
+
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+    assert len(cache) == 2
+
+
+def test_lru_cache_disabled():
+
+    cache = LRUCache(max_size=0)
+    cache.set("a", 1)
+
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_lru_cache_resize():
+
+    cache = LRUCache(max_size=3)
+
+    for key in "abc":
+        cache.set(key, key)
+
+    cache.resize(1)
+
+    assert len(cache) == 1
+    assert "c" in cache
+    assert cache.info().max_size == 1
+
+    cache.resize(0)
+    cache.set("d", "d")
+
+    assert len(cache) == 0
+
+
+def test_lru_cache_time_to_live(monkeypatch):
+
+    import time
+
+    current_time = 0.0
+    monkeypatch.setattr(time, "monotonic", lambda: current_time)
+
+    cache = LRUCache(max_size=2, time_to_live=1.0)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+
+    current_time = 2.0
+    assert cache.get("a") is None
+
+
+@pytest.mark.parametrize("n_calls, expected_hits", [(1, 0), (3, 2)])
+def test_lru_cache_get_or_create(n_calls, expected_hits):
+
+    cache = LRUCache(max_size=1)
+    n_created = 0
+
+    def factory():
+        nonlocal n_created
+        n_created += 1
+        return n_created
+
+    values = [cache.get_or_create("a", factory) for _ in range(n_calls)]
+
+    assert values == [1] * n_calls
+    assert n_created == 1
+
+    info = cache.info()
+
+    assert info.hits == expected_hits
+    assert info.misses == 1
+    assert info.max_size == 1
+    assert info.current_size == 1
+
+    cache.clear()
+
+    info = cache.info()
+
+    assert info.hits == 0
+    assert info.misses == 0
+    assert info.current_size == 0
@@ -1,12 +1,24 @@
 import numpy
+import pytest
+from openforcefield.topology import Molecule
 from openforcefield.typing.engines.smirnoff import ForceField
-from simtk import unit
+from simtk import openmm, unit
 
-from inspector.library.decomposition import evaluate_energy, evaluate_per_term_energies
+from inspector.library.decomposition import (
+    _decompose_nonbonded_energies,
+    _evaluate_valence_energies_numpy,
+    _ForceEnergyEvaluator,
+    evaluate_energy,
+    evaluate_per_term_energies,
+    evaluate_per_term_energies_batch,
+    group_forces_by_parameter_id,
+)
 from inspector.library.models.molecule import RESTMolecule
+from inspector.tests import compare_pydantic_models
 
 
-def test_evaluate_per_term_energies(z_propenal, openff_1_0_0):
+@pytest.mark.parametrize("engine", ["numpy", "openmm"])
+def test_evaluate_per_term_energies(z_propenal, openff_1_0_0, engine):
 
     z_propenal._conformers = [z_propenal.conformers[0]]
     molecule = RESTMolecule.from_openff(z_propenal)
@@ -21,7 +33,7 @@ def test_evaluate_per_term_energies(z_propenal, openff_1_0_0):
 
     # Compute the decomposed energies.
     decomposed_energy = evaluate_per_term_energies(
-        molecule, z_propenal.conformers[0], openff_1_0_0
+        molecule, z_propenal.conformers[0], openff_1_0_0, engine=engine
     )
 
     total_valence_energy = sum(
@@ -39,3 +51,306 @@ def test_evaluate_per_term_energies(z_propenal, openff_1_0_0):
     assert numpy.isclose(
         expected_energy.value_in_unit(unit.kilojoules_per_mole), total_energy
     )
+
+
+def test_evaluate_energy_many_forces():
+    """Make sure that the energy of systems with more forces than the number of
+    OpenMM force groups can still be evaluated per force."""
+
+    n_forces = 70
+
+    conformer = numpy.random.random((n_forces + 1, 3))
+
+    omm_system = openmm.System()
+    expected_energies = []
+
+    for i in range(n_forces + 1):
+        omm_system.addParticle(1.0)
+
+    for i in range(n_forces):
+
+        force = openmm.HarmonicBondForce()
+        force.addBond(i, i + 1, 0.1, 100.0 * (i + 1))
+        force.setForceGroup(3)
+
+        omm_system.addForce(force)
+
+        distance = numpy.linalg.norm(conformer[i] - conformer[i + 1])
+        expected_energies.append(0.5 * 100.0 * (i + 1) * (distance - 0.1) ** 2)
+
+    total_energy, energy_per_force = evaluate_energy(
+        omm_system, conformer * unit.nanometers
+    )
+
+    assert numpy.isclose(
+        total_energy.value_in_unit(unit.kilojoules_per_mole), sum(expected_energies)
+    )
+    assert numpy.allclose(
+        [
+            energy_per_force[i].value_in_unit(unit.kilojoules_per_mole)
+            for i in range(n_forces)
+        ],
+        expected_energies,
+    )
+
+    # The original force groups should be restored.
+    assert all(force.getForceGroup() == 3 for force in omm_system.getForces())
+
+
+def test_force_energy_evaluator_batches():
+    """Make sure that forces outside of the active batch can be evaluated using the
+    same context."""
+
+    n_forces = 40
+
+    conformer = numpy.random.random((n_forces + 1, 3)) * unit.nanometers
+
+    omm_system = openmm.System()
+
+    for i in range(n_forces + 1):
+        omm_system.addParticle(1.0)
+
+    for i in range(n_forces):
+
+        force = openmm.HarmonicBondForce()
+        force.addBond(i, i + 1, 0.1, 100.0 * (i + 1))
+
+        omm_system.addForce(force)
+
+    _, expected_energies = evaluate_energy(omm_system, conformer)
+
+    evaluator = _ForceEnergyEvaluator(omm_system)
+    evaluator.set_positions(conformer)
+
+    context = evaluator.context
+
+    energies = evaluator.force_energies([35, 2])
+
+    assert evaluator.context is context
+    assert {*energies} == {2, 35}
+
+    for force_index in energies:
+
+        assert numpy.isclose(
+            energies[force_index].value_in_unit(unit.kilojoules_per_mole),
+            expected_energies[force_index].value_in_unit(unit.kilojoules_per_mole),
+        )
+
+
+def test_force_energy_evaluator_evaluate_batch(monkeypatch):
+    """Make sure that the context is only re-initialized once per batch of forces
+    rather than once per batch per conformer."""
+
+    n_forces, n_conformers = 40, 3
+
+    conformers = numpy.random.random((n_conformers, n_forces + 1, 3)) * unit.nanometers
+
+    omm_system = openmm.System()
+
+    for i in range(n_forces + 1):
+        omm_system.addParticle(1.0)
+
+    for i in range(n_forces):
+
+        force = openmm.HarmonicBondForce()
+        force.addBond(i, i + 1, 0.1, 100.0 * (i + 1))
+
+        omm_system.addForce(force)
+
+    expected_energies = [
+        evaluate_energy(omm_system, conformers[i]) for i in range(n_conformers)
+    ]
+
+    evaluator = _ForceEnergyEvaluator(omm_system)
+
+    activated_batches = []
+
+    original_activate_batch = evaluator._activate_batch
+
+    def activate_batch(batch_index):
+
+        if batch_index != evaluator._active_batch:
+            activated_batches.append(batch_index)
+
+        original_activate_batch(batch_index)
+
+    monkeypatch.setattr(evaluator, "_activate_batch", activate_batch)
+
+    total_energies, energies_per_force_id = evaluator.evaluate_batch(conformers)
+
+    assert activated_batches == [1]
+
+    for i, (expected_total, expected_per_force) in enumerate(expected_energies):
+
+        assert numpy.isclose(
+            total_energies[i].value_in_unit(unit.kilojoules_per_mole),
+            expected_total.value_in_unit(unit.kilojoules_per_mole),
+        )
+        assert {*energies_per_force_id[i]} == {*expected_per_force}
+
+        for force_index, energy in energies_per_force_id[i].items():
+
+            assert numpy.isclose(
+                energy.value_in_unit(unit.kilojoules_per_mole),
+                expected_per_force[force_index].value_in_unit(unit.kilojoules_per_mole),
+            )
+
+
+def test_decompose_nonbonded_energy():
+
+    conformers = (
+        numpy.array(
+            [[[0.0, 0.0, 0.0], [0.4, 0.0, 0.0]], [[0.0, 0.0, 0.0], [0.5, 0.0, 0.0]]]
+        )
+        * unit.nanometers
+    )
+
+    omm_system = openmm.System()
+    omm_system.addParticle(1.0)
+    omm_system.addParticle(1.0)
+
+    nonbonded_force = openmm.NonbondedForce()
+    nonbonded_force.addParticle(0.5, 0.3, 1.0)
+    nonbonded_force.addParticle(-0.5, 0.3, 1.0)
+    omm_system.addForce(nonbonded_force)
+
+    evaluator = _ForceEnergyEvaluator(omm_system)
+    context = evaluator.context
+
+    energies_per_force_id = []
+
+    for i in range(len(conformers)):
+
+        evaluator.set_positions(conformers[i])
+        energies_per_force_id.append(evaluator.force_energies())
+
+    vdw_energies, electrostatic_energies = _decompose_nonbonded_energies(
+        evaluator, omm_system, conformers, energies_per_force_id
+    )
+
+    assert evaluator.context is context
+
+    distances = numpy.array([0.4, 0.5])
+
+    expected_vdw = 4.0 * 1.0 * ((0.3 / distances) ** 12 - (0.3 / distances) ** 6)
+    expected_electrostatic = 138.935456 * 0.5 * -0.5 / distances
+
+    assert numpy.allclose(vdw_energies, expected_vdw)
+    assert numpy.allclose(electrostatic_energies, expected_electrostatic, rtol=1.0e-4)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "openmm"])
+def test_evaluate_per_term_energies_many_parameters(engine):
+
+    molecule: Molecule = Molecule.from_smiles("CC(=O)Nc1ccc(OCC(O)CN)cc1C(F)(F)Cl")
+    molecule.generate_conformers(n_conformers=1)
+
+    force_field = ForceField("openff_unconstrained-1.0.0.offxml")
+
+    _, force_indices = group_forces_by_parameter_id(molecule, force_field)
+    assert sum(len(ids) for ids in force_indices.values()) > 31
+
+    omm_system = force_field.create_openmm_system(molecule.to_topology())
+    expected_energy, _ = evaluate_energy(omm_system, molecule.conformers[0])
+
+    decomposed_energy = evaluate_per_term_energies(
+        molecule, molecule.conformers[0], force_field, engine=engine
+    )
+
+    total_energy = (
+        sum(
+            valence_energy
+            for handler_energies in decomposed_energy.valence_energies.values()
+            for valence_energy in handler_energies.values()
+        )
+        + decomposed_energy.vdw_energy
+        + decomposed_energy.electrostatic_energy
+    )
+
+    assert numpy.isclose(
+        expected_energy.value_in_unit(unit.kilojoules_per_mole), total_energy
+    )
+
+
+@pytest.mark.parametrize("engine", ["numpy", "openmm"])
+def test_evaluate_per_term_energies_batch(z_propenal, openff_1_0_0, engine):
+
+    conformers = numpy.stack(
+        [
+            conformer.value_in_unit(unit.angstrom)
+            for conformer in z_propenal.conformers[:2]
+        ]
+    )
+
+    decomposed_energies = evaluate_per_term_energies_batch(
+        z_propenal, conformers * unit.angstrom, openff_1_0_0, engine=engine
+    )
+
+    assert decomposed_energies.n_conformers == 2
+
+    for i in range(2):
+
+        expected_energy = evaluate_per_term_energies(
+            z_propenal, conformers[i] * unit.angstrom, openff_1_0_0, engine=engine
+        )
+        compare_pydantic_models(decomposed_energies.conformer(i), expected_energy)
+
+
+def test_evaluate_per_term_energies_engines_match(z_propenal, openff_1_0_0):
+
+    z_propenal._conformers = [z_propenal.conformers[0]]
+
+    numpy_energy = evaluate_per_term_energies(
+        z_propenal, z_propenal.conformers[0], openff_1_0_0, engine="numpy"
+    )
+    openmm_energy = evaluate_per_term_energies(
+        z_propenal, z_propenal.conformers[0], openff_1_0_0, engine="openmm"
+    )
+
+    compare_pydantic_models(numpy_energy, openmm_energy)
+
+
+def test_evaluate_valence_energies_numpy(z_propenal):
+    """Make sure that the valence energies computed by the ``ValenceEnergyEngine``
+    match the energies of the valence forces of the full OpenMM system."""
+
+    force_field = ForceField("openff_unconstrained-1.0.0.offxml")
+
+    conformers = numpy.stack(
+        [conformer.value_in_unit(unit.angstrom) for conformer in z_propenal.conformers]
+    )
+
+    valence_energies, omm_system, *_ = _evaluate_valence_energies_numpy(
+        z_propenal, conformers * unit.angstrom, force_field
+    )
+
+    # Only the nonbonded terms should be evaluated using OpenMM.
+    assert all(
+        isinstance(force, openmm.NonbondedForce) for force in omm_system.getForces()
+    )
+
+    full_omm_system = force_field.create_openmm_system(z_propenal.to_topology())
+
+    expected_energies = []
+
+    for conformer in conformers:
+
+        _, energy_per_force = evaluate_energy(
+            full_omm_system, conformer * unit.angstrom
+        )
+
+        expected_energies.append(
+            sum(
+                energy_per_force[i].value_in_unit(unit.kilojoules_per_mole)
+                for i, force in enumerate(full_omm_system.getForces())
+                if not isinstance(force, openmm.NonbondedForce)
+            )
+        )
+
+    numpy_energies = sum(
+        energies
+        for handler_energies in valence_energies.values()
+        for energies in handler_energies.values()
+    )
+
+    assert numpy.allclose(numpy_energies, expected_energies)
@@ -1,8 +1,27 @@
+import numpy
+import pytest
 from openforcefield.topology import Molecule
 from openforcefield.typing.engines.smirnoff import ForceField
+from simtk import openmm, unit
 
-from inspector.library.forcefield import label_molecule
+from inspector.library import forcefield
+from inspector.library.decomposition import evaluate_energy
+from inspector.library.forcefield import (
+    charge_model_hash,
+    create_labelled_system,
+    create_system,
+    force_field_hash,
+    has_constraints,
+    label_cache,
+    label_molecule,
+    label_molecules_batch,
+    match_cache,
+    nonbonded_force_field,
+    partial_charge_cache,
+    unconstrained_force_field,
+)
 from inspector.library.models.molecule import RESTMolecule
+from inspector.library.timing import collect_timings
 from inspector.tests import compare_pydantic_models
 
 
@@ -30,3 +49,290 @@ def test_label_molecules_rest(methane: Molecule, openff_1_0_0: ForceField):
     rest_parameters = label_molecule(RESTMolecule.from_openff(methane), openff_1_0_0)
 
     compare_pydantic_models(openff_parameters, rest_parameters)
+
+
+def test_label_molecule_cached(methane: Molecule, openff_1_0_0: ForceField):
+
+    label_cache.clear()
+
+    expected_parameters = label_molecule(methane, openff_1_0_0)
+
+    # The labels should be shared between conformers of the same molecule.
+    methane._conformers = [methane.conformers[0] * 2.0]
+    cached_parameters = label_molecule(methane, openff_1_0_0)
+
+    assert label_cache.info().hits == 1
+    assert cached_parameters is expected_parameters
+
+    # A different force field should be labelled separately.
+    label_molecule(methane, unconstrained_force_field(openff_1_0_0))
+
+    assert label_cache.info().misses == 2
+
+
+def test_unconstrained_force_field(openff_1_0_0: ForceField):
+
+    force_field = unconstrained_force_field(openff_1_0_0)
+
+    assert force_field is not openff_1_0_0
+    assert "Constraints" in openff_1_0_0.registered_parameter_handlers
+    assert "Constraints" not in force_field.registered_parameter_handlers
+
+    # The unconstrained force field should be re-used.
+    assert unconstrained_force_field(openff_1_0_0) is force_field
+    assert unconstrained_force_field(force_field) is force_field
+
+
+def test_unconstrained_force_field_no_handler(openff_1_0_0: ForceField):
+
+    force_field = ForceField(openff_1_0_0.to_string())
+    force_field.deregister_parameter_handler("Constraints")
+
+    force_field_hash_before = force_field_hash(force_field)
+
+    assert not has_constraints(force_field)
+    assert unconstrained_force_field(force_field) is force_field
+
+    # Checking for constraints should not register an empty handler.
+    assert "Constraints" not in force_field.registered_parameter_handlers
+    assert force_field_hash(ForceField(force_field.to_string())) == (
+        force_field_hash_before
+    )
+
+
+def test_nonbonded_force_field(methane: Molecule, openff_1_0_0: ForceField):
+
+    force_field = nonbonded_force_field(openff_1_0_0)
+
+    assert "Bonds" in openff_1_0_0.registered_parameter_handlers
+    assert "Bonds" not in force_field.registered_parameter_handlers
+
+    assert nonbonded_force_field(openff_1_0_0) is force_field
+
+    omm_system = force_field.create_openmm_system(methane.to_topology())
+
+    assert omm_system.getNumConstraints() == 0
+    assert all(
+        isinstance(force, openmm.NonbondedForce) for force in omm_system.getForces()
+    )
+
+
+def _get_partial_charges(omm_system: openmm.System) -> numpy.ndarray:
+
+    nonbonded_force = [
+        force
+        for force in omm_system.getForces()
+        if isinstance(force, openmm.NonbondedForce)
+    ][0]
+
+    return numpy.array(
+        [
+            nonbonded_force.getParticleParameters(i)[0].value_in_unit(
+                unit.elementary_charge
+            )
+            for i in range(nonbonded_force.getNumParticles())
+        ]
+    )
+
+
+def test_force_field_hash(openff_1_0_0: ForceField, monkeypatch):
+
+    force_field = ForceField(openff_1_0_0.to_string())
+    assert force_field_hash(force_field) == force_field_hash(openff_1_0_0)
+
+    modified_force_field = ForceField(openff_1_0_0.to_string())
+    modified_force_field.get_parameter_handler("Bonds").parameters[0].length *= 2.0
+
+    assert force_field_hash(modified_force_field) != force_field_hash(openff_1_0_0)
+
+    # The hash should only be computed once per force field instance.
+    def hash_handlers(*_):
+        raise AssertionError("the force field should not be hashed again.")
+
+    monkeypatch.setattr(forcefield, "_hash_handlers", hash_handlers)
+    assert force_field_hash(force_field) == force_field_hash(openff_1_0_0)
+
+
+def test_derived_force_field_content(openff_1_0_0: ForceField):
+
+    unconstrained = unconstrained_force_field(openff_1_0_0)
+
+    # Separately loaded copies of a force field should share a derived force field.
+    assert (
+        unconstrained_force_field(ForceField(openff_1_0_0.to_string())) is unconstrained
+    )
+
+    modified_force_field = ForceField(openff_1_0_0.to_string())
+    modified_force_field.get_parameter_handler("Bonds").parameters[0].length *= 2.0
+
+    modified_unconstrained = unconstrained_force_field(modified_force_field)
+
+    assert modified_unconstrained is not unconstrained
+    assert (
+        modified_unconstrained.get_parameter_handler("Bonds").parameters[0].length
+        == modified_force_field.get_parameter_handler("Bonds").parameters[0].length
+    )
+
+
+def test_charge_model_hash(openff_1_0_0: ForceField):
+
+    force_field = ForceField(openff_1_0_0.to_string())
+    force_field.get_parameter_handler("Bonds").parameters[0].length *= 2.0
+
+    assert charge_model_hash(force_field) == charge_model_hash(openff_1_0_0)
+
+    force_field = ForceField(openff_1_0_0.to_string())
+    force_field.deregister_parameter_handler("ToolkitAM1BCC")
+
+    assert charge_model_hash(force_field) != charge_model_hash(openff_1_0_0)
+
+
+def test_create_system_cached_charges(methane: Molecule, openff_1_0_0: ForceField):
+
+    partial_charge_cache.clear()
+
+    with collect_timings() as timings:
+        expected_charges = _get_partial_charges(create_system(methane, openff_1_0_0))
+
+    assert partial_charge_cache.info().current_size == 1
+    assert timings.summarize()["assign_charges"][1] == 1
+
+    with collect_timings() as timings:
+        cached_charges = _get_partial_charges(create_system(methane, openff_1_0_0))
+
+    assert partial_charge_cache.info().hits == 1
+    assert "assign_charges" not in timings.summarize()
+
+    assert numpy.allclose(expected_charges, cached_charges)
+    # The callers molecule should not have been modified.
+    assert methane.partial_charges is None
+
+
+def test_create_system_valence_only(methane: Molecule, openff_1_0_0: ForceField):
+
+    partial_charge_cache.clear()
+
+    force_field = ForceField(openff_1_0_0.to_string())
+
+    for handler_name in ["vdW", "Electrostatics", "LibraryCharges", "ToolkitAM1BCC"]:
+        force_field.deregister_parameter_handler(handler_name)
+
+    omm_system = create_system(methane, force_field)
+
+    assert not any(
+        isinstance(force, openmm.NonbondedForce) for force in omm_system.getForces()
+    )
+    assert partial_charge_cache.info().current_size == 0
+
+
+def test_create_system_partial_charges(methane: Molecule, openff_1_0_0: ForceField):
+
+    expected_charges = numpy.array([-0.4, 0.1, 0.1, 0.1, 0.1])
+    methane.partial_charges = expected_charges * unit.elementary_charge
+
+    omm_system = create_system(methane, openff_1_0_0, use_partial_charges=True)
+    assert numpy.allclose(_get_partial_charges(omm_system), expected_charges)
+
+    # The charges assigned by the force field should be used unless the charges of
+    # the molecule are explicitly requested.
+    omm_system = create_system(methane, openff_1_0_0)
+    assert not numpy.allclose(_get_partial_charges(omm_system), expected_charges)
+
+
+def test_create_labelled_system(methane: Molecule, openff_1_0_0: ForceField):
+
+    label_cache.clear()
+    match_cache.clear()
+
+    force_field = ForceField(openff_1_0_0.to_string())
+
+    bond_handler = force_field.get_parameter_handler("Bonds")
+    original_find_matches = bond_handler.find_matches
+
+    n_calls = 0
+
+    def find_matches(*args, **kwargs):
+        nonlocal n_calls
+        n_calls += 1
+        return original_find_matches(*args, **kwargs)
+
+    bond_handler.find_matches = find_matches
+
+    applied_parameters, omm_system = create_labelled_system(methane, force_field)
+
+    # The SMIRKS patterns should only have been matched once.
+    assert n_calls == 1
+    # The force field should not have been modified.
+    assert bond_handler.find_matches == find_matches
+
+    # The matches should be re-used by later calls for the same molecular graph.
+    create_labelled_system(methane, force_field)
+    assert n_calls == 1
+
+    label_cache.clear()
+
+    compare_pydantic_models(applied_parameters, label_molecule(methane, openff_1_0_0))
+
+    expected_system = openff_1_0_0.create_openmm_system(methane.to_topology())
+    assert omm_system.getNumForces() == expected_system.getNumForces()
+
+    energy, _ = evaluate_energy(omm_system, methane.conformers[0])
+    expected_energy, _ = evaluate_energy(expected_system, methane.conformers[0])
+
+    assert numpy.isclose(
+        energy.value_in_unit(unit.kilojoules_per_mole),
+        expected_energy.value_in_unit(unit.kilojoules_per_mole),
+    )
+
+
+def test_with_precomputed_matches_unsupported_version(
+    openff_1_0_0: ForceField, monkeypatch
+):
+
+    import openforcefield
+
+    from inspector.library.forcefield import _with_precomputed_matches
+
+    monkeypatch.setattr(openforcefield, "__version__", "0.9.0")
+
+    # Unverified versions of the toolkit should fall back to matching the SMIRKS
+    # patterns again rather than patching the force field.
+    assert _with_precomputed_matches(openff_1_0_0, {"Bonds": {}}) is openff_1_0_0
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_label_molecules_batch(
+    methane: Molecule, z_propenal: Molecule, openff_1_0_0: ForceField, n_workers: int
+):
+
+    z_propenal._conformers = [z_propenal.conformers[0]]
+
+    # A molecule with an invalid valence which cannot be converted to an OpenFF
+    # molecule.
+    invalid_molecule = RESTMolecule(
+        symbols=["C", "O", "O", "O"],
+        connectivity=[(0, 1, 2), (0, 2, 2), (0, 3, 2)],
+        geometry=[0.0] * 12,
+    )
+
+    molecules = [
+        RESTMolecule.from_openff(methane),
+        invalid_molecule,
+        RESTMolecule.from_openff(z_propenal),
+    ]
+
+    results = [*label_molecules_batch(molecules, openff_1_0_0, n_workers=n_workers)]
+    assert len(results) == 3
+
+    assert results[0].error is None
+    compare_pydantic_models(
+        results[0].applied_parameters, label_molecule(methane, openff_1_0_0)
+    )
+
+    assert results[1].applied_parameters is None
+    assert results[1].error is not None
+
+    assert results[2].error is None
+    compare_pydantic_models(
+        results[2].applied_parameters, label_molecule(z_propenal, openff_1_0_0)
+    )
@@ -0,0 +1,85 @@
+import numpy
+import pytest
+from openforcefield.topology import Molecule
+from rdkit import Chem
+from simtk import unit
+
+from inspector.library.io import (
+    SDFRecordSplitter,
+    iter_sdf_path,
+    molecule_from_sdf_record,
+)
+
+
+def _write_sdf(file_path: str, *molecules: Molecule):
+
+    writer = Chem.SDWriter(file_path)
+
+    for molecule in molecules:
+        writer.write(molecule.to_rdkit())
+
+    writer.close()
+
+
+def test_iter_sdf_path(tmpdir, methane: Molecule, z_propenal: Molecule):
+
+    z_propenal._conformers = [z_propenal.conformers[0]]
+
+    _write_sdf(str(tmpdir.join("b.sdf")), methane, z_propenal)
+    _write_sdf(str(tmpdir.join("a.sdf")), methane)
+
+    with open(str(tmpdir.join("c.sdf")), "w") as file:
+        file.write("invalid\n$$$$\n")
+
+    tmpdir.join("ignored.txt").write("")
+
+    records = [*iter_sdf_path(str(tmpdir))]
+
+    assert [record_id for record_id, _ in records] == [
+        "a.sdf:0",
+        "b.sdf:0",
+        "b.sdf:1",
+        "c.sdf:0",
+    ]
+    assert records[-1][1] is None
+
+    records = [*iter_sdf_path(str(tmpdir.join("b.sdf")))]
+    assert [record_id for record_id, _ in records] == ["b.sdf:0", "b.sdf:1"]
+
+    molecule = molecule_from_sdf_record(records[1][1])
+
+    assert molecule.is_isomorphic_with(z_propenal)
+    assert numpy.allclose(
+        molecule.conformers[0].value_in_unit(unit.angstrom),
+        z_propenal.conformers[0].value_in_unit(unit.angstrom),
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+@pytest.mark.parametrize("trailing_delimiter", [True, False])
+def test_sdf_record_splitter(chunk_size: int, trailing_delimiter: bool):
+
+    expected_records = ["a\nM  END\n$$$$\n", "b\r\nM  END\r\n$$$$\r\n", "c\nM  END\n"]
+
+    contents = "".join(expected_records)
+
+    if trailing_delimiter:
+
+        expected_records[-1] += "$$$$\n"
+        contents += "$$$$\n"
+
+    splitter = SDFRecordSplitter()
+
+    records = [
+        record
+        for i in range(0, len(contents), chunk_size)
+        for record in splitter.feed(contents[i : i + chunk_size])
+    ]
+
+    final_record = splitter.flush()
+
+    if final_record is not None:
+        records.append(final_record)
+
+    assert records == expected_records
+    assert splitter.flush() is None
@@ -6,7 +6,11 @@ from scipy.optimize import OptimizeResult
 from simtk import openmm, unit
 from simtk.openmm import app
 
-from inspector.library.minimization import EnergyMinimizer, MinimizationError
+from inspector.library.minimization import (
+    EnergyMinimizer,
+    MinimizationError,
+    _MemoizedObjective,
+)
 from inspector.library.models.molecule import RESTMolecule
 
 
@@ -37,8 +41,10 @@ def test_evaluate_energy_and_force(z_propenal):
     force_field = ForceField("openff_unconstrained-1.2.0.offxml")
     omm_system = force_field.create_openmm_system(z_propenal.to_topology())
 
+    omm_context = EnergyMinimizer._create_context(omm_system)
+
     energy, force = EnergyMinimizer._evaluate_energy_and_force(
-        z_propenal.conformers[0].value_in_unit(unit.nanometers), omm_system
+        z_propenal.conformers[0].value_in_unit(unit.nanometers), omm_context
     )
 
     assert not numpy.isnan(energy)
@@ -47,6 +53,69 @@ def test_evaluate_energy_and_force(z_propenal):
     assert numpy.isclose(energy, 6.526425302550168)
     assert force.shape == (z_propenal.n_atoms * 3,)
 
+    # Re-using the context for a second evaluation should give identical results.
+    energy_2, force_2 = EnergyMinimizer._evaluate_energy_and_force(
+        z_propenal.conformers[0].value_in_unit(unit.nanometers), omm_context
+    )
+
+    assert numpy.isclose(energy, energy_2)
+    assert numpy.allclose(force, force_2)
+
+
+def test_memoized_objective(monkeypatch):
+
+    evaluated_conformers = []
+
+    def evaluate_energy_and_force(conformer, _):
+        evaluated_conformers.append(conformer.copy())
+        return float(conformer.sum()), -conformer
+
+    monkeypatch.setattr(
+        EnergyMinimizer, "_evaluate_energy_and_force", evaluate_energy_and_force
+    )
+
+    objective_function = _MemoizedObjective(None)
+    conformer = numpy.arange(6.0)
+
+    energy, _ = objective_function(conformer)
+    assert numpy.isclose(energy, 15.0)
+
+    # Modifying the array in-place should not return the memoized value.
+    conformer[0] = 1.0
+
+    assert numpy.isclose(objective_function(conformer.copy())[0], 16.0)
+    assert numpy.isclose(objective_function(conformer.copy())[0], 16.0)
+
+    assert len(evaluated_conformers) == 2
+
+
+@pytest.mark.parametrize(
+    "frame_stride, frame_energy_threshold, endpoints_only, expected_indices",
+    [
+        (1, None, False, [0, 1, 2, 3, 4, 5]),
+        (2, None, False, [0, 2, 4, 5]),
+        (3, None, False, [0, 3, 5]),
+        (1, 1.5, False, [0, 2, 4, 5]),
+        (2, 2.5, False, [0, 4, 5]),
+        (1, None, True, [0, 5]),
+    ],
+)
+def test_select_frames(
+    frame_stride, frame_energy_threshold, endpoints_only, expected_indices
+):
+
+    energies = numpy.array([10.0, 9.0, 8.0, 7.5, 6.0, 5.9])
+
+    frame_indices = EnergyMinimizer._select_frames(
+        energies, frame_stride, frame_energy_threshold, endpoints_only
+    )
+
+    assert frame_indices.tolist() == expected_indices
+
+
+def test_select_frames_empty():
+    assert len(EnergyMinimizer._select_frames(numpy.array([]))) == 0
+
 
 @pytest.mark.parametrize("as_rest_molecule", [False, True])
 def test_minimize(as_rest_molecule, z_propenal):
@@ -81,6 +150,24 @@ def test_minimize(as_rest_molecule, z_propenal):
     assert numpy.isclose(actual_energy, expected_energy)
 
 
+def test_minimize_endpoints_only(z_propenal):
+
+    force_field = ForceField("openff-1.2.0.offxml")
+
+    full_trajectory = EnergyMinimizer.minimize(
+        z_propenal, z_propenal.conformers[0], force_field
+    )
+    trajectory = EnergyMinimizer.minimize(
+        z_propenal, z_propenal.conformers[0], force_field, endpoints_only=True
+    )
+
+    assert len(full_trajectory.frames) > 2
+    assert len(trajectory.frames) == 2
+
+    assert trajectory.frames[0] == full_trajectory.frames[0]
+    assert trajectory.frames[-1] == full_trajectory.frames[-1]
+
+
 def test_minimizer_failed(z_propenal, monkeypatch):
     def minimize(*args, **kwargs):
         return OptimizeResult(success=False, message="Failed")
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from inspector.library.parallel import map_ordered
+
+_OFFSET = 0
+
+
+def _initialize(offset: int):
+
+    global _OFFSET
+    _OFFSET = offset
+
+
+def _add_offset(value: int) -> int:
+    return value + _OFFSET
+
+
+def _get_pid(_) -> int:
+    return os.getpid()
+
+
+@pytest.mark.parametrize("max_pending", [None, 1, 3])
+def test_map_ordered(max_pending):
+
+    results = [
+        *map_ordered(
+            _add_offset,
+            range(20),
+            n_workers=2,
+            initializer=_initialize,
+            initargs=(5,),
+            max_pending=max_pending,
+        )
+    ]
+
+    assert results == [value + 5 for value in range(20)]
+
+
+def test_map_ordered_lazy():
+    """Make sure that items are only consumed from the input as they are needed."""
+
+    n_consumed = 0
+
+    def items():
+
+        nonlocal n_consumed
+
+        for i in range(100):
+
+            n_consumed += 1
+            yield i
+
+    results = map_ordered(_add_offset, items(), n_workers=1, max_pending=2)
+
+    assert next(results) == 0
+    assert n_consumed <= 3
+
+    results.close()
+
+
+def test_map_ordered_workers():
+
+    process_ids = {*map_ordered(_get_pid, range(8), n_workers=2)}
+
+    assert os.getpid() not in process_ids
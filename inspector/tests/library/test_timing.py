@@ -0,0 +1,61 @@
+import contextvars
+import threading
+
+from inspector.library.timing import _timings, collect_timings, span, timed
+
+
+@timed("add")
+def add(a, b=0):
+    return a + b
+
+
+def test_timed_disabled():
+
+    assert add(1, b=2) == 3
+    assert _timings.get() is None
+
+
+def test_collect_timings():
+
+    with collect_timings() as timings:
+
+        with span("outer"):
+
+            add(1)
+            add(2)
+
+    assert [name for name, _ in timings.spans] == ["add", "add", "outer"]
+    assert _timings.get() is None
+
+    summary = timings.summarize()
+
+    assert [*summary] == ["add", "outer"]
+    assert summary["add"][1] == 2
+    assert summary["outer"][1] == 1
+
+    assert summary["add"][0] <= summary["outer"][0]
+
+
+def test_collect_timings_nested():
+
+    with collect_timings() as outer_timings:
+
+        with collect_timings() as inner_timings:
+            add(1)
+
+        assert inner_timings is outer_timings
+
+    assert [name for name, _ in outer_timings.spans] == ["add"]
+
+
+def test_collect_timings_thread():
+
+    with collect_timings() as timings:
+
+        context = contextvars.copy_context()
+
+        thread = threading.Thread(target=context.run, args=(add, 1))
+        thread.start()
+        thread.join()
+
+    assert [name for name, _ in timings.spans] == ["add"]
@@ -0,0 +1,81 @@
+import numpy
+import pytest
+from openforcefield.typing.engines.smirnoff import ForceField
+from simtk import unit
+
+from inspector.library.decomposition import (
+    evaluate_energy,
+    group_forces_by_parameter_id,
+)
+from inspector.library.forcefield import label_molecule
+from inspector.library.valence import ValenceEnergyEngine
+
+
+@pytest.fixture()
+def unconstrained_force_field() -> ForceField:
+    return ForceField("openff_unconstrained-1.0.0.offxml")
+
+
+def test_evaluate_parameter_energies(z_propenal, unconstrained_force_field):
+
+    applied_parameters = label_molecule(z_propenal, unconstrained_force_field)
+
+    engine = ValenceEnergyEngine(applied_parameters, unconstrained_force_field)
+    parameter_energies = engine.evaluate_parameter_energies(
+        numpy.stack(
+            [
+                conformer.value_in_unit(unit.angstrom)
+                for conformer in z_propenal.conformers
+            ]
+        )
+    )
+
+    assert {*parameter_energies} == {
+        "Bonds",
+        "Angles",
+        "ProperTorsions",
+        "ImproperTorsions",
+    }
+
+    omm_system, force_indices = group_forces_by_parameter_id(
+        z_propenal, unconstrained_force_field
+    )
+
+    for conformer_index, conformer in enumerate(z_propenal.conformers):
+
+        _, energy_per_force = evaluate_energy(omm_system, conformer)
+
+        for handler_type in force_indices:
+            for parameter_id, force_index in force_indices[handler_type].items():
+
+                expected_energy = energy_per_force[force_index].value_in_unit(
+                    unit.kilojoules_per_mole
+                )
+                actual_energy = parameter_energies[handler_type][parameter_id][
+                    conformer_index
+                ]
+
+                assert numpy.isclose(expected_energy, actual_energy)
+
+
+def test_evaluate_term_energies(z_propenal, unconstrained_force_field):
+
+    applied_parameters = label_molecule(z_propenal, unconstrained_force_field)
+    engine = ValenceEnergyEngine(applied_parameters, unconstrained_force_field)
+
+    conformer = z_propenal.conformers[0].value_in_unit(unit.angstrom)
+
+    term_energies = engine.evaluate_term_energies(conformer)
+    parameter_energies = engine.evaluate_parameter_energies(conformer)
+
+    atom_indices, bond_energies = term_energies["Bonds"]
+
+    assert atom_indices.shape == (z_propenal.n_bonds, 2)
+    assert bond_energies.shape == (1, z_propenal.n_bonds)
+
+    for handler_type in term_energies:
+
+        assert numpy.isclose(
+            term_energies[handler_type][1].sum(),
+            sum(energy.sum() for energy in parameter_energies[handler_type].values()),
+        )
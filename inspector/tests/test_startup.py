@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+
+# The maximum time [s] that importing the CLI and the ASGI app may take in a fresh
+# interpreter.
+IMPORT_TIME_BUDGET = 3.0
+
+# The slow to import modules whose import should be deferred until first used.
+DEFERRED_MODULES = [
+    "openforcefield",
+    "rdkit",
+    "mdtraj",
+    "scipy.optimize",
+    "simtk.openmm",
+]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+
+start_time = time.perf_counter()
+
+import inspector.backend.app
+import inspector.cli
+
+import_time = time.perf_counter() - start_time
+
+print(
+    json.dumps(
+        {{
+            "import_time": import_time,
+            "imported": [name for name in {DEFERRED_MODULES} if name in sys.modules],
+        }}
+    )
+)
+"""
+
+
+def test_cold_startup():
+
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT])
+    result = json.loads(output.decode().strip().split("\n")[-1])
+
+    assert result["imported"] == []
+    assert result["import_time"] < IMPORT_TIME_BUDGET